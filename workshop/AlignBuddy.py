@@ -40,6 +40,8 @@ from io import StringIO, TextIOWrapper
 import random
 import re
 from collections import OrderedDict
+from array import array
+from itertools import accumulate
 from shutil import *
 from subprocess import Popen, PIPE, CalledProcessError
 from math import log, ceil
@@ -65,6 +67,11 @@ from Bio.Alphabet import IUPAC
 
 # ################################################ GLOBALS ###################################################### #
 GAP_CHARS = ["-", ".", " "]
+# clean_seq() swaps gaps for a placeholder while Sb.clean_seq() runs, so they are treated as residues
+# (stops become gaps)
+GAP_PROTECT = str.maketrans({"-": "�"})
+GAP_PROTECT_PROTEIN = str.maketrans({"-": "�", "*": "�"})
+GAP_RESTORE = str.maketrans({"�": "-"})
 VERSION = br.Version("AlignBuddy", 1, 1, br.contributors)
 
 
@@ -192,6 +199,29 @@ class AlignBuddy(object):  # Open a file or read a handle and parse, or convert
         return
 
     def __str__(self):
+        output = StringIO()
+        self.write(output)
+        return output.getvalue()
+
+    def write(self, file_path, out_format=None):
+        """
+        Write the alignments straight out to their destination, without building up the whole output as a string first
+        :param file_path: File path or open handle (e.g., sys.stdout)
+        :param out_format: Use a different format than self._out_format
+        :return: None
+        """
+        if type(file_path) == str:
+            with open(file_path, "w") as ofile:
+                self.write(ofile, out_format)
+            return
+
+        if out_format:
+            out_format_save = str(self._out_format)
+            self.set_format(out_format)
+            self.write(file_path)
+            self.set_format(out_format_save)
+            return
+
         empty_alignments = []
         for indx, alignment in enumerate(self.alignments):
             if not len(alignment):
@@ -201,7 +231,8 @@ class AlignBuddy(object):  # Open a file or read a handle and parse, or convert
             del self.alignments[indx]
 
         if len(self.alignments) == 0:
-            return "AlignBuddy object contains no alignments.\n"
+            file_path.write("AlignBuddy object contains no alignments.\n")
+            return
 
         # There is a weird bug in genbank write() that concatenates dots to the organism name (if set).
         # The following is a work around...
@@ -218,45 +249,28 @@ class AlignBuddy(object):  # Open a file or read a handle and parse, or convert
         if self._out_format in multiple_alignments_unsupported and len(self.alignments) > 1:
             raise ValueError("%s format does not support multiple alignments in one file.\n" % self._out_format)
 
+        ofile = br.RstripWriter(file_path)
         if self._out_format == "phylipsr":
-            output = br.phylip_sequential_out(self)
+            ofile.write(br.phylip_sequential_out(self))
 
         elif self._out_format == "phylipss":
-            output = br.phylip_sequential_out(self, relaxed=False)
+            ofile.write(br.phylip_sequential_out(self, relaxed=False))
 
         else:
-            tmp_dir = MyFuncs.TempDir()
-            with open("%s/aligns.tmp" % tmp_dir.path, "w") as ofile:
-                try:
-                    AlignIO.write(self.alignments, ofile, self._out_format)
-                except ValueError as e:
-                    if "Sequences must all be the same length" in str(e):
-                        _stderr("Warning: Alignment format detected but sequences are different lengths. "
-                                "Format changed to fasta to accommodate proper printing of records.\n")
-                        AlignIO.write(self.alignments, ofile, "fasta")
-                    elif "Repeated name" in str(e) and self._out_format == "phylip":
-                        _stderr("Warning: Phylip format returned a 'repeat name' error, probably due to truncation. "
-                                "Format changed to phylip-relaxed.\n")
-                        AlignIO.write(self.alignments, ofile, "phylip-relaxed")
-                    else:
-                        raise e
-
-            with open("%s/aligns.tmp" % tmp_dir.path, "r") as ifile:
-                output = ifile.read()
-        if self._out_format == "clustal":
-            return "%s\n\n" % output.rstrip()
-        else:
-            return "%s\n" % output.rstrip()
-
-    def write(self, file_path, out_format=None):
-        with open(file_path, "w") as ofile:
-            if out_format:
-                out_format_save = str(self._out_format)
-                self.set_format(out_format)
-                ofile.write(str(self))
-                self.set_format(out_format_save)
-            else:
-                ofile.write(str(self))
+            try:
+                AlignIO.write(self.alignments, ofile, self._out_format)
+            except ValueError as e:
+                if "Sequences must all be the same length" in str(e):
+                    _stderr("Warning: Alignment format detected but sequences are different lengths. "
+                            "Format changed to fasta to accommodate proper printing of records.\n")
+                    AlignIO.write(self.alignments, ofile, "fasta")
+                elif "Repeated name" in str(e) and self._out_format == "phylip":
+                    _stderr("Warning: Phylip format returned a 'repeat name' error, probably due to truncation. "
+                            "Format changed to phylip-relaxed.\n")
+                    AlignIO.write(self.alignments, ofile, "phylip-relaxed")
+                else:
+                    raise e
+        ofile.close("\n\n" if self._out_format == "clustal" else "\n")
         return
 
 
@@ -308,60 +322,18 @@ def guess_format(_input):  # _input can be list, SeqBuddy object, file handle, o
     if str(type(_input)) == "<class '_io.TextIOWrapper'>" or isinstance(_input, StringIO):
         if not _input.seekable():  # Deal with input streams (e.g., stdout pipes)
             _input = StringIO(_input.read())
-        if _input.read() == "":
-            return "empty file"
-        _input.seek(0)
 
-        possible_formats = ["gb", "phylipss", "phylipsr", "phylip", "phylip-relaxed",
-                            "stockholm", "fasta", "nexus", "clustal"]
+        # Most formats announce themselves in the first few lines, so only trial parse if the sniffer can't decide
+        _format = br.sniff_format(_input, "alignbuddy")
+        if _format:
+            return br.parse_format(_format) if _format != "empty file" else _format
+
+        # Phylip files are fully handled by sniff_format(). Only the head of the file is trial parsed.
+        _input = StringIO(br.read_head(_input)[0])
+        possible_formats = ["gb", "stockholm", "fasta", "nexus", "clustal"]
         for _format in possible_formats:
             try:
                 _input.seek(0)
-                if _format == "phylip":
-                    sequence = "\n %s" % _input.read().strip()
-                    _input.seek(0)
-                    alignments = re.split("\n ([0-9]+) ([0-9]+)\n", sequence)[1:]
-                    align_sizes = []
-                    for indx in range(int(len(alignments) / 3)):
-                        align_sizes.append((int(alignments[indx * 3]), int(alignments[indx * 3 + 1])))
-
-                    phy = list(AlignIO.parse(_input, "phylip"))
-                    _input.seek(0)
-
-                    indx = 0
-                    phy_ids = []
-                    for key in align_sizes:
-                        phy_ids.append([])
-                        for rec in phy[indx]:
-                            assert len(rec.seq) == key[1]
-                            phy_ids[-1].append(rec.id)
-                        indx += 1
-
-                    phy_rel = list(AlignIO.parse(_input, "phylip-relaxed"))
-                    _input.seek(0)
-                    if phy_rel:
-                        for indx, aln in enumerate(phy_rel):
-                            for rec in aln:
-                                if len(rec.seq) != align_sizes[indx][1]:
-                                    return br.parse_format("phylip")
-                                if rec.id in phy_ids[indx]:
-                                    continue
-                                else:
-                                    return br.parse_format("phylip-relaxed")
-                    return br.parse_format("phylip")
-
-                if _format == "phylipss":
-                    if br.phylip_sequential_read(_input.read(), relaxed=False):
-                        _input.seek(0)
-                        return br.parse_format(_format)
-                    else:
-                        continue
-                if _format == "phylipsr":
-                    if br.phylip_sequential_read(_input.read()):
-                        _input.seek(0)
-                        return br.parse_format(_format)
-                    else:
-                        continue
                 if list(AlignIO.parse(_input, _format)):
                     _input.seek(0)
                     return br.parse_format(_format)
@@ -401,33 +373,29 @@ def _stdout(message, quiet=False):
 
 class FeatureReMapper:
     """
-    Build a list that maps original alignment columns to new positions if columns have been removed
+    Map original alignment columns to new positions if columns have been removed, and move the features to match
     This will not work if new columns are being added.
-    :usage: Instantiate a new object, and for each column in the original alignment, call the 'extend' method,
-            specifying whether that column exists in the new alignment or not. Remap the features on the new alignment
-            by calling the remap_features method.
+    :usage: Instantiate a new object with a keep mask (one truthy/falsy value for each column in the original
+            alignment, e.g., a bytearray), then remap the features on the new alignment by calling the remap_features
+            method. The mask can also be built up one column at a time by calling the 'extend' method for each column.
     """
-    def __init__(self):
-        self.position_map = []
-        self.starting_position_filled = False
+    def __init__(self, keep=None):
+        self.keep = bytearray()
+        # prefix[i] is the number of columns kept before column i, so [s, e) -> [prefix[s], prefix[e])
+        self.prefix = None
+        if keep is not None:
+            self.keep = bytearray([1 if exists else 0 for exists in keep]) if type(keep) not in [bytes, bytearray] \
+                else bytearray(keep)
 
     def extend(self, exists=True):
-        if len(self.position_map) == 0:
-            if exists:
-                self.starting_position_filled = True
-            self.position_map.append((0, exists))
-
-        else:
-            if exists and not self.starting_position_filled:
-                self.position_map.append((0, True))
-                self.starting_position_filled = True
-            elif exists and self.starting_position_filled:
-                self.position_map.append((self.position_map[-1][0] + 1, True))
-            else:
-                self.position_map.append((self.position_map[-1][0], False))
+        self.keep.append(1 if exists else 0)
+        self.prefix = None
         return
 
     def remap_features(self, old_alignment, new_alignment):
+        if self.prefix is None:
+            self.prefix = array("l", [0])
+            self.prefix.extend(accumulate(self.keep))
         new_records = list(new_alignment)
         for indx, rec in enumerate(old_alignment):
             new_features = []
@@ -440,15 +408,13 @@ class FeatureReMapper:
 
     def _remap(self, feature):
         if type(feature.location) == FeatureLocation:
-            for pos, present in self.position_map[feature.location.start:feature.location.end]:
-                if present:
-                    start = pos
-                    end = self.position_map[feature.location.end - 1][0] + 1
-                    location = FeatureLocation(start, end, strand=feature.location.strand)
-                    feature.location = location
-                    return feature
-            else:
+            start = min(max(int(feature.location.start), 0), len(self.keep))
+            end = min(max(int(feature.location.end), 0), len(self.keep))
+            start, end = self.prefix[start], self.prefix[end]
+            if start == end:  # None of the columns under the feature are left
                 return None
+            feature.location = FeatureLocation(start, end, strand=feature.location.strand)
+            return feature
 
         else:  # CompoundLocation
             parts = []
@@ -478,16 +444,31 @@ def alignment_lengths(alignbuddy):
     return output
 
 
-def bootstrap(alignbuddy, num_bootstraps=1):
+def bootstrap(alignbuddy, num_bootstraps=1, seed=None):
+    """
+    Resample alignment columns with replacement
+    :param alignbuddy: AlignBuddy object
+    :param num_bootstraps: Number of replicates to generate from each alignment
+    :param seed: Seed the random number generator, for reproducible replicates
+    :return: New AlignBuddy object of the bootstrapped alignments
+    """
+    rng = random.Random(seed)
     new_alignments = []
     for alignment in alignbuddy.alignments:
+        length = alignment.get_alignment_length()
         for _ in range(num_bootstraps):
-            length = alignment.get_alignment_length()
-            position = random.randint(0, length - 1)
-            new_alignment = alignment[:, position:position + 1]
-            for i in range(length - 1):
-                position = random.randint(0, length - 1)
-                new_alignment += alignment[:, position:position + 1]
+            # Pull every column at once, instead of concatenating the alignment back together one column at a time
+            columns = [rng.randrange(length) for _ in range(length)]
+            new_alignment = MultipleSeqAlignment([], alphabet=alignment._alphabet)
+            for rec in alignment:
+                seq = str(rec.seq)
+                new_rec = SeqRecord(Seq("".join([seq[col] for col in columns]), alphabet=rec.seq.alphabet),
+                                    id=rec.id, name=rec.name, description=rec.description, dbxrefs=rec.dbxrefs[:])
+                for key, value in rec.letter_annotations.items():
+                    value = [value[col] for col in columns]
+                    new_rec.letter_annotations[key] = value if type(rec.letter_annotations[key]) != str \
+                        else "".join(value)
+                new_alignment.append(new_rec)
             new_alignments.append(new_alignment)
     alignbuddy = AlignBuddy(new_alignments, out_format=alignbuddy._out_format)
     return alignbuddy
@@ -503,18 +484,17 @@ def clean_seq(alignbuddy, ambiguous=True, rep_char="N", skip_list=None):
     :return: The cleaned AlignBuddy object
     """
     records = alignbuddy.records()
-    # Protect gaps from being cleaned by Sb.clean_seq
+    # Protect gaps (and protein stops) from being cleaned by Sb.clean_seq
     for rec in records:
-        if rec.seq.alphabet == IUPAC.protein:
-            rec.seq = Seq(re.sub("\*", "-", str(rec.seq)), alphabet=rec.seq.alphabet)
-        rec.seq = Seq(re.sub("-", "�", str(rec.seq)), alphabet=rec.seq.alphabet)
+        protect = GAP_PROTECT_PROTEIN if rec.seq.alphabet == IUPAC.protein else GAP_PROTECT
+        rec.seq = Seq(str(rec.seq).translate(protect), alphabet=rec.seq.alphabet)
 
     skip_list = "�" if not skip_list else "�" + "".join(skip_list)
 
     seqbuddy = Sb.SeqBuddy(records, alpha=alignbuddy.alpha)
     Sb.clean_seq(seqbuddy, ambiguous, rep_char, skip_list)
     for rec in records:
-        rec.seq = Seq(re.sub("�", "-", str(rec.seq)), alphabet=rec.seq.alphabet)
+        rec.seq = Seq(str(rec.seq).translate(GAP_RESTORE), alphabet=rec.seq.alphabet)
     return alignbuddy
 
 
@@ -652,24 +632,20 @@ def consensus_sequence(alignbuddy):
     return alignbuddy
 
 
-def delete_records(alignbuddy, regex):
+def delete_records(alignbuddy, regex, id_files=None):
     """
     Deletes rows with names/IDs matching a search pattern
     :param alignbuddy: AlignBuddy object
-    :param regex: The regex pattern to search with (duck typed for list or string)
+    :param regex: The regex pattern to search with (duck typed for list or string, or a br.PatternFilter object)
+    :param id_files: Path, or list of paths, to files of exact IDs to delete (one per line)
     :return: The modified AlignBuddy object
     """
-    if type(regex) == str:
-        regex = [regex]
-    for indx, pattern in enumerate(regex):
-        regex[indx] = ".*" if pattern == "*" else pattern
-
-    regex = "|".join(regex)
+    regex = regex if type(regex) == br.PatternFilter else br.PatternFilter(regex, id_files)
     alignments = []
     for alignment in alignbuddy.alignments:
         matches = []
         for record in alignment:
-            if not re.search(regex, record.id):
+            if not regex.search(record.id):
                 matches.append(record)
         alignment._records = matches
         alignments.append(alignment)
@@ -760,12 +736,10 @@ def extract_regions(alignbuddy, start, end):
     """
     alb_copy = make_copy(alignbuddy)
     for indx, alignment in enumerate(alignbuddy.alignments):
-        position_map = FeatureReMapper()
-        for i in range(alignment.get_alignment_length()):
-            if start <= i <= end:
-                position_map.extend(True)
-            else:
-                position_map.extend(False)
+        num_columns = alignment.get_alignment_length()
+        keep = bytearray(num_columns)
+        keep[max(start, 0):max(end + 1, 0)] = b"\x01" * len(range(num_columns)[max(start, 0):max(end + 1, 0)])
+        position_map = FeatureReMapper(keep)
 
         alignbuddy.alignments[indx] = alignment[:, start:end]
         position_map.remap_features(alb_copy.alignments[indx], alignbuddy.alignments[indx])
@@ -1058,37 +1032,31 @@ def map_features2alignment(seqbuddy, alignbuddy):
 
 def order_ids(alignbuddy, reverse=False):
     """
-    Sorts the alignments by ID, alphabetically
+    Sorts the alignments by ID, alpha-numerically (see Sb.order_ids())
     :param alignbuddy: AlignBuddy object
     :param reverse: Reverses the order
     :return: The modified AlignBuddy object
     """
-    for indx, alignment in enumerate(alignbuddy.alignments):
-        alignment = Sb.SeqBuddy(list(alignment))
-        Sb.order_ids(alignment, reverse=reverse)
-        alignbuddy.alignments[indx] = MultipleSeqAlignment(alignment.records)
+    for alignment in alignbuddy.alignments:
+        alignment.sort(key=lambda rec: (br.natural_sort_key(rec.id), rec.id), reverse=reverse)
     return alignbuddy
 
 
-def pull_records(alignbuddy, regex, description=False):
+def pull_records(alignbuddy, regex, description=False, id_files=None):
     """
     Retrieves rows with names/IDs matching a search pattern
     :param alignbuddy: The AlignBuddy object to be pulled from
-    :param regex: List of regex expressions or single regex
+    :param regex: List of regex expressions or single regex (or a br.PatternFilter object)
     :param description: Allow search in description string
+    :param id_files: Path, or list of paths, to files of exact IDs to pull (one per line)
     :return: The modified AlignBuddy object
     """
-    if type(regex) == str:
-        regex = [regex]
-    for indx, pattern in enumerate(regex):
-        regex[indx] = ".*" if pattern == "*" else pattern
-
-    regex = "|".join(regex)
+    regex = regex if type(regex) == br.PatternFilter else br.PatternFilter(regex, id_files)
     alignments = []
     for alignment in alignbuddy.alignments:
         matches = []
         for rec in alignment:
-            if re.search(regex, rec.id) or (description and re.search(regex, rec.description)):
+            if regex.search(rec.id) or (description and regex.search(rec.description)):
                 matches.append(rec)
         alignment._records = matches
         alignments.append(alignment)
@@ -1157,7 +1125,7 @@ def trimal(alignbuddy, threshold):
     :param threshold: The threshold value or trimming algorithm to be used
     :return: The trimmed AlignBuddy object
     """
-    def gappyout(_gap_distr, _position_map):
+    def gappyout(_gap_distr):
         _max_gaps = 0
         # If there are no columns with zero gaps, scan through the distribution to find where the columns start
         for i in _gap_distr:
@@ -1212,18 +1180,19 @@ def trimal(alignbuddy, threshold):
 
             active_pointer = prev_pointer2
 
-        cuts = []
-        for col, gaps in enumerate(each_column):
-            if gaps <= _max_gaps:
-                cuts.append(col)
-                _position_map.extend(True)
-            else:
-                _position_map.extend(False)
+        return bytearray(1 if gaps <= _max_gaps else 0 for gaps in each_column)
 
+    def keep_columns(_keep):
+        # Slice out each run of kept columns in one go, instead of concatenating the alignment one column at a time
         _new_alignment = alignment[:, 0:0]
-        for _col in cuts:
-            _new_alignment += alignment[:, _col:_col + 1]
-
+        _col = 0
+        while _col < len(_keep):
+            _start = _keep.find(1, _col)
+            if _start == -1:
+                break
+            _col = _keep.find(0, _start)
+            _col = len(_keep) if _col == -1 else _col
+            _new_alignment += alignment[:, _start:_col]
         return _new_alignment
 
     for alignment_index, alignment in enumerate(alignbuddy.alignments):
@@ -1234,47 +1203,31 @@ def trimal(alignbuddy, threshold):
         num_columns = alignment.get_alignment_length()
         each_column = [0 for _ in range(num_columns)]
 
-        # Each position_map index corresponds to the original column position, values are tuples of the new position
-        # and whether the column still exists (True) or has been deleted (False)
-        position_map = FeatureReMapper()
-
         max_gaps = 0
-        for indx in range(num_columns):
-            num_gaps = len(re.findall("-", str(alignment[:, indx])))
+        for indx, column in enumerate(zip(*[str(rec.seq) for rec in alignment])):
+            num_gaps = column.count("-")
             gap_distr[num_gaps] += 1
             each_column[indx] = num_gaps
 
         # Remove any columns with any gaps
         if threshold in ["no_gaps", "all"]:
             threshold = 0
-            new_alignment = alignment[:, 0:0]
-            for next_col, num_gaps in enumerate(each_column):
-                if num_gaps <= max_gaps:
-                    new_alignment += alignment[:, next_col:next_col + 1]
-                    position_map.extend(True)
-                else:
-                    position_map.extend(False)
+            keep = bytearray(1 if num_gaps <= max_gaps else 0 for num_gaps in each_column)
 
         # Remove any columns that contain nothing but gaps
         elif threshold == "clean":
             max_gaps = len(alignment) - 1
-            new_alignment = alignment[:, 0:0]
-            for next_col, num_gaps in enumerate(each_column):
-                if num_gaps <= max_gaps:
-                    new_alignment += alignment[:, next_col:next_col + 1]
-                    position_map.extend(True)
-                else:
-                    position_map.extend(False)
+            keep = bytearray(1 if num_gaps <= max_gaps else 0 for num_gaps in each_column)
 
         # trimAl algorithm for removing gaps, depending on size of alignment and distribution of seqs
         elif threshold == "gappyout":
-            new_alignment = gappyout(gap_distr, position_map)
+            keep = gappyout(gap_distr)
 
         elif threshold == "strict":  # ToDo: Implement
-            new_alignment = False
+            keep = None
             pass
         elif threshold == "strictplus":  # ToDo: Implement
-            new_alignment = False
+            keep = None
             pass
         elif type(threshold) in [int, float]:
             if threshold >= 1:
@@ -1283,17 +1236,14 @@ def trimal(alignbuddy, threshold):
                 threshold = 0.0001 if threshold == 0 else threshold
                 max_gaps = round(len(alignment) * threshold)
 
-            new_alignment = alignment[:, 0:0]
-            for next_col, num_gaps in enumerate(each_column):
-                if num_gaps <= max_gaps:
-                    new_alignment += alignment[:, next_col:next_col + 1]
-                    position_map.extend(True)
-                else:
-                    position_map.extend(False)
+            keep = bytearray(1 if num_gaps <= max_gaps else 0 for num_gaps in each_column)
         else:
             raise NotImplementedError("%s not an implemented trimal method" % threshold)
 
-        position_map.remap_features(alignbuddy.alignments[alignment_index], new_alignment)
+        # Each keep index corresponds to the original column position, and is 1 if the column still exists or 0 if it
+        # has been deleted
+        new_alignment = keep_columns(keep)
+        FeatureReMapper(keep).remap_features(alignbuddy.alignments[alignment_index], new_alignment)
         alignbuddy.alignments[alignment_index] = new_alignment
 
     return alignbuddy
@@ -1401,7 +1351,15 @@ def command_line_ui(in_args, alignbuddy, skip_exit=False):
     # ############################################# INTERNAL FUNCTIONS ############################################## #
     def _print_aligments(_alignbuddy):
         try:
-            _output = str(_alignbuddy)
+            if in_args.test or in_args.in_place:
+                # Render up front to check for errors, and so the input file is left intact if something goes wrong
+                _output = str(_alignbuddy)
+            else:
+                _alignbuddy.write(sys.stdout)
+                sys.stdout.flush()
+                return True
+        except BrokenPipeError:
+            br.broken_pipe()
         except ValueError as err:
             _stderr("ValueError: %s\n" % str(err))
             return False
@@ -1416,11 +1374,8 @@ def command_line_ui(in_args, alignbuddy, skip_exit=False):
             _stderr("*** Test passed ***\n", in_args.quiet)
             pass
 
-        elif in_args.in_place:
-            _in_place(_output, in_args.alignments[0])
-
         else:
-            _stdout("%s" % _output)
+            _in_place(_output, in_args.alignments[0])
         return True
 
     def _in_place(_output, file_path):
@@ -1470,7 +1425,7 @@ def command_line_ui(in_args, alignbuddy, skip_exit=False):
     # Bootstrap
     if in_args.bootstrap:
         num_bootstraps = in_args.bootstrap[0] if in_args.bootstrap[0] else 1
-        _print_aligments(bootstrap(alignbuddy, num_bootstraps))
+        _print_aligments(bootstrap(alignbuddy, num_bootstraps, seed=in_args.seed))
         _exit("bootstrap")
 
     # Clean Seq
@@ -1543,8 +1498,9 @@ def command_line_ui(in_args, alignbuddy, skip_exit=False):
             except ValueError:
                 pass
 
-        pulled = pull_records(make_copy(alignbuddy), args)
-        alignbuddy = delete_records(alignbuddy, args)
+        patterns = br.PatternFilter.from_args(args)
+        pulled = pull_records(make_copy(alignbuddy), patterns)
+        alignbuddy = delete_records(alignbuddy, patterns)
         deleted_recs = []
         num_deleted = 0
         for alignment in pulled.alignments:
@@ -1716,7 +1672,7 @@ def command_line_ui(in_args, alignbuddy, skip_exit=False):
                 description = True
                 del args[indx]
                 break
-        _print_aligments(pull_records(alignbuddy, args, description))
+        _print_aligments(pull_records(alignbuddy, br.PatternFilter.from_args(args), description))
         _exit("pull_records")
 
     # Rename IDs
@@ -1837,6 +1793,8 @@ if __name__ == '__main__':
         command_line_ui(*initiation)
     except (KeyboardInterrupt, br.GuessError) as _e:
         print(_e)
+    except BrokenPipeError:
+        br.broken_pipe()
     except SystemExit:
         pass
     except Exception as _e:
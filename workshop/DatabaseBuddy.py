@@ -41,7 +41,6 @@ from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 from time import sleep
 import json
-from multiprocessing import Lock
 from collections import OrderedDict
 from hashlib import md5
 import cmd
@@ -343,20 +342,15 @@ class DbBuddy(object):  # Open a file or read a handle and parse, or convert raw
                         _rec.type == "nucleotide" and _rec.record]
             prot_recs = [_rec.record for _accession, _rec in group.items() if
                          _rec.type == "protein" and _rec.record]
-            tmp_dir = TemporaryDirectory()
             if len(nuc_recs) > 0:
-                with open("%s/seqs.tmp" % tmp_dir.name, "w") as _ofile:
-                    SeqIO.write(nuc_recs[:_num], _ofile, self.out_format)
-
-                with open("%s/seqs.tmp" % tmp_dir.name, "r") as ifile:
-                    _output += "%s\n" % ifile.read()
+                _ofile = StringIO()
+                SeqIO.write(nuc_recs[:_num], _ofile, self.out_format)
+                _output += "%s\n" % _ofile.getvalue()
 
             if len(prot_recs) > 0:
-                with open("%s/seqs.tmp" % tmp_dir.name, "w") as _ofile:
-                    SeqIO.write(prot_recs[:_num], _ofile, self.out_format)
-
-                with open("%s/seqs.tmp" % tmp_dir.name, "r") as ifile:
-                    _output += "%s\n" % ifile.read()
+                _ofile = StringIO()
+                SeqIO.write(prot_recs[:_num], _ofile, self.out_format)
+                _output += "%s\n" % _ofile.getvalue()
 
         if not destination:
             _stdout("{0}\n".format(_output.rstrip()))
@@ -670,7 +664,7 @@ class UniProtRestClient(object):
         self.max_url = 1000
 
     def query_uniprot(self, _term, args):  # Multicore ready
-        http_errors_file, results_file, request_params, lock = args
+        request_params = args[0]
         _term = re.sub(" ", "+", _term)
         request_string = ""
         for _param, _value in request_params.items():
@@ -682,24 +676,24 @@ class UniProtRestClient(object):
             response = urlopen(request)
             response = response.read().decode()
             response = re.sub("^Entry.*\n", "", response, count=1)
-            with lock:
-                with open(results_file, "a") as ofile:
+            return "# Search: %s\n%s//\n" % (_term, response), None
 
-                    ofile.write("# Search: %s\n%s//\n" % (_term, response))
-            return
-
-        except HTTPError as _e:
-            with lock:
-                with open(http_errors_file, "a") as ofile:
-                    ofile.write("%s\n%s//\n" % (_term, _e))
-
-        except URLError as _e:
-            with lock:
-                with open(http_errors_file, "a") as ofile:
-                    ofile.write("%s\n%s//\n" % (_term, _e))
+        except (HTTPError, URLError) as _e:
+            return None, "%s\n%s//\n" % (_term, _e)
 
         except KeyboardInterrupt:
             _stderr("\n\tUniProt query interrupted by user\n")
+            return None, None
+
+    def _run_mc(self, items, request_params):
+        # UniProt is I/O bound, so threads do fine (and aren't capped at the number of cores). query_uniprot() hands
+        # back (data, error) tuples, and any errors are queued up in the errors file for _parse_error_file()
+        results = run_multicore_function(items, self.query_uniprot, [request_params], max_processes=10, quiet=True,
+                                         backend="thread")
+        results = [result for result in results if result]  # Jobs that crashed have already reported on stderr
+        with open(self.http_errors_file, "a") as ofile:
+            ofile.write("".join([error for data, error in results if error]))
+        return [data for data, error in results if data]
 
     def _parse_error_file(self):
         with open(self.http_errors_file, "r") as ifile:
@@ -740,10 +734,12 @@ class UniProtRestClient(object):
         search_terms = search_terms[0] if len(search_terms) == 1 else search_terms
         if not search_terms:
             return 0
-        self.query_uniprot(search_terms, [self.http_errors_file, self.results_file, {"format": "list"}, Lock()])
-        with open(self.results_file, "r") as ifile:
-            _count = len(ifile.read().strip().split("\n")[1:-1])  # The range clips off the search term and trailing //
-        open(self.results_file, "w").close()
+        data, error = self.query_uniprot(search_terms, [{"format": "list"}])
+        if error:
+            with open(self.http_errors_file, "a") as ofile:
+                ofile.write(error)
+        data = data if data else ""
+        _count = len(data.strip().split("\n")[1:-1])  # The range clips off the search term and trailing //
 
         errors = self._parse_error_file()
         if errors:
@@ -753,7 +749,6 @@ class UniProtRestClient(object):
 
     def search_proteins(self):
         # start by determining how many results we would get from all searches.
-        open(self.results_file, "w").close()
         _count = self.count_hits()
 
         if _count == 0:
@@ -768,22 +763,17 @@ class UniProtRestClient(object):
         runtime = RunTime(prefix="\t")
         if len(self.dbbuddy.search_terms) > 1:
             _stderr("Querying UniProt with %s search terms (Ctrl+c to abort)\n" % len(self.dbbuddy.search_terms))
-            runtime.start()
-            run_multicore_function(self.dbbuddy.search_terms, self.query_uniprot, max_processes=10,
-                                   func_args=[self.http_errors_file, self.results_file, params, Lock()], quiet=True)
         else:
             _stderr("Querying UniProt with the search term '%s'...\n" % self.dbbuddy.search_terms[0])
-            runtime.start()
-            self.query_uniprot(self.dbbuddy.search_terms[0], [self.http_errors_file, self.results_file, params, Lock()])
+        runtime.start()
+        results = self._run_mc(self.dbbuddy.search_terms, params)
         runtime.end()
         errors = self._parse_error_file()
         if errors:
             _stderr("{0}{1}The following errors were encountered while querying UniProt with "
                     "search_proteins():{2}\n\n{3}{4}".format(RED, UNDERLINE, NO_UNDERLINE, errors, DEF_FONT))
 
-        with open(self.results_file, "r") as ifile:
-            results = ifile.read().strip("//\n").split("//")
-
+        results = "".join(results).strip("//\n").split("//")
         for result in results:
             result = result.strip().split("\n")
             for hit in result[1:]:
@@ -800,7 +790,6 @@ class UniProtRestClient(object):
         _stderr("\n")
 
     def fetch_proteins(self):
-        open(self.results_file, "w").close()
         _records = [_rec for _accession, _rec in self.dbbuddy.records.items() if
                     _rec.database == "uniprot" and _rec.database == "uniprot" and not _rec.record]
 
@@ -816,17 +805,14 @@ class UniProtRestClient(object):
             runtime = RunTime(prefix="\t")
             runtime.start()
             params = {"format": "txt"}
-            run_multicore_function(accessions, self.query_uniprot, max_processes=10,
-                                   func_args=[self.http_errors_file, self.results_file, params, Lock()], quiet=True)
+            data = self._run_mc(accessions, params)
             runtime.end()
             errors = self._parse_error_file()
             if errors:
                 _stderr("{0}{1}The following errors were encountered while querying UniProt with "
                         "fetch_proteins():{2}\n{3}{4}".format(RED, UNDERLINE, NO_UNDERLINE, errors, DEF_FONT))
 
-            with open(self.results_file, "r") as ifile:
-                data = ifile.read().strip().split("//\n//")
-
+            data = "".join(data).strip().split("//\n//")
             if data[0] == "":
                 _stderr("No sequences returned\n\n")
                 return
@@ -837,20 +823,14 @@ class UniProtRestClient(object):
                     # Strip the first line from multi-core searches
                     clean_recs.append(re.sub("# Search.*\n", "", _rec.strip()))
 
-            with open(self.results_file, "w") as ifile:
-                ifile.write("//\n".join(clean_recs))
-                ifile.write("\n//")
-
-            with open(self.results_file, "r") as ifile:
-                _records = SeqIO.parse(ifile, "swiss")
-                for _rec in _records:
-                    if _rec.id not in self.dbbuddy.records:
-                        # ToDo: fix failures
-                        print(_rec.id)
-                        self.dbbuddy.failures.setdefault("# Uniprot fetch: Ids not"
-                                                         " in dbbuddy.records", []).append(_rec.id)
-                    else:
-                        self.dbbuddy.records[_rec.id].record = _rec
+            for _rec in SeqIO.parse(StringIO("%s\n//" % "\n//\n".join(clean_recs)), "swiss"):
+                if _rec.id not in self.dbbuddy.records:
+                    # ToDo: fix failures
+                    print(_rec.id)
+                    self.dbbuddy.failures.setdefault("# Uniprot fetch: Ids not"
+                                                     " in dbbuddy.records", []).append(_rec.id)
+                else:
+                    self.dbbuddy.records[_rec.id].record = _rec
 
 
 class NCBIClient(object):
@@ -889,6 +869,15 @@ class NCBIClient(object):
         else:
             return False  # No errors to report
 
+    def _run_mc(self, items, func, func_args=False):
+        # NCBI is I/O bound, so threads do fine. The _mc_* methods hand back (data, error) tuples, and any errors are
+        # queued up in the errors file for _parse_error_file()
+        results = run_multicore_function(items, func, func_args, max_processes=3, quiet=True, backend="thread")
+        results = [result for result in results if result]  # Jobs that crashed have already reported on stderr
+        with open(self.http_errors_file, "a") as ofile:
+            ofile.write("".join([error for data, error in results if error]))
+        return [data for data, error in results if data]
+
     def _split_for_url(self, accessions):
         _groups = [""]
         for accn in accessions:
@@ -901,8 +890,7 @@ class NCBIClient(object):
                 _groups.append(accn)
         return _groups
 
-    def _mc_taxa(self, _taxa_ids, args):
-        lock = args[0]
+    def _mc_taxa(self, _taxa_ids):
         error = False
         handle = False
         timer = time()
@@ -937,22 +925,14 @@ class NCBIClient(object):
                     error = _e
                 sleep(1)
 
-        with lock:
-            if error:
-                with open(self.http_errors_file) as ifile:
-                    ifile.write("%s\n%s//\n" % (_taxa_ids, error))
-            else:
-                with open(self.results_file, "a") as ifile:
-                    ifile.write("%s### END ###\n" % handle.read())
-        return
+        if error:
+            return None, "%s\n%s//\n" % (_taxa_ids, error)
+        return handle.read(), None
 
     def _get_taxa(self, _taxa_ids):
         self._clear_files()
         _taxa_ids = self._split_for_url(_taxa_ids)
-        run_multicore_function(_taxa_ids, self._mc_taxa, [Lock()], max_processes=3, quiet=True)
-        with open(self.results_file, "r") as ifile:
-            results = ifile.read().split("\n### END ###\n")
-            results = [x for x in results if x]
+        results = self._run_mc(_taxa_ids, self._mc_taxa)
 
         _output = {}
         for result in results:
@@ -960,8 +940,7 @@ class NCBIClient(object):
                 _output[summary["TaxId"]] = summary["ScientificName"]
         return _output
 
-    def _mc_accn2gi(self, accns, args):
-        lock = args[0]
+    def _mc_accn2gi(self, accns):
         error = False
         handle = False
         timer = time()
@@ -983,14 +962,9 @@ class NCBIClient(object):
                     error = _e
                 sleep(1)
 
-        with lock:
-            if error:
-                with open(self.http_errors_file) as ifile:
-                    ifile.write("%s\n%s//\n" % (accns, error))
-            else:
-                with open(self.results_file, "a") as ifile:
-                    ifile.write("%s### END ###\n" % handle.read())
-        return
+        if error:
+            return None, "%s\n%s//\n" % (accns, error)
+        return handle.read(), None
 
     def _get_gis(self, accns):  # These accns should include version numbers
         self._clear_files()
@@ -998,17 +972,14 @@ class NCBIClient(object):
         runtime = RunTime(prefix="\t")
         _stderr("Converting NCBI accessions to gi numbers...\n")
         runtime.start()
-        run_multicore_function(accns, self._mc_accn2gi, [Lock()], max_processes=3, quiet=True)
+        results = self._run_mc(accns, self._mc_accn2gi)
         runtime.end()
-        with open(self.results_file, "r") as ifile:
-            results = ifile.read().split("\n### END ###\n")
-            results = [x.split("\n") for x in results]
-            results = [x for sublist in results for x in sublist if x]
+        results = [x.split("\n") for x in results]
+        results = [x for sublist in results for x in sublist if x]
         _stderr("\tDone\n")
         return results
 
-    def _mc_summaries(self, gi_nums, args):
-        lock = args[0]
+    def _mc_summaries(self, gi_nums):
         error = False
         handle = False
         timer = time()
@@ -1051,14 +1022,9 @@ class NCBIClient(object):
                     error = _e
                 sleep(1)
 
-        with lock:
-            if error:
-                with open(self.http_errors_file) as ifile:
-                    ifile.write("%s\n%s//\n" % (gi_nums, error))
-            else:
-                with open(self.results_file, "a") as ifile:
-                    ifile.write("%s### END ###\n" % handle.read())
-        return
+        if error:
+            return None, "%s\n%s//\n" % (gi_nums, error)
+        return handle.read(), None
 
     def _fetch_summaries(self, gi_nums):
         self._clear_files()
@@ -1066,11 +1032,8 @@ class NCBIClient(object):
         runtime = RunTime(prefix="\t")
         _stderr("Retrieving record summaries from NCBI...\n")
         runtime.start()
-        run_multicore_function(gi_nums, self._mc_summaries, [Lock()], max_processes=3, quiet=True)
+        results = self._run_mc(gi_nums, self._mc_summaries)
         runtime.end()
-        with open(self.results_file, "r") as _ifile:
-            results = _ifile.read().split("\n### END ###\n")
-            results = [x for x in results if x != ""]
 
         _output = {}
         taxa = []
@@ -1200,7 +1163,7 @@ class NCBIClient(object):
                 _stderr("\n\tNCBI query interrupted by user\n")
 
     def _mc_seq(self, accns, args):
-        database, lock = args
+        database = args[0]
         error = False
         handle = False
         timer = time()
@@ -1287,14 +1250,9 @@ class NCBIClient(object):
                     error = _e
                 sleep(1)
 
-        with lock:
-            if error:
-                with open(self.http_errors_file) as ifile:
-                    ifile.write("%s\n%s//\n" % (accns, error))
-            else:
-                with open(self.results_file, "a") as ifile:
-                    ifile.write(handle.read())
-        return
+        if error:
+            return None, "%s\n%s//\n" % (accns, error)
+        return handle.read(), None
 
     def _get_seq(self, gi_nums, database):
         self._clear_files()
@@ -1302,10 +1260,9 @@ class NCBIClient(object):
         runtime = RunTime(prefix="\t")
         _stderr("Fetching full sequence records from NCBI...\n")
         runtime.start()
-        run_multicore_function(gi_nums, self._mc_seq, [database, Lock()], max_processes=3, quiet=True)
+        results = self._run_mc(gi_nums, self._mc_seq, [database])
         runtime.end()
-        with open(self.results_file, "r") as ifile:
-            results = SeqIO.to_dict(SeqIO.parse(ifile, "gb"))
+        results = SeqIO.to_dict(SeqIO.parse(StringIO("".join(results)), "gb"))
         _stderr("\tDone\n")
         return results
 
@@ -1408,17 +1365,13 @@ class EnsemblRestClient(object):
                 self.dbbuddy.records[rec.id].record.id = new_id
 
     def _mc_search(self, species, args):
-        identifier, lock = args
-        self.dbbuddy.failures = {}
+        # Hands back (data, errors), where errors are any new failures logged by perform_rest_action()
+        identifier = args[0]
+        known_failures = set(self.dbbuddy.failures)
         data = self.perform_rest_action("lookup/symbol/%s/%s" % (species, identifier),
                                         headers={"Content-type": "application/json", "Accept": "application/json"})
-        with lock:
-            with open(self.results_file, "a") as ofile:
-                ofile.write("%s\n### END ###\n" % data)
-            if self.dbbuddy.failures:
-                with open(self.http_errors_file, "a") as ofile:
-                    for _hash, failure in self.dbbuddy.failures.items():
-                        ofile.write("%s\n" % failure)
+        errors = ["%s\n" % failure for _hash, failure in self.dbbuddy.failures.items() if _hash not in known_failures]
+        return data, "".join(errors)
 
     def _parse_summary(self, summary):
         accn = summary['id']
@@ -1451,19 +1404,18 @@ class EnsemblRestClient(object):
             _stderr("Searching Ensembl for %s...\n" % search_term)
             runtime = RunTime(prefix="\t")
             runtime.start()
-            run_multicore_function(species, self._mc_search, [search_term, Lock()], quiet=True)
+            results = run_multicore_function(species, self._mc_search, [search_term], quiet=True)
             runtime.end()
-            with open(self.results_file, "r") as ifile:
-                results = ifile.read().split("\n### END ###")
+            results = [result for result in results if result]  # Jobs that crashed have already reported on stderr
+            with open(self.http_errors_file, "a") as ofile:
+                ofile.write("".join([errors for data, errors in results]))
 
             counter = 0
-            for rec in results:
-                rec = rec.strip()
-                if not rec or rec in ["None", ""]:
+            for data, errors in results:
+                if not data:
                     continue
                 counter += 1
-                rec = re.sub("'", '"', rec)
-                rec = self._parse_summary(json.loads(rec))
+                rec = self._parse_summary(data)
                 if rec.accession in self.dbbuddy.records:
                     self.dbbuddy.records[rec.accession].update(rec)
                 else:
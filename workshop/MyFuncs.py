@@ -21,7 +21,10 @@ repository: https://github.com/biologyguy/BuddySuite
 Description: Collection of useful classes and functions
 """
 
-from multiprocessing import Process, cpu_count
+from multiprocessing import Process, Pool, cpu_count, current_process
+from multiprocessing.pool import ThreadPool
+from collections import deque
+from itertools import islice
 import sys
 from time import time
 from math import floor, ceil
@@ -30,6 +33,7 @@ from tempfile import TemporaryDirectory
 from shutil import copytree, rmtree, copyfile
 import re
 import string
+import traceback
 from random import choice
 
 
@@ -179,98 +183,119 @@ def usable_cpu_count():
     return max_processes
 
 
-def run_multicore_function(iterable, function, func_args=False, max_processes=0, quiet=False, out_type=sys.stdout):
-        # fun little piece of abstraction here... directly pass in a function that is going to be looped over, and
-        # fork those loops onto independent processes. Any arguments the function needs must be provided as a list.
-        d_print = DynamicPrint(out_type)
+# Worker-side state for WorkerPool. Set by the pool initializer, so the function and its arguments are inherited by
+# (or pickled once for) each worker instead of being shipped along with every chunk.
+_POOL_JOB = None
 
+
+def _pool_init(function, func_args):
+    global _POOL_JOB
+    _POOL_JOB = (function, func_args)
+
+
+def _pool_chunk(chunk):
+    return _run_chunk(_POOL_JOB[0], _POOL_JOB[1], chunk)
+
+
+def _run_chunk(function, func_args, chunk):
+    results = []
+    for next_iter in chunk:
+        try:
+            results.append(function(next_iter, func_args) if func_args else function(next_iter))
+        except Exception:  # One bad job shouldn't take the rest of the run down with it (see WorkerPool)
+            traceback.print_exc()
+            results.append(None)
+    return results
+
+
+class WorkerPool(object):
+    # Persistent process (or thread) pool that farms out an iterable in chunks and hands back the return values in
+    # order. Only a couple of chunks per worker are ever in flight, so memory stays flat for huge job lists, and the
+    # parent just blocks on the next result instead of polling.
+    # Errors are isolated to the job that raised them, same as when every job had its own child process: the traceback
+    # is printed to stderr, the job's return value is None, and everything else carries on.
+    def __init__(self, max_processes=0, backend="process", chunk_size=0, quiet=True, out_type=sys.stdout):
+        if backend not in ["process", "thread"]:
+            raise ValueError("WorkerPool backend must be 'process' or 'thread', not '%s'" % backend)
+        self.backend = backend
         if max_processes == 0:
             max_processes = usable_cpu_count()
+        elif backend == "process":  # Threads are for waiting on I/O, so don't cap them at the number of cores
+            max_processes = min(max_processes, cpu_count())
+        self.max_processes = max(max_processes, 1)
+        self.chunk_size = chunk_size
+        self.quiet = quiet
+        self.out_type = out_type
 
+    def imap(self, function, iterable, func_args=False):
+        if func_args and not isinstance(func_args, list):
+            exit("Error in WorkerPool: The arguments passed into the multi-thread function must be provided as a list")
+
+        if type(iterable) is dict:
+            iterable = iterable.values()
+        num_jobs = len(iterable) if hasattr(iterable, "__len__") else None
+        workers = self.max_processes if num_jobs is None else max(min(self.max_processes, num_jobs), 1)
+        chunk_size = self.chunk_size
+        if not chunk_size:
+            chunk_size = 100 if num_jobs is None else min(max(ceil(num_jobs / (workers * 4)), 1), 1000)
+
+        d_print = DynamicPrint(self.out_type, quiet=self.quiet)
+        d_print.write("Running function %s() on %s %s\n" % (function.__name__, workers,
+                                                            "cores" if self.backend == "process" else "threads"))
+        total = "" if num_jobs is None else " of %s" % num_jobs
+        start_time = time()
+        counter = 0
+        d_print.write("\tJob 0%s" % total)
+
+        iterable = iter(iterable)
+        chunks = iter(lambda: list(islice(iterable, chunk_size)), [])
+        if workers < 2 or (self.backend == "process" and current_process().daemon):
+            pool = None  # Not worth the overhead, or not allowed (daemonic processes can't have children)
+        elif self.backend == "process":
+            pool = Pool(workers, initializer=_pool_init, initargs=(function, func_args))
         else:
-            cpus = cpu_count()
-            if max_processes > cpus:
-                max_processes = cpus
-            elif max_processes < 1:
-                max_processes = 1
+            pool = ThreadPool(workers)
 
-        max_processes = max_processes if max_processes < len(iterable) else len(iterable)
+        try:
+            pending = deque()
+            for chunk in chunks:
+                if not pool:
+                    results = _run_chunk(function, func_args, chunk)
+                else:
+                    if self.backend == "process":
+                        pending.append(pool.apply_async(_pool_chunk, (chunk,)))
+                    else:
+                        pending.append(pool.apply_async(_run_chunk, (function, func_args, chunk)))
+                    if len(pending) < workers * 2:
+                        continue
+                    results = pending.popleft().get()
+
+                counter += len(results)
+                d_print.write("\tJob %s%s (%s)" % (counter, total, pretty_time(round(time() - start_time))))
+                yield from results
+
+            while pending:
+                results = pending.popleft().get()
+                counter += len(results)
+                d_print.write("\tJob %s%s (%s)" % (counter, total, pretty_time(round(time() - start_time))))
+                yield from results
+        finally:
+            if pool:
+                pool.terminate()  # Only reached once everything has been collected, or if the caller bails early
+                pool.join()
 
-        running_processes = 0
-        child_list = []
-        start_time = round(time())
-        elapsed = 0
-        counter = 0
-        if not quiet:
-            d_print.write("Running function %s() on %s cores\n" % (function.__name__, max_processes))
-        # fire up the multi-core!!
-        if not quiet:
-            d_print.write("\tJob 0 of %s" % len(iterable))
-
-        for next_iter in iterable:
-            if type(iterable) is dict:
-                next_iter = iterable[next_iter]
-            while 1:     # Only fork a new process when there is a free processor.
-                if running_processes < max_processes:
-                    # Start new process
-                    if not quiet:
-                        d_print.write("\tJob %s of %s (%s)" % (counter, len(iterable), pretty_time(elapsed)))
-
-                    if func_args:
-                        if not isinstance(func_args, list):
-                            exit("Error in run_multicore_function(): The arguments passed into the multi-thread "
-                                 "function must be provided as a list")
-                        p = Process(target=function, args=(next_iter, func_args))
+        d_print.write("\tDONE: %s jobs in %s\n" % (counter, pretty_time(round(time() - start_time))))
 
-                    else:
-                        p = Process(target=function, args=(next_iter,))
-                    p.start()
-                    child_list.append(p)
-                    running_processes += 1
-                    counter += 1
-                    break
-                else:
-                    # processor wait loop
-                    while 1:
-                        for i in range(len(child_list)):
-                            if child_list[i].is_alive():
-                                continue
-                            else:
-                                child_list.pop(i)
-                                running_processes -= 1
-                                break
-
-                        if not quiet:
-                            if (start_time + elapsed) < round(time()):
-                                elapsed = round(time()) - start_time
-                                d_print.write("\tJob %s of %s (%s)" % (counter, len(iterable), pretty_time(elapsed)))
-
-                        if running_processes < max_processes:
-                            break
-
-        # wait for remaining processes to complete --> this is the same code as the processor wait loop above
-        if not quiet:
-            d_print.write("\tJob %s of %s (%s)" % (counter, len(iterable), pretty_time(elapsed)))
-
-        while len(child_list) > 0:
-            for i in range(len(child_list)):
-                if child_list[i].is_alive():
-                    continue
-                else:
-                    child_list.pop(i)
-                    running_processes -= 1
-                    break  # need to break out of the for-loop, because the child_list index is changed by pop
+    def map(self, function, iterable, func_args=False):
+        return list(self.imap(function, iterable, func_args))
 
-            if not quiet:
-                if (start_time + elapsed) < round(time()):
-                    elapsed = round(time()) - start_time
-                    d_print.write("\t%s total jobs (%s, %s jobs remaining)" % (len(iterable), pretty_time(elapsed),
-                                                                               len(child_list)))
 
-        if not quiet:
-            d_print.write("\tDONE: %s jobs in %s\n" % (len(iterable), pretty_time(elapsed)))
-        # func_args = []  # This may be necessary because of weirdness in assignment of incoming arguments
-        return
+def run_multicore_function(iterable, function, func_args=False, max_processes=0, quiet=False, out_type=sys.stdout,
+                           backend="process", chunk_size=0):
+    # fun little piece of abstraction here... directly pass in a function that is going to be looped over, and
+    # farm those loops out to a pool of workers. Any arguments the function needs must be provided as a list.
+    # Return values come back as a list, in the same order as the iterable (None for any job that raised an error).
+    return WorkerPool(max_processes, backend, chunk_size, quiet, out_type).map(function, iterable, func_args)
 
 
 class TempDir(object):
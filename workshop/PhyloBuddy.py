@@ -350,21 +350,14 @@ def _guess_format(_input):
         _input = open(_input, "r")
 
     if str(type(_input)) == "<class '_io.TextIOWrapper'>" or isinstance(_input, StringIO):
+        if not _input.seekable():  # Deal with input streams (e.g., stdout pipes)
+            _input = StringIO(_input.read())
+
+        _format = br.sniff_format(_input, "phylobuddy")
         # Die if file is empty
-        contents = _input.read()
-        if contents == "":
+        if _format == "empty file":
             sys.exit("Input file is empty.")
-        _input.seek(0)
-
-        if re.search('<nex:nexml', contents, re.IGNORECASE):
-            return 'nexml'
-        # Maddison, Swofford, and Maddison, 1997 DOI: 10.1093/sysbio/46.4.590
-        elif re.search('#nexus', contents, re.IGNORECASE):
-            return 'nexus'
-        elif re.search('\(', contents):
-            return 'newick'
-        else:
-            return None  # Unable to determine format from file handle
+        return _format
 
     else:
         raise br.GuessError("Unsupported _input argument in guess_format(). %s" % _input)
@@ -722,25 +715,27 @@ def list_ids(phylobuddy):
     return output
 
 
-def prune_taxa(phylobuddy, *patterns):
+def prune_taxa(phylobuddy, *patterns, id_files=None):
     """
     Prunes taxa that match one or more regex patterns
     :param phylobuddy: The PhyloBuddy object whose trees will be pruned.
-    :param patterns: One or more regex patterns.
+    :param patterns: One or more regex patterns (or a single br.PatternFilter object)
+    :param id_files: Path, or list of paths, to files of exact taxon labels to prune (one per line)
     :return: The same PhyloBuddy object after pruning.
     """
+    if len(patterns) == 1 and type(patterns[0]) == br.PatternFilter:
+        patterns = patterns[0]
+    else:
+        patterns = br.PatternFilter(list(patterns), id_files)
     for tree in phylobuddy.trees:
-        taxa_to_prune = []
         namespace = TaxonNamespace()
         for node in tree:  # Populate the namespace for easy iteration
             if node.taxon:
                 namespace.add_taxon(node.taxon)
-        for taxon in namespace.labels():
-            for pattern in patterns:
-                if re.search(pattern, taxon):  # Sets aside the names of the taxa to be pruned
-                    taxa_to_prune.append(taxon)
-        for taxon in taxa_to_prune:  # Removes the nodes from the tree
-            tree.prune_taxa_with_labels(StringIO(taxon))
+        # Sets aside the names of the taxa to be pruned, then removes them from the tree all at once
+        taxa_to_prune = [taxon for taxon in namespace.labels() if patterns.search(taxon)]
+        if taxa_to_prune:
+            tree.prune_taxa_with_labels(taxa_to_prune)
 
 
 def rename(phylobuddy, query, replace):
@@ -1269,7 +1264,7 @@ def command_line_ui(in_args, phylobuddy, skip_exit=False):
 
     # Prune taxa
     if in_args.prune_taxa:
-        prune_taxa(phylobuddy, *in_args.prune_taxa[0])
+        prune_taxa(phylobuddy, br.PatternFilter.from_args(in_args.prune_taxa[0]))
         _print_trees(phylobuddy)
         _exit("prune_taxa")
 
@@ -40,16 +40,23 @@ import os
 import re
 import string
 import zipfile
+import mmap
 import shutil
+import pickle
+import heapq
 from urllib import request, error
-from copy import deepcopy
-from random import sample, choice, randint, random
-from math import floor, ceil, log
+from copy import copy, deepcopy
+from random import Random, sample, choice, random
+from multiprocessing import Pool, current_process
+from math import floor, ceil, log, fsum
 from subprocess import Popen, PIPE
 from shutil import which
 from hashlib import md5
 from io import StringIO, TextIOWrapper
-from collections import OrderedDict
+from collections import OrderedDict, Counter, deque
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain, compress, islice, product, repeat
 from xml.sax import SAXParseException
 
 # Third party
@@ -67,11 +74,6 @@ from Bio import AlignIO
 
 
 # ##################################################### WISH LIST #################################################### #
-def sim_ident(matrix):  # Return the pairwise similarity and identity scores among sequences
-    x = matrix
-    return x
-
-
 def predict_orfs():
     # Add all predicted open reading frames to seqrecord features list
     # http://www.ncbi.nlm.nih.gov/gorf/gorf.html
@@ -125,6 +127,54 @@ OUTPUT_FORMATS = ["ids", "accessions", "summary", "full-summary", "clustal", "em
                   "fastq-solexa", "fastq-illumina", "genbank", "gb", "imgt", "nexus", "phd", "phylip", "phylip-relaxed",
                   "phylipss", "phylipsr", "raw", "seqxml", "sff", "stockholm", "tab", "qual"]
 
+# Sequential formats that Biopython can parse/write one record at a time (i.e., no alignment blocks to assemble)
+STREAM_FORMATS = ["embl", "fasta", "fastq", "fastq-sanger", "fastq-solexa", "fastq-illumina", "genbank", "gb", "imgt",
+                  "seqxml", "tab", "qual"]
+
+# Command line tools that only ever look at one record at a time, so can be run over a SeqBuddyStream
+STREAM_TOOLS = ["clean_seq", "complement", "delete_large", "delete_small", "find_repeats", "lowercase", "pull_records",
+                "rename_ids", "reverse_complement", "reverse_transcribe", "shuffle_seqs", "transcribe", "translate",
+                "translate6frames", "uppercase"]
+
+# Command line tools that can reorder a SeqBuddyStream with an external merge sort, instead of loading every record
+SORT_TOOLS = ["order_ids", "order_recs"]
+
+# Command line tools that can draw a reservoir sample from a SeqBuddyStream in a single pass
+SAMPLE_TOOLS = ["pull_random_record"]
+
+# Record attributes that order_recs() can sort on
+SORT_MODES = ["id", "length", "hash", "features", "regex"]
+
+# Formats that SeqIndex can find record boundaries in without a full parse
+INDEX_FORMATS = ["fasta", "fastq", "fastq-sanger", "fastq-solexa", "fastq-illumina", "genbank", "gb"]
+
+# Command line tools that can be answered from a SeqIndex, only reading the records they actually return
+INDEX_TOOLS = ["num_seqs", "pull_random_record", "pull_records"]
+
+# Command line tools that only need ids and sequences, so plain FASTA input can be read into FastaRecords
+LITE_TOOLS = ["ave_seq_length", "count_residues", "delete_large", "delete_small", "hash_seq_ids", "num_seqs"]
+
+# IUPAC nucleotide codes and the bases they can stand for. Used to resolve ambiguous codons during translation.
+NUCL_CODES = OrderedDict([("A", "A"), ("C", "C"), ("G", "G"), ("T", "T"), ("U", "T"), ("R", "AG"), ("Y", "CT"),
+                          ("W", "AT"), ("S", "CG"), ("M", "AC"), ("K", "GT"), ("H", "ACT"), ("B", "CGT"), ("V", "ACG"),
+                          ("D", "AGT"), ("N", "ACGT"), ("X", "ACGT")])
+NUCL_COMPLEMENTS = str.maketrans("ACGTURYWSMKHBVDNX", "TGCAAYRWSKMDVBHNX")
+CODON_LOOKUPS = {}  # Filled in lazily by _codon_lookup(), keyed by NCBI translation table id
+CLEAN_SEQ_TABLES = {}  # Filled in lazily by _clean_seq_table(), keyed by (protein, ambiguous, rep_char, skip, gap)
+
+# Restriction enzymes that find_restriction_sites() skips when searching with 'commercial' or 'all'
+RESTRICTION_BLACKLIST = {"AbaSI", "FspEI", "MspJI", "SgeI", "AspBHI", "SgrTI", "YkrI", "BmeDI",  # highly nonspecific
+                         "AjuI", "AlfI", "AloI", "ArsI", "BaeI", "BarI", "BcgI", "BdaI", "BplI", "BsaXI", "Bsp24I",
+                         "CjeI", "CjePI", "CspCI", "FalI", "Hin4I", "NgoAVIII", "NmeDI", "PpiI", "PsrI", "R2_BceSIV",
+                         "RdeGBIII", "SdeOSI", "TstI", "UcoMSI",  # two-cutting
+                         "AlwFI", "AvaIII", "BmgI", "BscGI", "BspGI", "BspNCI", "Cdi630V", "Cgl13032I", "Cgl13032II",
+                         "CjeFIII", "CjeFV", "CjeNII", "CjeP659IV", "CjuI", "CjuII", "DrdII", "EsaSSI", "FinI",
+                         "GauT27I", "HgiEII", "Hpy99XIII", "Hpy99XIV", "Jma19592I", "MjaIV", "MkaDII", "NhaXI", "PenI",
+                         "Pfl1108I", "RdeGBI", "RflFIII", "RlaI", "RpaTI", "SnaI", "Sno506I", "SpoDI", "TssI", "TsuI",
+                         "UbaF11I", "UbaF12I", "UbaF13I", "UbaF14I", "UbaF9I", "UbaPI"}  # non-cutters
+RESTRICTION_BATCHES = {}  # Filled in lazily by _restriction_batch(), keyed by enzyme group ('commercial' or 'all')
+RESTRICTION_SCANS = {}  # Filled in lazily by _restriction_scan(), keyed by frozenset of enzymes
+
 
 # ##################################################### SEQBUDDY ##################################################### #
 class SeqBuddy(object):  # Open a file or read a handle and parse, or convert raw into a Seq object
@@ -136,6 +186,7 @@ class SeqBuddy(object):  # Open a file or read a handle and parse, or convert ra
         in_file = None
         self.alpha = alpha
         self.hash_map = {}  # This is only used by functions that use hash_id()
+        self.results = ResultsTable()  # Per-record analysis results (see _results())
 
         # SeqBuddy obj
         if type(sb_input) == SeqBuddy:
@@ -203,15 +254,16 @@ class SeqBuddy(object):  # Open a file or read a handle and parse, or convert ra
 
         # ####  RECORDS  #### #
         if type(sb_input) == SeqBuddy:
-            sequences = sb_input.records
+            # FastaRecords are only for the command line fast path (see _lite_seqbuddy()), so upgrade any that get here
+            sequences = [rec.to_seqrecord() if type(rec) == FastaRecord else rec for rec in sb_input.records]
 
         elif isinstance(sb_input, list):
             # make sure that the list is actually SeqIO records (just test a few...)
             rand_sample = sb_input if len(sb_input) < 5 else sample(sb_input, 5)
             for seq in rand_sample:
-                if type(seq) != SeqRecord:
+                if type(seq) not in [SeqRecord, FastaRecord]:
                     raise TypeError("Seqlist is not populated with SeqRecords.")
-            sequences = sb_input
+            sequences = [rec.to_seqrecord() if type(rec) == FastaRecord else rec for rec in sb_input]
 
         elif str(type(sb_input)) == "<class '_io.TextIOWrapper'>" or isinstance(sb_input, StringIO):
             if self.in_format in ["phylipss", "phylipsr"]:
@@ -259,14 +311,15 @@ class SeqBuddy(object):  # Open a file or read a handle and parse, or convert ra
         self.records = sequences
 
     def to_dict(self):
-        sb_copy = find_repeats(make_copy(self))
-        if len(sb_copy.repeat_ids) > 0:
-            raise RuntimeError("There are repeat IDs in self.records\n%s" %
-                               ", ".join([key for key, recs in sb_copy.repeat_ids.items()]))
-
         records_dict = OrderedDict()
+        repeat_ids = OrderedDict()
         for rec in self.records:
+            if rec.id in records_dict:
+                repeat_ids[rec.id] = True
             records_dict[rec.id] = rec
+
+        if len(repeat_ids) > 0:
+            raise RuntimeError("There are repeat IDs in self.records\n%s" % ", ".join(repeat_ids))
         return records_dict
 
     def print(self):
@@ -274,8 +327,39 @@ class SeqBuddy(object):  # Open a file or read a handle and parse, or convert ra
         return
 
     def __str__(self):
+        output = StringIO()
+        self.write(output)
+        return output.getvalue()
+
+    def write(self, file_path, out_format=None):
+        """
+        Write the records straight out to their destination, without building up the whole output as a string first
+        :param file_path: File path or open handle (e.g., sys.stdout)
+        :param out_format: Use a different format than self.out_format
+        :return: None
+        """
+        if type(file_path) == str:
+            with open(file_path, "w") as ofile:
+                self.write(ofile, out_format)
+            return
+
+        if out_format:
+            out_format_save = str(self.out_format)
+            self.out_format = out_format
+            self.write(file_path)
+            self.out_format = out_format_save
+            return
+
         if len(self.records) == 0:
-            return "Error: No sequences in object.\n"
+            file_path.write("Error: No sequences in object.\n")
+            return
+
+        lite = [rec for rec in self.records if type(rec) == FastaRecord]
+        if lite and (self.out_format.lower() != "fasta" or len(lite) != len(self.records)):
+            table = _results(self)
+            self.records = [rec.to_seqrecord(self.alpha) if type(rec) == FastaRecord else rec for rec in self.records]
+            self.results = table.relabel(self.records)
+            lite = []
 
         # There is a weird bug in genbank write() that concatenates dots to the organism name (if set).
         # The following is a work around...
@@ -288,46 +372,797 @@ class SeqBuddy(object):  # Open a file or read a handle and parse, or convert ra
                 except KeyError:
                     pass
 
+        _ofile = br.RstripWriter(file_path)
         if self.out_format == "phylipsr":
-            output = br.phylip_sequential_out(self, _type="seqbuddy")
+            _ofile.write(br.phylip_sequential_out(self, _type="seqbuddy"))
 
         elif self.out_format == "phylipss":
-            output = br.phylip_sequential_out(self, relaxed=False, _type="seqbuddy")
+            _ofile.write(br.phylip_sequential_out(self, relaxed=False, _type="seqbuddy"))
 
         elif self.out_format == "raw":
-            output = "\n\n".join([str(rec.seq) for rec in self.records])
+            for indx, rec in enumerate(self.records):
+                _ofile.write("%s%s" % ("\n\n" if indx else "", str(rec.seq)))
+
+        elif lite:
+            for rec in self.records:
+                _ofile.write(rec.format_fasta())
         else:
-            tmp_dir = MyFuncs.TempDir()
-            with open("%s/seqs.tmp" % tmp_dir.path, "w") as _ofile:
-                try:
-                    SeqIO.write(self.records, _ofile, self.out_format)
-                except ValueError as e:
-                    if "Sequences must all be the same length" in str(e):
-                        _stderr("Warning: Alignment format detected but sequences are different lengths. "
-                                "Format changed to fasta to accommodate proper printing of records.\n")
-                        SeqIO.write(self.records, _ofile, "fasta")
-                    elif "Repeated name" in str(e) and self.out_format == "phylip":
-                        _stderr("Warning: Phylip format returned a 'repeat name' error, probably due to truncation. "
-                                "Format changed to phylip-relaxed.\n")
-                        SeqIO.write(self.records, _ofile, "phylip-relaxed")
-                    else:
-                        raise e
+            try:
+                SeqIO.write(self.records, _ofile, self.out_format)
+            except ValueError as e:
+                if "Sequences must all be the same length" in str(e):
+                    _stderr("Warning: Alignment format detected but sequences are different lengths. "
+                            "Format changed to fasta to accommodate proper printing of records.\n")
+                    SeqIO.write(self.records, _ofile, "fasta")
+                elif "Repeated name" in str(e) and self.out_format == "phylip":
+                    _stderr("Warning: Phylip format returned a 'repeat name' error, probably due to truncation. "
+                            "Format changed to phylip-relaxed.\n")
+                    SeqIO.write(self.records, _ofile, "phylip-relaxed")
+                else:
+                    raise e
+        _ofile.close()
+        return
+
+
+class SeqBuddyStream(object):  # Lazily parse records one at a time, instead of loading the whole file into memory
+    def __init__(self, sb_input, in_format=None, out_format=None, alpha=None):
+        """
+        Records are only read from the input as they are written out, after being passed through any record-local
+        tools queued with pipe(). Memory use therefore does not grow with the number of records in the file.
+        Input formats that can't be read sequentially (i.e., alignments) are loaded in full by SeqBuddy instead.
+        :param sb_input: File path, file handle, SeqBuddy object, or iterable of SeqRecords
+        :param in_format: Skip the format sniffing
+        :param out_format: Defaults to in_format
+        :param alpha: Same values accepted by SeqBuddy. Guessed from the first 100 records if not provided.
+        """
+        self._tmp_file = None  # Non-seekable input (e.g., stdin) is spooled to disk so it can be re-read if need be
+        self._records = None
+        self._user_in_format = in_format
+        self.tools = []  # [(func, args, kwargs), ...]
+
+        if type(sb_input) == SeqBuddy:
+            in_format = sb_input.in_format if not in_format else in_format
+            alpha = sb_input.alpha if not alpha else alpha
+            self._source = sb_input.records
+
+        elif str(type(sb_input)) == "<class '_io.TextIOWrapper'>" or isinstance(sb_input, StringIO):
+            if not sb_input.seekable():
+                self._tmp_file = MyFuncs.TempFile()
+                with open(self._tmp_file.path, "w") as _ofile:
+                    shutil.copyfileobj(sb_input, _ofile)
+                self._source = self._tmp_file.path
+            else:
+                self._source = sb_input
 
-            with open("%s/seqs.tmp" % tmp_dir.path, "r") as ifile:
-                output = ifile.read()
+        elif type(sb_input) == str:
+            self._source = sb_input if os.path.isfile(sb_input) else StringIO(sb_input)
+
+        else:
+            self._source = sb_input  # Iterable of SeqRecords
+
+        if in_format:
+            self.in_format = in_format
+        elif type(self._source) in [str, StringIO] or str(type(self._source)) == "<class '_io.TextIOWrapper'>":
+            self.in_format = _guess_format(self._source)
+            if self.in_format == "empty file":
+                self.in_format = "fasta"
+        else:
+            self.in_format = "gb"  # Same as _guess_format() for a list of SeqRecords
+
+        self.out_format = self.in_format if not out_format else out_format
+        self.alpha = alpha
+        self._in_alpha = alpha
+
+        if self.streamable(self.in_format):
+            # Peek at the first few records to pin down the alphabet, then put them back at the front of the stream
+            self._records = self._parse()
+            head = list(islice(self._records, 100))
+            self._records = chain(head, self._records)
+            self._in_alpha = SeqBuddy(head, self.in_format, self.out_format, alpha).alpha
+            self.alpha = self._in_alpha
+
+    def _parse(self):
+        if type(self._source) == str:
+            with open(self._source, "r") as ifile:
+                for rec in SeqIO.parse(ifile, self.in_format):
+                    yield rec
+        elif isinstance(self._source, StringIO) or str(type(self._source)) == "<class '_io.TextIOWrapper'>":
+            for rec in SeqIO.parse(self._source, self.in_format):
+                yield rec
+        else:
+            for rec in self._source:
+                yield rec
+
+    def streamable(self, out_format=None):
+        """
+        :param out_format: Check a specific output format instead of self.out_format
+        :return: True if records can be read and written one at a time
+        """
+        out_format = self.out_format if not out_format else out_format
+        if not self.in_format or not out_format:
+            return False
+        if type(self._source) in [str, StringIO] or str(type(self._source)) == "<class '_io.TextIOWrapper'>":
+            if self.in_format.lower() not in STREAM_FORMATS:
+                return False
+        return out_format.lower() in STREAM_FORMATS + ["raw"]
+
+    def pipe(self, func, *args, **kwargs):
+        """
+        Queue up a SeqBuddy function to be applied to each record as it streams past.
+        :param func: Any SeqBuddy API function that works on records independently (see STREAM_TOOLS)
+        :param args: Passed on to func
+        :param kwargs: Passed on to func
+        :return: self
+        """
+        self.tools.append((func, args, kwargs))
+        return self
+
+    def __iter__(self):
+        if not self.streamable(self.in_format):
+            for rec in self.to_seqbuddy().records:
+                yield rec
+            return
 
-        return "%s\n" % output.rstrip()
+        for rec in self._records:
+            sb_rec = SeqBuddy([rec], self.in_format, self.out_format, self._in_alpha)
+            for func, args, kwargs in self.tools:
+                result = func(sb_rec, *args, **kwargs)
+                # Most tools modify the records in place, but some (e.g., translate6frames) build a new object
+                sb_rec = result if type(result) == SeqBuddy else sb_rec
+                if not sb_rec.records:
+                    break
+            # Records leave the stream on their own, so any results need to go with them
+            if sb_rec.results.columns:
+                _results(sb_rec).materialize()
+            for _rec in sb_rec.records:
+                yield _rec
+
+    def to_seqbuddy(self):
+        """
+        Pull everything into memory as a normal SeqBuddy object, with any queued tools applied.
+        :return: SeqBuddy object
+        """
+        if self.streamable(self.in_format):
+            return SeqBuddy(list(self), self.in_format, self.out_format, self.alpha)
+
+        # The format sniffed from the head of the file may not hold for the whole thing, so let SeqBuddy guess again
+        if type(self._source) == str or isinstance(self._source, StringIO) \
+                or str(type(self._source)) == "<class '_io.TextIOWrapper'>":
+            seqbuddy = SeqBuddy(self._source, self._user_in_format, self.out_format, self._in_alpha)
+        else:
+            seqbuddy = SeqBuddy(list(self._source), self.in_format, self.out_format, self._in_alpha)
+        for func, args, kwargs in self.tools:
+            func(seqbuddy, *args, **kwargs)
+        return seqbuddy
 
     def write(self, file_path, out_format=None):
-        with open(file_path, "w") as ofile:
-            if out_format:
-                out_format_save = str(self.out_format)
-                self.out_format = out_format
-                ofile.write(str(self))
-                self.out_format = out_format_save
+        """
+        Drain the stream into a file.
+        :param file_path: File path or open handle
+        :param out_format: Override self.out_format
+        :return: Number of records written
+        """
+        if type(file_path) == str:
+            with open(file_path, "w") as ofile:
+                return self.write(ofile, out_format)
+
+        out_format = self.out_format.lower() if not out_format else out_format.lower()
+        if not self.streamable(out_format):
+            seqbuddy = self.to_seqbuddy()
+            if not seqbuddy.records:
+                return 0
+            seqbuddy.write(file_path, out_format)
+            return len(seqbuddy.records)
+
+        def _records():
+            for rec in self:
+                # Same genbank organism work around as in SeqBuddy.__str__()
+                if out_format in ["gb", "genbank"]:
+                    try:
+                        if re.search("(\. )+", rec.annotations['organism']):
+                            rec.annotations['organism'] = "."
+                    except KeyError:
+                        pass
+                yield rec
+
+        if out_format == "raw":
+            count = 0
+            for rec in _records():
+                file_path.write("%s%s" % ("" if not count else "\n\n", str(rec.seq)))
+                count += 1
+            if count:
+                file_path.write("\n")
+            return count
+
+        return SeqIO.write(_records(), file_path, out_format)
+
+
+class SeqIndex(object):  # Byte offsets of every record in a sequence file, cached on disk so lookups can skip parsing
+    def __init__(self, file_path, in_format=None, out_format=None, alpha=None, save=True):
+        """
+        The index is kept beside the sequence file as '<file_path>.sbi', and is rebuilt whenever the size or
+        modification time of the sequence file no longer matches what was recorded in it.
+        :param file_path: Path to a FASTA, FASTQ, or GenBank file
+        :param in_format: Skip the format sniffing
+        :param out_format: Format of the SeqBuddy objects returned by lookups. Defaults to in_format
+        :param alpha: Passed on to the SeqBuddy objects returned by lookups
+        :param save: Write the index to disk if it had to be (re)built
+        """
+        self.file_path = os.path.abspath(file_path)
+        self.index_path = "%s.sbi" % self.file_path
+        self.in_format = in_format if in_format else _guess_format(self.file_path)
+        if not self.indexable(self.in_format):
+            raise TypeError("Unable to index '%s' files, only %s." % (self.in_format, ", ".join(INDEX_FORMATS)))
+        self.in_format = self.in_format.lower()
+        self.out_format = self.in_format if not out_format else out_format
+        self.alpha = alpha
+
+        self.ids = []
+        self.offsets = array("Q")
+        self.lengths = array("Q")
+        self._id_map = {}
+
+        stat = os.stat(self.file_path)
+        self._stamp = "%s\t%s\t%s" % (self.in_format, stat.st_size, stat.st_mtime_ns)
+        if not self._load():
+            self._build()
+            if save:
+                self._save()
+
+        for indx, rec_id in enumerate(self.ids):
+            self._id_map.setdefault(rec_id, []).append(indx)
+
+    @staticmethod
+    def indexable(in_format):
+        return bool(in_format) and in_format.lower() in INDEX_FORMATS
+
+    def _load(self):
+        if not os.path.isfile(self.index_path):
+            return False
+        with open(self.index_path, "r", encoding="utf-8") as ifile:
+            if ifile.readline().rstrip("\n") != "# SeqBuddy index\t%s" % self._stamp:
+                return False
+            for line in ifile:
+                rec_id, offset, length = line.rstrip("\n").split("\t")
+                self.ids.append(rec_id)
+                self.offsets.append(int(offset))
+                self.lengths.append(int(length))
+        return True
+
+    def _save(self):
+        tmp_path = "%s.%s.tmp" % (self.index_path, os.getpid())
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as ofile:
+                ofile.write("# SeqBuddy index\t%s\n" % self._stamp)
+                for rec_id, offset, length in zip(self.ids, self.offsets, self.lengths):
+                    ofile.write("%s\t%s\t%s\n" % (rec_id, offset, length))
+            os.replace(tmp_path, self.index_path)
+        except OSError:  # Read-only directory, etc. The index is still good for this session.
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+
+    def _build(self):
+        if self.in_format == "fasta":
+            scanner = self._scan_fasta
+        elif self.in_format in ["genbank", "gb"]:
+            scanner = self._scan_genbank
+        else:
+            scanner = self._scan_fastq
+
+        with open(self.file_path, "rb") as ifile:
+            for rec_id, offset, length in scanner(ifile):
+                self.ids.append(rec_id.decode("utf-8", "replace"))
+                self.offsets.append(offset)
+                self.lengths.append(length)
+
+    @staticmethod
+    def _scan_fasta(ifile):
+        rec_id = None
+        start = offset = 0
+        for line in ifile:
+            if line.startswith(b">"):
+                if rec_id is not None:
+                    yield rec_id, start, offset - start
+                rec_id = line[1:].split(None, 1)
+                rec_id = rec_id[0] if rec_id else b""
+                start = offset
+            offset += len(line)
+        if rec_id is not None:
+            yield rec_id, start, offset - start
+
+    @staticmethod
+    def _scan_fastq(ifile):
+        # Sequence and quality strings can be wrapped, and quality lines can start with '@', so count residues
+        offset = 0
+        line = ifile.readline()
+        while line:
+            if not line.startswith(b"@"):
+                raise ValueError("Problem with FASTQ @ line:\n%r" % line)
+            start = offset
+            rec_id = line[1:].split(None, 1)
+            rec_id = rec_id[0] if rec_id else b""
+            offset += len(line)
+            seq_len = 0
+            line = ifile.readline()
+            while line and not line.startswith(b"+"):
+                seq_len += len(line.strip())
+                offset += len(line)
+                line = ifile.readline()
+            if not line:
+                raise ValueError("Premature end of file in seq section")
+            offset += len(line)
+            line = ifile.readline()
+            if not seq_len:  # Empty records still have a (blank) quality line
+                offset += len(line)
+                line = ifile.readline()
+            qual_len = 0
+            while line and qual_len < seq_len:
+                qual_len += len(line.strip())
+                offset += len(line)
+                line = ifile.readline()
+            yield rec_id, start, offset - start
+
+    @staticmethod
+    def _scan_genbank(ifile):
+        # Mirror the GenBank parser's choice of id: VERSION, then ACCESSION, then the LOCUS name
+        rec_id = None
+        start = offset = 0
+        for line in ifile:
+            if line.startswith(b"LOCUS "):
+                if rec_id is not None:
+                    yield rec_id, start, offset - start
+                rec_id = line[5:].split(None, 1)
+                rec_id = rec_id[0] if rec_id else b""
+                start = offset
+            elif rec_id is not None and line.startswith(b"ACCESSION "):
+                accession = line.split()
+                rec_id = accession[1] if len(accession) > 1 else rec_id
+            elif rec_id is not None and line.startswith(b"VERSION "):
+                version = line.split()
+                if len(version) > 1 and version[1].count(b".") == 1 and version[1].split(b".")[1].isdigit():
+                    rec_id = version[1]
+            offset += len(line)
+        if rec_id is not None:
+            yield rec_id, start, offset - start
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, rec_id):
+        return rec_id in self._id_map
+
+    def get_raw(self, positions):
+        """
+        Read records straight out of the file, in the order requested
+        :param positions: List of record indices (i.e., positions in self.ids)
+        :return: Concatenated text of the records
+        """
+        if not positions:
+            return ""
+        with open(self.file_path, "rb") as ifile:
+            with mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ) as mem_map:
+                raw = [mem_map[self.offsets[indx]:self.offsets[indx] + self.lengths[indx]] for indx in positions]
+        raw = [rec if rec.endswith(b"\n") else rec + b"\n" for rec in raw]
+        return b"".join(raw).decode("utf-8")
+
+    def to_seqbuddy(self, positions=None):
+        """
+        :param positions: List of record indices to parse. All records are read if None
+        :return: SeqBuddy object
+        """
+        if positions is None:
+            seqbuddy = SeqBuddy(self.file_path, self.in_format, self.out_format, self.alpha)
+        elif not positions:
+            seqbuddy = SeqBuddy([], self.in_format, self.out_format, self.alpha)
+        else:
+            seqbuddy = SeqBuddy(self.get_raw(positions), self.in_format, self.out_format, self.alpha)
+        return seqbuddy
+
+    def lookup(self, rec_ids):
+        """
+        :param rec_ids: List of exact record ids
+        :return: SeqBuddy object with every record matching one of the ids, in file order
+        """
+        positions = set()
+        for rec_id in rec_ids:
+            positions.update(self._id_map.get(rec_id, []))
+        return self.to_seqbuddy(sorted(positions))
+
+    def sample(self, count, replace=False, seed=None):
+        """
+        :param count: Number of records to pull at random
+        :param replace: Sample with replacement (the same record can be pulled more than once)
+        :param seed: Seed the random number generator (or pass in a random.Random object)
+        :return: SeqBuddy object
+        """
+        rng = _rng(seed)
+        if replace:
+            return self.to_seqbuddy(rng.choices(range(len(self)), k=abs(count)) if len(self) else [])
+        count = min(abs(count), len(self))
+        return self.to_seqbuddy(rng.sample(range(len(self)), count))
+
+
+class FastaRecord(object):  # Stripped down stand-in for SeqRecord, for tools that only need ids and sequences
+    __slots__ = ["id", "name", "description", "buddy_data", "_seq"]
+
+    def __init__(self, title, seq):
+        """
+        Records are usually created by _read_fasta_lite(), with seq a zero-copy view into the memory mapped file.
+        The sequence string is only assembled (line breaks removed) when asked for.
+        :param title: FASTA header line, without the '>'
+        :param seq: memoryview, bytes, or str of the raw sequence block (may include line breaks)
+        """
+        title = title.rstrip()
+        self.id = title.split(None, 1)[0] if title else ""
+        self.name = self.id
+        self.description = title
+        self._seq = seq
+
+    @property
+    def seq(self):
+        if type(self._seq) == str:
+            return self._seq
+        raw = bytes(self._seq)
+        seq = raw.translate(None, b" \r\n")
+        if b"\t" in seq or b"\x0b" in seq or b"\x0c" in seq:  # Only trailing whitespace is stripped from each line
+            seq = b"".join([line.rstrip() for line in raw.split(b"\n")]).replace(b" ", b"")
+        return seq.decode()
+
+    @seq.setter
+    def seq(self, seq):
+        self._seq = str(seq)
+
+    def __len__(self):
+        return len(self.seq)
+
+    def __copy__(self):
+        new_rec = FastaRecord("", self._seq)  # Views are read only, so can be shared between copies
+        new_rec.id, new_rec.name, new_rec.description = self.id, self.name, self.description
+        if hasattr(self, "buddy_data"):
+            new_rec.buddy_data = self.buddy_data
+        return new_rec
+
+    def __deepcopy__(self, memo):
+        new_rec = self.__copy__()
+        if hasattr(self, "buddy_data"):
+            new_rec.buddy_data = deepcopy(self.buddy_data, memo)
+        return new_rec
+
+    def format_fasta(self, wrap=60):
+        """
+        Same output as BioPython's FastaWriter
+        """
+        _id = self.id.replace("\n", " ").replace("\r", " ")
+        description = self.description.replace("\n", " ").replace("\r", " ")
+        if description and description.split(None, 1)[0] == _id:
+            title = description
+        elif description:
+            title = "%s %s" % (_id, description)
+        else:
+            title = _id
+        seq = self.seq
+        return ">%s\n%s" % (title, "".join(["%s\n" % seq[i:i + wrap] for i in range(0, len(seq), wrap)]))
+
+    def to_seqrecord(self, alpha=None):
+        """
+        :param alpha: Alphabet to set on the new Seq object
+        :return: Full SeqRecord version of the record
+        """
+        rec = SeqRecord(Seq(self.seq, alpha) if alpha else Seq(self.seq), id=self.id, name=self.name,
+                        description=self.description)
+        if hasattr(self, "buddy_data"):
+            rec.buddy_data = self.buddy_data
+        return rec
+
+
+class ResultsTable(object):  # Columnar store for per-record analysis results, attached to SeqBuddy objects as .results
+    def __init__(self, records=()):
+        """
+        One column (list or array) per metric, with one row for each record. Rows are keyed by the record objects
+        themselves, so lookups still work after records have been filtered or reordered. Nothing is attached to the
+        records until materialize() is called.
+        :param records: The records that the rows line up with
+        """
+        self.rows = list(records)
+        self.columns = OrderedDict()
+        self.unpackers = {}  # Column key -> function that expands compact cells back into their buddy_data form
+        self._row_index = {}
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __len__(self):
+        return len(self.rows)
+
+    def keys(self):
+        return list(self.columns.keys())
+
+    def matches(self, records):
+        return len(records) == len(self.rows) and all([rec is row for rec, row in zip(records, self.rows)])
+
+    def row(self, rec):
+        """
+        :param rec: Record object
+        :return: Row index of the record, or None if it is not in the table
+        """
+        indx = self._row_index.get(id(rec))
+        if indx is None or indx >= len(self.rows) or self.rows[indx] is not rec:
+            self._row_index = {id(row): indx for indx, row in enumerate(self.rows)}
+            indx = self._row_index.get(id(rec))
+        return indx
+
+    def add_column(self, key, values, unpacker=None):
+        """
+        :param key: Name of the metric (same as the old buddy_data key)
+        :param values: list or array with one value per row (None if a record has no value)
+        :param unpacker: Module level function (so it can be pickled) to expand each cell when it is read back
+        :return: None
+        """
+        if len(values) != len(self.rows):
+            raise ValueError("Column '%s' has %s values for %s rows" % (key, len(values), len(self.rows)))
+        self.columns[key] = values
+        if unpacker:
+            self.unpackers[key] = unpacker
+        else:
+            self.unpackers.pop(key, None)
+
+    def get(self, rec, key, default=None):
+        """
+        :param rec: Record object
+        :param key: Column key
+        :param default: Returned if the record or column is not in the table
+        :return: The value for rec, in the form it would have had in rec.buddy_data
+        """
+        indx = self.row(rec)
+        if indx is None or key not in self.columns or self.columns[key][indx] is None:
+            return default
+        value = self.columns[key][indx]
+        return self.unpackers[key](value) if key in self.unpackers else value
+
+    def buddy_data(self, rec):
+        """
+        :param rec: Record object
+        :return: OrderedDict of every result held for rec, same as the old rec.buddy_data attribute
+        """
+        output = OrderedDict()
+        for key in self.columns:
+            value = self.get(rec, key)
+            if value is not None:
+                output[key] = value
+        return output
+
+    def materialize(self):
+        """
+        Copy everything out onto the records as rec.buddy_data OrderedDicts
+        :return: None
+        """
+        for rec in self.rows:
+            data = self.buddy_data(rec)
+            if data:
+                for key, value in data.items():
+                    _add_buddy_data(rec, key, value)
+
+    def relabel(self, records):
+        """
+        :param records: Replacements for the current rows (e.g., copies), in the same order
+        :return: New ResultsTable holding copies of the current columns, with records as its rows
+        """
+        table = ResultsTable(records)
+        if len(table) != len(self.rows):
+            raise ValueError("Can not relabel %s rows with %s records" % (len(self.rows), len(table)))
+        for key, column in self.columns.items():
+            table.columns[key] = copy(column)
+        table.unpackers = dict(self.unpackers)
+        return table
+
+    def reindex(self, records):
+        """
+        :param records: New set of records, which may share some objects with the current rows
+        :return: New ResultsTable lined up with records, with values carried over for any records already present
+        """
+        table = ResultsTable(records)
+        indices = [self.row(rec) for rec in records]
+        for key, column in self.columns.items():
+            values = [None if indx is None else column[indx] for indx in indices]
+            if type(column) == array and None not in values:
+                values = array(column.typecode, values)
+            table.columns[key] = values
+        table.unpackers = dict(self.unpackers)
+        return table
+
+    @staticmethod
+    def concat(tables):
+        """
+        Stack tables on top of each other (e.g., shards coming back from _parallel())
+        :param tables: list of ResultsTable objects
+        :return: ResultsTable
+        """
+        table = ResultsTable(chain(*[next_table.rows for next_table in tables]))
+        for next_table in tables:
+            table.unpackers.update(next_table.unpackers)
+            for key in next_table.columns:
+                table.columns.setdefault(key, None)
+        for key in table.columns:
+            columns = [next_table.columns.get(key, [None] * len(next_table)) for next_table in tables]
+            if all([type(column) == array for column in columns]) and len(set([c.typecode for c in columns])) == 1:
+                table.columns[key] = array(columns[0].typecode, chain(*columns))
             else:
-                ofile.write(str(self))
-        return
+                table.columns[key] = list(chain(*columns))
+        return table
+
+    def to_tsv(self, keys=None):
+        """
+        Tab delimited dump of the table, one line per record. Dictionary results (e.g., res_count) get a column for
+        each of their keys, and list values are joined with commas.
+        :param keys: Only output these columns
+        :return: str
+        """
+        keys = self.keys() if keys is None else keys
+        values = [[self.get(rec, key) for key in keys] for rec in self.rows]
+        header = []
+        sub_keys = []
+        for col_indx, key in enumerate(keys):
+            sub_keys.append(OrderedDict())
+            for row in values:
+                if isinstance(row[col_indx], dict):
+                    for sub_key in row[col_indx]:
+                        sub_keys[-1][sub_key] = True
+            header += ["%s:%s" % (key, sub_key) for sub_key in sub_keys[-1]] if sub_keys[-1] else [key]
+
+        def _cell(value):
+            if value is None:
+                return ""
+            elif isinstance(value, (list, tuple)):
+                return ",".join([_cell(x) for x in value])
+            return str(value)
+
+        output = "#id\t%s\n" % "\t".join(header)
+        for rec, row in zip(self.rows, values):
+            line = [rec.id]
+            for col_indx, value in enumerate(row):
+                if sub_keys[col_indx]:
+                    value = value if isinstance(value, dict) else {}
+                    line += [_cell(value.get(sub_key)) for sub_key in sub_keys[col_indx]]
+                else:
+                    line.append(_cell(value))
+            output += "%s\n" % "\t".join(line)
+        return output
+
+
+class PatternSet(object):  # Compile find_pattern() motifs once, then search for all of them in a single pass
+    max_expansions = 256  # Degenerate motifs with more variants than this are searched as a regular expression
+
+    def __init__(self, patterns, ambig=False, include_rc=False, rna=False, overlapping=False):
+        """
+        Plain motifs (letters only) are loaded into a single Aho-Corasick automaton, so the number of motifs has almost
+        no effect on search time. Anything else is treated as a case-insensitive regular expression.
+        :param patterns: list of motifs and/or regular expressions
+        :param ambig: Expand IUPAC ambiguity codes in plain motifs to the bases they stand for (nucleotides only)
+        :param include_rc: Search the reverse complement strand as well
+        :param rna: The sequences are RNA, so reverse complements (and expansions) use U instead of T
+        :param overlapping: Report every occurrence, instead of thinning them out like re.finditer()
+        """
+        self.patterns = list(OrderedDict.fromkeys(patterns))
+        self.include_rc = include_rc
+        self.rna = rna
+        self.overlapping = overlapping
+        self.regexes = []  # (pattern index, compiled regex)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # State -> [(pattern index, motif length, strand), ...]
+
+        for indx, pattern in enumerate(self.patterns):
+            if not re.fullmatch("[A-Za-z]+", pattern):
+                regex = "(?=(%s))" % pattern if overlapping else pattern
+                self.regexes.append((indx, re.compile(regex, flags=re.IGNORECASE)))
+                continue
+
+            options = [char for char in pattern.upper()]
+            if ambig:
+                options = [NUCL_CODES.get(char, char) for char in options]
+                options = [char.replace("T", "U") for char in options] if rna else options
+                num_variants = 1
+                for char in options:
+                    num_variants *= len(char)
+                if num_variants > self.max_expansions:
+                    regex = "".join(["[%s]" % char if len(char) > 1 else char for char in options])
+                    regex = "(?=(%s))" % regex if overlapping else regex
+                    self.regexes.append((indx, re.compile(regex, flags=re.IGNORECASE)))
+                    continue
+
+            for motif in product(*options):
+                motif = "".join(motif)
+                self._add_motif(motif, (indx, len(motif), 1))
+                if include_rc:
+                    self._add_motif(self.rev_comp(motif), (indx, len(motif), -1))
+
+        # Breadth first pass to link each state to its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                self._fail[next_state] = self._step(self._fail[state], char) if state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+        self._delta = [{} for _ in self._goto]  # Transitions (including failures) are cached here as they are found
+
+    def _add_motif(self, motif, output):
+        state = 0
+        for char in motif:
+            if char not in self._goto[state]:
+                self._goto[state][char] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = self._goto[state][char]
+        if output not in self._out[state]:
+            self._out[state].append(output)
+
+    def _step(self, state, char):
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+    def rev_comp(self, seq):
+        seq = seq.translate(NUCL_COMPLEMENTS)[::-1]
+        return seq.replace("T", "U") if self.rna else seq
+
+    def search(self, seq):
+        """
+        :param seq: Sequence string
+        :return: One list of (start, end, strand) tuples for each pattern, sorted by start position. Unless the
+        PatternSet is overlapping, the hits of a pattern on a single strand never overlap each other (as with
+        re.finditer()).
+        """
+        text = seq.upper()
+        hits = [[] for _ in self.patterns]
+        if len(self._goto) > 1:
+            delta, out, state = self._delta, self._out, 0
+            for indx, char in enumerate(text):
+                next_state = delta[state].get(char)
+                if next_state is None:
+                    next_state = delta[state][char] = self._step(state, char)
+                state = next_state
+                if out[state]:
+                    for pattern_indx, length, strand in out[state]:
+                        hits[pattern_indx].append((indx + 1 - length, indx + 1, strand))
+
+            # The automaton reports every occurrence, so thin them out the way re.finditer() would
+            for pattern_indx, pattern_hits in enumerate(hits if not self.overlapping else []):
+                forward, last_end = [], 0
+                for hit in [hit for hit in pattern_hits if hit[2] == 1]:
+                    if hit[0] >= last_end:
+                        forward.append(hit)
+                        last_end = hit[1]
+                reverse, last_start = [], len(text)
+                for hit in [hit for hit in pattern_hits if hit[2] == -1][::-1]:
+                    if hit[1] <= last_start:
+                        reverse.append(hit)
+                        last_start = hit[0]
+                hits[pattern_indx] = forward + reverse
+
+        if self.regexes:
+            rc_text = self.rev_comp(text) if self.include_rc else None
+            group = 1 if self.overlapping else 0  # Overlapping regexes are wrapped in a lookahead
+            for pattern_indx, regex in self.regexes:
+                hits[pattern_indx] += [(match.start(group), match.end(group), 1) for match in regex.finditer(text)]
+                if self.include_rc:
+                    hits[pattern_indx] += [(len(text) - match.end(group), len(text) - match.start(group), -1)
+                                           for match in regex.finditer(rc_text)]
+        return [sorted(pattern_hits, key=lambda hit: (hit[0], -hit[2])) for pattern_hits in hits]
+
+
+class TranslateTable(dict):  # str.translate() table that also covers every character it wasn't explicitly given
+    def __init__(self, mapping, default=None):
+        """
+        :param mapping: {ordinal: replacement} for the characters with their own translation
+        :param default: What any other character becomes (None deletes it)
+        """
+        dict.__init__(self, mapping)
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
 
 
 # ################################################# HELPER FUNCTIONS ################################################# #
@@ -351,6 +1186,67 @@ def _add_buddy_data(rec, key=None, data=None):
     return rec
 
 
+def _bl2seq_db(seqbuddy, blast_bin, tmp_dir):
+    """
+    All-by-all engine for bl2seq(). Builds one BLAST database from the records and searches every record against it
+    with a single multi-threaded blast run, streaming through the tabular output. Results mirror the pairwise path,
+    where each record is blasted against every record ahead of it and the top HSP is kept, although E-values are
+    calculated against the whole database instead of a single subject sequence.
+    :param seqbuddy: SeqBuddy object (with unique ids)
+    :param blast_bin: 'blastp' or 'blastn'
+    :param tmp_dir: Path to a scratch directory
+    :return: List of 'query\tsubject\t%_ident\tlength\tevalue\tbit_score' strings, or None if makeblastdb failed
+    :raises RuntimeError: If the blast run itself fails
+    """
+    # Index numbers stand in for the ids, so BLAST can't mangle them
+    with open("%s/seqs.fa" % tmp_dir, "w") as ofile:
+        for indx, rec in enumerate(seqbuddy.records):
+            ofile.write(">%s\n%s\n" % (indx, str(rec.seq)))
+
+    dbtype = "prot" if blast_bin == "blastp" else "nucl"
+    makeblastdb = Popen(["makeblastdb", "-dbtype", dbtype, "-in", "%s/seqs.fa" % tmp_dir, "-out",
+                         "%s/seqs_db" % tmp_dir], stdout=PIPE, stderr=PIPE)
+    stderr = makeblastdb.communicate()[1].decode()
+    if makeblastdb.returncode or "error" in stderr.lower():
+        return None  # Fall back on the pairwise searches
+
+    num_recs = len(seqbuddy.records)
+    # stderr goes to a file, so a chatty blast can't fill up the pipe and stall while stdout is being read
+    with open("%s/blast.err" % tmp_dir, "w+") as err_file:
+        blast = Popen([blast_bin, "-query", "%s/seqs.fa" % tmp_dir, "-db", "%s/seqs_db" % tmp_dir, "-outfmt", "6",
+                       "-max_target_seqs", str(max(num_recs, 5)), "-num_threads", str(MyFuncs.usable_cpu_count())],
+                      stdout=PIPE, stderr=err_file, universal_newlines=True)
+        hits = {}
+        for line in blast.stdout:
+            line = line.split("\t")
+            if len(line) < 12:
+                continue
+            query, subject = int(line[0]), int(line[1])
+            # Only later records are blasted against earlier ones, and HSPs come best first
+            if query > subject and (query, subject) not in hits:
+                hits[(query, subject)] = line
+        blast.wait()
+        err_file.seek(0)
+        stderr = err_file.read().strip()
+
+    if blast.returncode:
+        raise RuntimeError("%s failed with exit code %s. %s" % (blast_bin, blast.returncode, stderr))
+
+    output_list = []
+    for subject in range(num_recs):
+        for query in range(subject + 1, num_recs):
+            sub_id, query_id = seqbuddy.records[subject].id, seqbuddy.records[query].id
+            if (query, subject) not in hits:
+                output_list.append("%s\t%s\t0\t0\t0\t0" % (sub_id, query_id))
+            else:
+                # values are: query, subject, %_ident, length, evalue, bit_score
+                hit = hits[(query, subject)]
+                evalue = '1e-180' if hit[10] == '0.0' else hit[10]
+                output_list.append("%s\t%s\t%s\t%s\t%s\t%s" % (query_id, sub_id, hit[2], hit[3], evalue,
+                                                                  hit[11].strip()))
+    return output_list
+
+
 def _check_for_blast_bin(blast_bin):
     """
     Check the user's system for the blast bin in $PATH, try to download if not.
@@ -378,6 +1274,134 @@ def _check_for_blast_bin(blast_bin):
     return False if not which(blast_bin) else True
 
 
+def _clean_seq_table(protein, ambiguous=True, rep_char="N", skip_list="", gap=None):
+    """
+    Build (once per setting) the str.translate() table used by clean_seq(), so each sequence is cleaned in a single pass
+    :param protein: Use the amino acid alphabet instead of the nucleotide alphabet
+    :param ambiguous: Keep ambiguous nucleotides, instead of converting them to rep_char
+    :param rep_char: What character ambiguous nucleotides are replaced with
+    :param skip_list: String of characters to be left alone
+    :param gap: Replace non-sequence characters with this instead of removing them (keeps positions aligned to the
+    original sequence, for remapping features)
+    :return: TranslateTable
+    """
+    key = (protein, ambiguous, rep_char, skip_list, gap)
+    if key not in CLEAN_SEQ_TABLES:
+        keep = "ACDEFGHIKLMNPQRSTVWXYacdefghiklmnpqrstvwxy" if protein else "ATGCURYWSMKHBVDNXatgcurywsmkhbvdnx"
+        table = {ord(char): char for char in keep + skip_list}
+        if not protein and not ambiguous:
+            table.update({ord(char): rep_char for char in keep if char not in "ATGCUatgcu%s" % skip_list})
+        CLEAN_SEQ_TABLES[key] = TranslateTable(table, gap)
+    return CLEAN_SEQ_TABLES[key]
+
+
+def _codon_lookup(table=1):
+    """
+    Build (once per table) a dict of every codon, including those with IUPAC ambiguity codes, to its amino acid.
+    Ambiguous codons that can only code for one residue are resolved to it, anything else is 'X'. Codons with two or
+    three gaps are treated as alignment gaps.
+    :param table: NCBI translation table id
+    :return: dict
+    """
+    if table not in CODON_LOOKUPS:
+        if table not in CodonTable.unambiguous_dna_by_id:
+            raise ValueError("Unknown NCBI translation table: %s" % table)
+        codon_table = CodonTable.unambiguous_dna_by_id[table]
+        lookup = {}
+        for codon in product(NUCL_CODES, repeat=3):
+            residues = set()
+            for bases in product(*[NUCL_CODES[code] for code in codon]):
+                bases = "".join(bases)
+                residues.add("*" if bases in codon_table.stop_codons else codon_table.forward_table[bases])
+            lookup["".join(codon)] = residues.pop() if len(residues) == 1 else "X"
+
+        for codon in product(list(NUCL_CODES) + ["-"], repeat=3):
+            if codon.count("-") >= 2:
+                lookup["".join(codon)] = "-"
+        CODON_LOOKUPS[table] = lookup
+    return CODON_LOOKUPS[table]
+
+
+def _restriction_batch(enzyme_group):
+    """
+    Build (once per group) the RestrictionBatch for 'commercial' or 'all', minus the RESTRICTION_BLACKLIST enzymes
+    :param enzyme_group: 'commercial' or 'all'
+    :return: RestrictionBatch
+    """
+    if enzyme_group not in RESTRICTION_BATCHES:
+        enzymes = CommOnly if enzyme_group == "commercial" else AllEnzymes
+        RESTRICTION_BATCHES[enzyme_group] = RestrictionBatch([res for res in enzymes
+                                                              if str(res) not in RESTRICTION_BLACKLIST])
+    return RESTRICTION_BATCHES[enzyme_group]
+
+
+def _restriction_scan(enzymes):
+    """
+    Compile (once per set of enzymes) the recognition sites of every enzyme into a single PatternSet, so a sequence can
+    be checked for all of them in one pass. Several enzymes can share a site (isoschizomers).
+    :param enzymes: frozenset of RestrictionType objects
+    :return: (enzymes sorted as Bio.Restriction would, PatternSet, [enzymes for each site in the PatternSet],
+    [enzymes with sites that aren't plain IUPAC codes, which need to be searched individually])
+    """
+    if enzymes not in RESTRICTION_SCANS:
+        site_enzymes = OrderedDict()
+        odd_enzymes = []
+        for enzyme in sorted(enzymes):
+            if re.fullmatch("[ACGTRYWSMKHBVDN]+", enzyme.site):
+                site_enzymes.setdefault(enzyme.site, []).append(enzyme)
+            else:
+                odd_enzymes.append(enzyme)
+        pattern_set = PatternSet(site_enzymes, ambig=True, include_rc=True, overlapping=True)
+        RESTRICTION_SCANS[enzymes] = (sorted(enzymes), pattern_set, list(site_enzymes.values()), odd_enzymes)
+    return RESTRICTION_SCANS[enzymes]
+
+
+def _restriction_cuts(enzyme, formatted_seq, forward, reverse):
+    """
+    Convert recognition site locations into cut positions, the same way Bio.Restriction does after running its own
+    search (i.e., with the _modify(), _rev_modify(), and _drop() methods of the enzyme)
+    :param enzyme: RestrictionType object
+    :param formatted_seq: Bio.Restriction.FormattedSeq object
+    :param forward: Sorted 1-indexed starts of the site on the forward strand
+    :param reverse: Sorted 1-indexed starts of the reverse complement site (ignored for palindromic enzymes)
+    :return: list of cut positions, as from enzyme.search()
+    """
+    if enzyme.is_palindromic():
+        results = [cut for start in forward for cut in enzyme._modify(start)]
+    else:
+        # The site is only looked for on the minus strand where it didn't match on the plus strand
+        forward_set = set(forward)
+        results = [cut for start in forward for cut in enzyme._modify(start)]
+        results += [cut for start in reverse if start not in forward_set for cut in enzyme._rev_modify(start)]
+        results.sort()
+    enzyme.dna = formatted_seq
+    enzyme.results = results
+    if results:
+        enzyme._drop()
+    return enzyme.results
+
+
+def _composition(seq, codons=False):
+    """
+    Tally the residues (and optionally the in-frame codons) of a sequence in a single pass. Counter() does the actual
+    counting at C speed, so this is the shared kernel behind count_residues(), count_codons() and molecular_weight()
+    :param seq: Seq, SeqRecord, or str
+    :param codons: Also count codons. Residue totals are then rolled up from the codon counts plus any trailing partial
+    codon, so the sequence is still only walked once.
+    :return: Tuple of upper-cased Counter objects (residues, codons). codons is None if not requested.
+    """
+    seq = str(seq).upper()
+    if not codons:
+        return Counter(seq), None
+
+    codon_counts = Counter(map("".join, zip(*[iter(seq)] * 3)))
+    residues = Counter(seq[len(seq) - len(seq) % 3:])
+    for codon, count in codon_counts.items():
+        for residue in codon:
+            residues[residue] += count
+    return residues, codon_counts
+
+
 def _download_blast_binaries(blastn=True, blastp=True, blastdcmd=True, **kwargs):
     """
     :param blastn: Install blastn? (bool)
@@ -452,6 +1476,47 @@ def _download_blast_binaries(blastn=True, blastp=True, blastdcmd=True, **kwargs)
     return True
 
 
+def _external_sort(records, key, reverse=False, chunk_size=100000):
+    """
+    Sort more records than can be held in memory. Each chunk of records is sorted and spilled to a temporary file (with
+    its sort keys, so they are only computed once), and then the sorted runs are lazily merged back together. The sort
+    is stable, just like sorted().
+    :param records: Iterable of SeqRecords (e.g., a SeqBuddyStream)
+    :param key: Function that returns the sort key of a record
+    :param reverse: Sort in descending order
+    :param chunk_size: The maximum number of records held in memory while the runs are being built
+    :return: Generator of SeqRecords, in sorted order
+    """
+    def read_run(_run):
+        with open(_run.path, "rb") as ifile:
+            while True:
+                try:
+                    yield pickle.load(ifile)
+                except EOFError:
+                    break
+
+    records = iter(records)
+    runs = []
+    chunk = list(islice(records, chunk_size))
+    while chunk:
+        chunk = sorted([(key(rec), rec) for rec in chunk], key=lambda x: x[0], reverse=reverse)
+        next_chunk = list(islice(records, chunk_size))
+        if not runs and not next_chunk:  # Everything fit in one chunk, so there is nothing to merge
+            for _key, rec in chunk:
+                yield rec
+            return
+
+        run = MyFuncs.TempFile(byte_mode=True)
+        with open(run.path, "wb") as ofile:
+            for pair in chunk:
+                pickle.dump(pair, ofile, protocol=pickle.HIGHEST_PROTOCOL)
+        runs.append(run)
+        chunk = next_chunk
+
+    for _key, rec in heapq.merge(*[read_run(run) for run in runs], key=lambda x: x[0], reverse=reverse):
+        yield rec
+
+
 def _feature_rc(feature, seq_len):
     """
     BioPython does not properly handle reverse complement of features, so implement it...
@@ -479,40 +1544,39 @@ def _feature_rc(feature, seq_len):
 
 class FeatureReMapper:
     """
-    Build a list that maps original residues to new positions if residues have been removed
+    Map original residues to new positions if residues have been removed, and move the features to match
     This will not work if new columns are being added.
-    :usage: Instantiate a new object, and for each position in the original sequence, call the 'extend' method,
-            specifying whether that residue exists in the new alignment or not. Remap the features on the new sequence
-            by calling the remap_features method.
+    :usage: Instantiate a new object with a keep mask (one truthy/falsy value for each position in the original
+            sequence, e.g., a bytearray), then remap the features on the new sequence by calling the remap_features
+            method. The mask can also be built up one residue at a time by calling the 'extend' method for each
+            position.
     """
-    def __init__(self, old_seq):
+    def __init__(self, old_seq, keep=None):
         self.old_seq = old_seq  # SeqRecord
-        self.position_map = []
-        self.starting_position_filled = False
+        self.keep = bytearray()
+        # prefix[i] is the number of residues kept before position i, so [s, e) -> [prefix[s], prefix[e])
+        self.prefix = None
+        if keep is not None:
+            self.keep = bytearray([1 if exists else 0 for exists in keep]) if type(keep) not in [bytes, bytearray] \
+                else bytearray(keep)
+            if len(self.keep) != len(self.old_seq.seq):
+                raise AttributeError("The keep mask is %s long, but the sequence is %s." %
+                                     (len(self.keep), len(self.old_seq.seq)))
 
     def extend(self, exists=True):
-        if len(self.old_seq.seq) < len(self.position_map) + 1:
+        if len(self.old_seq.seq) < len(self.keep) + 1:
             raise AttributeError("The position map has already been fully populated.")
-
-        if len(self.position_map) == 0:
-            if exists:
-                self.starting_position_filled = True
-            self.position_map.append((0, exists))
-
-        else:
-            if exists and not self.starting_position_filled:
-                self.position_map.append((0, True))
-                self.starting_position_filled = True
-            elif exists and self.starting_position_filled:
-                self.position_map.append((self.position_map[-1][0] + 1, True))
-            else:
-                self.position_map.append((self.position_map[-1][0], False))
+        self.keep.append(1 if exists else 0)
+        self.prefix = None
         return
 
     def remap_features(self, new_seq):
-        if len(self.old_seq.seq) != len(self.position_map):
+        if len(self.old_seq.seq) != len(self.keep):
             raise AttributeError("The position map has not been fully populated.")
 
+        if self.prefix is None:
+            self.prefix = array("l", [0])
+            self.prefix.extend(accumulate(self.keep))
         new_features = []
         for feature in self.old_seq.features:
             feature = self._remap(feature)
@@ -523,15 +1587,13 @@ class FeatureReMapper:
 
     def _remap(self, feature):
         if type(feature.location) == FeatureLocation:
-            for pos, present in self.position_map[feature.location.start:feature.location.end]:
-                if present:
-                    start = pos
-                    end = self.position_map[feature.location.end - 1][0] + 1
-                    location = FeatureLocation(start, end, strand=feature.location.strand)
-                    feature.location = location
-                    return feature
-            else:
+            start = min(max(int(feature.location.start), 0), len(self.keep))
+            end = min(max(int(feature.location.end), 0), len(self.keep))
+            start, end = self.prefix[start], self.prefix[end]
+            if start == end:  # None of the residues under the feature are left
                 return None
+            feature.location = FeatureLocation(start, end, strand=feature.location.strand)
+            return feature
 
         else:  # CompoundLocation
             parts = []
@@ -557,18 +1619,22 @@ def _guess_alphabet(seqbuddy):
     :return: IUPAC alphebet object
     """
     seq_list = seqbuddy if isinstance(seqbuddy, list) else seqbuddy.records
-    seq_list = [str(x.seq) for x in seq_list]
-    sequence = "".join(seq_list).upper()
-    sequence = re.sub("[NX\-?]", "", sequence)
+    sequence = "".join([str(x.seq) for x in seq_list]).upper()
+    if not sequence.isascii():  # Odd characters still count toward the length, but can't match any residue
+        sequence = re.sub("[^\x00-\x7f]", "*", sequence)
 
-    if len(sequence) == 0:
+    # Tally by deleting residues with bytes.translate(), which is many times faster than regex on large files
+    sequence = sequence.encode()
+    seq_len = len(sequence.translate(None, b"NX-?"))
+
+    if seq_len == 0:
         return None
 
-    if 'U' in sequence:  # U is unique to RNA
+    if b'U' in sequence:  # U is unique to RNA
         return IUPAC.ambiguous_rna
 
-    percent_dna = len(re.findall("[ATCG]", sequence)) / float(len(sequence))
-    percent_protein = len(re.findall("[ACDEFGHIKLMNPQRSTVWXY]", sequence)) / float(len(sequence))
+    percent_dna = (len(sequence) - len(sequence.translate(None, b"ATCG"))) / float(seq_len)
+    percent_protein = (len(sequence) - len(sequence.translate(None, b"ACDEFGHIKLMPQRSTVWY"))) / float(seq_len)
     if percent_dna > 0.85:  # odds that a sequence with no Us and such a high ATCG count be anything but DNA is low
         return IUPAC.ambiguous_dna
     elif percent_protein > 0.85:
@@ -579,8 +1645,8 @@ def _guess_alphabet(seqbuddy):
 
 def _guess_format(_input):
     """
-    Loop through many possible formats that BioPython has a parser for, and return the format that is
-    actually able to return records.
+    Sniff out the format from the head of the file, falling back to a trial parse of the head with each of the
+    formats that BioPython has a parser for.
     :param _input: Duck-typed; can be list, SeqBuddy object, file handle, or file path.
     :return: str or None
     """
@@ -599,61 +1665,18 @@ def _guess_format(_input):
     if str(type(_input)) == "<class '_io.TextIOWrapper'>" or isinstance(_input, StringIO):
         if not _input.seekable():  # Deal with input streams (e.g., stdout pipes)
             _input = StringIO(_input.read())
-        if _input.read() == "":
-            return "empty file"
-        _input.seek(0)
 
-        possible_formats = ["stockholm", "fasta", "gb", "phylipss", "phylipsr", "phylip", "phylip-relaxed",
-                            "fastq", "nexus", "embl", "seqxml", "clustal"]
+        # Most formats announce themselves in the first few lines, so only trial parse if the sniffer can't decide
+        _format = br.sniff_format(_input, "seqbuddy")
+        if _format:
+            return _format
+
+        # Phylip files are fully handled by sniff_format(). Only the head of the file is trial parsed.
+        _input = StringIO(br.read_head(_input)[0])
+        possible_formats = ["stockholm", "fasta", "gb", "fastq", "nexus", "embl", "seqxml", "clustal"]
         for next_format in possible_formats:
             try:
                 _input.seek(0)
-                if next_format == "phylip":
-                    sequence = "\n %s" % _input.read().strip()
-                    _input.seek(0)
-                    alignments = re.split("\n ([0-9]+) ([0-9]+)\n", sequence)[1:]
-                    align_sizes = []
-                    for indx in range(int(len(alignments) / 3)):
-                        align_sizes.append((int(alignments[indx * 3]), int(alignments[indx * 3 + 1])))
-
-                    phy = list(AlignIO.parse(_input, "phylip"))
-                    _input.seek(0)
-                    indx = 0
-                    phy_ids = []
-                    for key in align_sizes:
-                        phy_ids.append([])
-                        for rec in phy[indx]:
-                            assert len(rec.seq) == key[1]
-                            phy_ids[-1].append(rec.id)
-                        indx += 1
-
-                    phy_rel = list(AlignIO.parse(_input, "phylip-relaxed"))
-                    _input.seek(0)
-                    if phy_rel:
-                        for indx, aln in enumerate(phy_rel):
-                            for rec in aln:
-                                if len(rec.seq) != align_sizes[indx][1]:
-                                    return br.parse_format("phylip")
-                                if rec.id in phy_ids[indx]:
-                                    continue
-                                else:
-                                    return br.parse_format("phylip-relaxed")
-
-                    return br.parse_format("phylip")
-
-                if next_format == "phylipss":
-                    if br.phylip_sequential_read(_input.read(), relaxed=False):
-                        _input.seek(0)
-                        return br.parse_format(next_format)
-                    else:
-                        continue
-                if next_format == "phylipsr":
-                    if br.phylip_sequential_read(_input.read()):
-                        _input.seek(0)
-                        return br.parse_format(next_format)
-                    else:
-                        continue
-
                 seqs = SeqIO.parse(_input, next_format)
                 if next(seqs):
                     _input.seek(0)
@@ -676,6 +1699,380 @@ def _guess_format(_input):
         raise br.GuessError("Unsupported _input argument in guess_format(). %s" % _input)
 
 
+def _kmer_profile(seq, kmer_size, alphabet):
+    """
+    Encode every k-mer in a sequence as an integer, packing each residue into as few bits as the alphabet allows.
+    K-mers containing anything outside of the alphabet (gaps, ambiguous residues, etc.) are skipped.
+    :param seq: Sequence string
+    :param kmer_size: Must fit into 64 bits (i.e., 32 for nucleotides and 12 for proteins)
+    :param alphabet: String of valid residues
+    :return: Sorted array of unique k-mer codes
+    """
+    bits = (len(alphabet) - 1).bit_length()
+    if bits * kmer_size > 64:
+        raise ValueError("K-mer size of %s is too large for the alphabet, the maximum is %s" %
+                         (kmer_size, 64 // bits))
+    lookup = {char: indx for indx, char in enumerate(alphabet)}
+    if "T" in lookup:
+        lookup["U"] = lookup["T"]
+    mask = (1 << (bits * kmer_size)) - 1
+    kmers = set()
+    code = 0
+    run = 0
+    for char in seq.upper():
+        if char not in lookup:
+            run = 0
+            continue
+        code = ((code << bits) | lookup[char]) & mask
+        run += 1
+        if run >= kmer_size:
+            kmers.add(code)
+    return array("Q", sorted(kmers))
+
+
+def _minhash(profile, sketch_size):
+    """
+    Bottom-s MinHash sketch of a k-mer profile. K-mer codes are scrambled with the splitmix64 finalizer, and the
+    sketch_size smallest values are kept.
+    :param profile: Array of k-mer codes from _kmer_profile()
+    :param sketch_size: Number of hash values to keep
+    :return: (sorted array of hash values, bool of whether the sketch is a subsample of the full profile)
+    """
+    hashes = []
+    for code in profile:
+        code = ((code ^ (code >> 30)) * 0xbf58476d1ce4e5b9) & 0xffffffffffffffff
+        code = ((code ^ (code >> 27)) * 0x94d049bb133111eb) & 0xffffffffffffffff
+        hashes.append(code ^ (code >> 31))
+    hashes.sort()
+    return array("Q", hashes[:sketch_size]), len(hashes) > sketch_size
+
+
+def _kmer_sketches(seqs, alpha, kmer_size, sketch_size):
+    """
+    MinHash sketches of a batch of sequences. This is the one k-mer engine, shared by sim_ident() and the greedy
+    purge() prefilter.
+    :param seqs: List of sequence strings
+    :param alpha: IUPAC alphabet of the sequences (anything but protein is treated as nucleotide)
+    :param kmer_size: See _kmer_profile()
+    :param sketch_size: See _minhash()
+    :return: List of (sorted hash array, frozenset of hashes, truncated) tuples
+    """
+    alphabet = "ACDEFGHIKLMNPQRSTVWY" if alpha == IUPAC.protein else "ACGT"
+    sketches = []
+    for seq in seqs:
+        hashes, truncated = _minhash(_kmer_profile(seq, kmer_size, alphabet), sketch_size)
+        sketches.append((hashes, frozenset(hashes), truncated))
+    return sketches
+
+
+def _order_key(sort_by="id", regex=None):
+    """
+    Build the key function used by order_recs() to sort records
+    :param sort_by: One of SORT_MODES
+    :param regex: Pattern for the 'regex' mode. Records are sorted on the first capture group (or the whole match if
+    there are no groups), and records that don't match go to the end.
+    :return: Function that takes a SeqRecord and returns its sort key
+    """
+    if sort_by not in SORT_MODES:
+        raise ValueError("Unknown sort mode '%s'. Choose from %s." % (sort_by, ", ".join(SORT_MODES)))
+
+    def natural_id(rec):
+        return br.natural_sort_key(rec.id), rec.id  # Fall back on the raw id, so 'Seq01' and 'Seq1' are consistent
+
+    if sort_by == "id":
+        return natural_id
+    elif sort_by == "length":
+        return lambda rec: len(rec.seq)
+    elif sort_by == "hash":  # Groups identical sequences together
+        return lambda rec: md5(str(rec.seq).encode()).hexdigest()
+    elif sort_by == "features":
+        return lambda rec: len(rec.features)
+
+    if not regex:
+        raise ValueError("A regular expression is required to sort by 'regex'.")
+    try:
+        regex = re.compile(regex)
+    except re.error as e:
+        raise ValueError("Invalid regular expression '%s': %s." % (regex, e))
+
+    def capture(rec):
+        match = regex.search(rec.id)
+        if not match:
+            return 1, ()
+        match = match.group(1) if regex.groups else match.group(0)
+        return 0, br.natural_sort_key("" if match is None else match)
+    return capture
+
+
+def _parallel(seqbuddy, func, workers, *args, **kwargs):
+    """
+    Shard the records of a SeqBuddy object into contiguous chunks, run a tool over each chunk in a process pool, and
+    stitch everything back together in the original order. Records come home with their features and buddy_data, and
+    any list or dict attributes the tool hangs off the SeqBuddy object (e.g., restriction_sites) are concatenated.
+    :param seqbuddy: SeqBuddy object
+    :param func: SeqBuddy API function that treats each record independently
+    :param workers: Number of processes to use (0 or None for all usable cores)
+    :param args: Passed on to func
+    :param kwargs: Passed on to func
+    :return: The modified SeqBuddy object
+    """
+    workers = MyFuncs.usable_cpu_count() if not workers else workers
+    workers = min(workers, len(seqbuddy.records))
+    if workers < 2 or current_process().daemon:  # Pool workers are not allowed to have children of their own
+        return func(seqbuddy, *args, **kwargs)
+
+    # A few chunks per worker evens out the load without pickling every record separately
+    chunk_size = ceil(len(seqbuddy.records) / (workers * 4))
+    table = _results(seqbuddy)
+    chunks = [(func, table.reindex(seqbuddy.records[indx:indx + chunk_size]), seqbuddy.in_format,
+               seqbuddy.out_format, seqbuddy.alpha, args, kwargs)
+              for indx in range(0, len(seqbuddy.records), chunk_size)]
+    with Pool(workers) as pool:
+        results = pool.map(_parallel_chunk, chunks)
+
+    seqbuddy.records = []
+    for result in results:
+        seqbuddy.records += result.records
+        for attr, value in vars(result).items():
+            if attr in ["records", "results"]:
+                continue
+            elif attr == "alpha":
+                seqbuddy.alpha = _restore_alphabet(value)
+            elif result is results[0] or not isinstance(value, (list, dict)):
+                setattr(seqbuddy, attr, value)
+            elif isinstance(value, list):
+                getattr(seqbuddy, attr).extend(value)
+            else:
+                getattr(seqbuddy, attr).update(value)
+    seqbuddy.results = ResultsTable.concat([_results(result) for result in results])
+
+    for rec in seqbuddy.records:
+        rec.seq.alphabet = _restore_alphabet(rec.seq.alphabet)
+    return seqbuddy
+
+
+def _parallel_chunk(args):
+    """
+    Process pool worker for _parallel()
+    :param args: (func, results, in_format, out_format, alpha, func_args, func_kwargs), where results is the
+    ResultsTable of the chunk (its rows are the records)
+    :return: The SeqBuddy object returned by func
+    """
+    func, table, in_format, out_format, alpha, func_args, func_kwargs = args
+    records = table.rows
+    alphabets = [_restore_alphabet(rec.seq.alphabet) for rec in records]
+    seqbuddy = SeqBuddy(records, in_format, out_format, _restore_alphabet(alpha))
+    seqbuddy.results = table
+    for rec, alphabet in zip(seqbuddy.records, alphabets):
+        rec.seq.alphabet = alphabet
+    return func(seqbuddy, *func_args, **func_kwargs)
+
+
+def _purge_greedy(seqbuddy, threshold, kmer_size=None, min_shared=.05, batch_size=50, sketch_size=1000):
+    """
+    CD-HIT style greedy clustering for purge(). Records are visited from longest to shortest, and each one is either
+    absorbed by the best scoring representative that it hits with a bit score >= threshold, or becomes a new
+    representative itself. BLAST is only ever run against representatives that share at least min_shared of the
+    candidate's k-mers, so the amount of work scales with the number of clusters instead of n^2. Candidates are handled
+    in batches to keep the number of blast processes down: one search of the batch against the existing
+    representatives, and one of the leftovers against each other.
+    :param seqbuddy: SeqBuddy object
+    :param threshold: Minimum bit score for a sequence to be purged
+    :param kmer_size: Word size used by the prefilter (defaults to 3 for protein and 8 for nucleotide)
+    :param min_shared: Fraction of a candidate's k-mers that a representative must also contain
+    :param batch_size: Number of candidates per round of BLAST searches
+    :param sketch_size: The prefilter compares the same MinHash sketches as sim_ident(), with this many hashes each
+    :return: OrderedDict of {representative index: [purged record indices]}
+    """
+    blast_bin = "blastp" if seqbuddy.alpha == IUPAC.protein else "blastn"
+    if not _check_for_blast_bin(blast_bin):
+        raise RuntimeError("%s not present in $PATH or working directory." % blast_bin.capitalize())
+
+    kmer_size = kmer_size if kmer_size else 3 if blast_bin == "blastp" else 8
+    tmp_dir = MyFuncs.TempDir()
+    seqs = [re.sub("[-.\s]", "", str(rec.seq).upper()) for rec in seqbuddy.records]
+    sketches = _kmer_sketches(seqs, seqbuddy.alpha, kmer_size, sketch_size)
+    kmers = [hash_set for hashes, hash_set, truncated in sketches]
+
+    def passes(query, subj, shared):  # Sequences shorter than the k-mer size can't be filtered, so just let them through
+        if not kmers[query]:
+            return True
+        # Only the part of the query sketch below both cutoffs can be compared (see _sim_ident_row())
+        cutoff = min([sketches[indx][0][-1] if sketches[indx][2] else 1 << 64 for indx in [query, subj]])
+        return shared >= max(bisect_right(sketches[query][0], cutoff) * min_shared, 1)
+
+    def blast_scores(queries, subjects):  # Top bit score for every query/subject pair with a hit
+        for file_name, indices in [("query", queries), ("subject", subjects)]:
+            with open("%s/%s.fa" % (tmp_dir.path, file_name), "w") as ofile:
+                ofile.write("".join([">%s\n%s\n" % (indx, seqs[indx]) for indx in indices]))
+        with open("%s/blast.err" % tmp_dir.path, "w+") as err_file:
+            blast = Popen([blast_bin, "-query", "%s/query.fa" % tmp_dir.path, "-subject",
+                           "%s/subject.fa" % tmp_dir.path, "-outfmt", "6"], stdout=PIPE, stderr=err_file,
+                          universal_newlines=True)
+            scores = {}
+            for line in blast.stdout:
+                line = line.split("\t")
+                if len(line) >= 12:
+                    pair = (int(line[0]), int(line[1]))
+                    scores[pair] = max(scores.get(pair, 0), float(line[11]))
+            blast.wait()
+            err_file.seek(0)
+            if blast.returncode:  # Otherwise every candidate would look unrelated, and nothing would be purged
+                raise RuntimeError("%s failed with exit code %s. %s" % (blast_bin, blast.returncode,
+                                                                      err_file.read().strip()))
+        return scores
+
+    def best_rep(query, candidates, scores):  # Ties go to the oldest representative
+        hits = [(scores.get((query, rep), 0), -rep_order[rep], rep) for rep in candidates]
+        hits = [hit for hit in hits if hit[0] >= threshold]
+        return max(hits)[2] if hits else None
+
+    clusters = OrderedDict()
+    rep_order = {}
+    kmer_index = {}
+    order = sorted(range(len(seqs)), key=lambda indx: -len(seqs[indx]))  # Stable, so ties stay in file order
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+
+        # Round 1: the batch against established representatives that make it through the k-mer prefilter
+        candidates = {}
+        for query in batch:
+            if kmers[query]:
+                shared = Counter([rep for kmer in kmers[query] for rep in kmer_index.get(kmer, [])])
+                candidates[query] = [rep for rep, count in shared.items() if passes(query, rep, count)]
+            else:
+                candidates[query] = list(clusters)
+        subjects = sorted(set([rep for reps in candidates.values() for rep in reps]))
+        queries = [query for query in batch if candidates[query]]
+        scores = blast_scores(queries, subjects) if queries else {}
+
+        leftovers = []
+        for query in batch:
+            rep = best_rep(query, candidates[query], scores)
+            if rep is None:
+                leftovers.append(query)
+            else:
+                clusters[rep].append(query)
+
+        # Round 2: leftovers against each other, settled greedily from longest to shortest
+        pairs = {}
+        for indx, query in enumerate(leftovers):
+            pairs[query] = [subj for subj in leftovers[:indx]
+                            if passes(query, subj, len(kmers[query] & kmers[subj]))]
+        queries = [query for query in leftovers if pairs[query]]
+        scores = blast_scores(queries, sorted(set([subj for subjs in pairs.values() for subj in subjs]))) \
+            if queries else {}
+
+        for query in leftovers:
+            rep = best_rep(query, [subj for subj in pairs[query] if subj in clusters], scores)
+            if rep is None:
+                rep_order[query] = len(clusters)
+                clusters[query] = []
+                for kmer in kmers[query]:
+                    kmer_index.setdefault(kmer, []).append(query)
+            else:
+                clusters[rep].append(query)
+    return clusters
+
+
+def _lite_seqbuddy(records, out_format=None, alpha=None):
+    """
+    Wrap FastaRecords in a SeqBuddy object without upgrading them to SeqRecords. Only the LITE_TOOLS know how to handle
+    FastaRecords, so this is strictly for the command line fast path; the SeqBuddy constructor converts them instead.
+    :param records: List of FastaRecord objects (e.g., from _read_fasta_lite())
+    :param out_format: Output format
+    :param alpha: Alphabet, guessed from the records if not given
+    :return: SeqBuddy object
+    """
+    seqbuddy = SeqBuddy([], "fasta", out_format, alpha)
+    seqbuddy.records = records
+    seqbuddy.alpha = seqbuddy.alpha if seqbuddy.alpha else _guess_alphabet(records)
+    return seqbuddy
+
+
+def _read_fasta_lite(file_path):
+    """
+    Fast path FASTA reader. The file is memory mapped and split into FastaRecord objects holding views into the
+    mapping, so nothing but the headers is copied until a sequence is actually needed.
+    :param file_path: Path to a FASTA file
+    :return: list of FastaRecord objects
+    """
+    with open(file_path, "rb") as ifile:
+        if not os.fstat(ifile.fileno()).st_size:
+            return []
+        mem_map = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mem_map)
+    end_of_file = len(mem_map)
+    records = []
+    # Anything before the first header line is skipped, same as the BioPython parser
+    start = 0 if mem_map[:1] == b">" else mem_map.find(b"\n>")
+    start = start + 1 if start > 0 else start
+    while start != -1:
+        seq_start = mem_map.find(b"\n", start)
+        seq_start = end_of_file if seq_start == -1 else seq_start + 1
+        next_start = mem_map.find(b"\n>", seq_start - 1)
+        title = mem_map[start + 1:seq_start].decode()
+        records.append(FastaRecord(title, view[seq_start:end_of_file if next_start == -1 else next_start]))
+        start = next_start + 1 if next_start != -1 else -1
+    return records
+
+
+def _reservoir_sample(records, count, rng, replace=False):
+    """
+    Pull records at random from an iterable of unknown length, in a single pass and without ever holding more than
+    count records in memory.
+    :param records: Iterable of SeqRecord objects (e.g., a SeqBuddyStream)
+    :param count: Number of records to pull
+    :param rng: random.Random object
+    :param replace: Sample with replacement (i.e., the same record can be pulled more than once)
+    :return: list of records, in random order
+    """
+    reservoir = []
+    if count < 1:
+        return reservoir
+
+    if not replace:  # Algorithm R; record n takes one of the slots with probability count / n
+        for indx, rec in enumerate(records):
+            if indx < count:
+                reservoir.append(rec)
+            else:
+                slot = int(rng.random() * (indx + 1))
+                if slot < count:
+                    reservoir[slot] = rec
+        rng.shuffle(reservoir)
+        return reservoir
+
+    # With replacement, every slot is its own reservoir of size one. Instead of rolling for each slot at each record,
+    # work out when a slot will next be overwritten (having seen n records, the next is floor(n / U) + 1) and keep the
+    # slots in a heap on that position.
+    records = iter(records)
+    rec = next(records, None)
+    if rec is None:
+        return reservoir
+    reservoir = [rec] * count
+    queue = [(int(1 / (1 - rng.random())) + 1, slot) for slot in range(count)]
+    heapq.heapify(queue)
+    for position, rec in enumerate(records, start=2):
+        while queue[0][0] == position:
+            slot = heapq.heappop(queue)[1]
+            reservoir[slot] = rec
+            heapq.heappush(queue, (int(position / (1 - rng.random())) + 1, slot))
+    return reservoir
+
+
+def _restore_alphabet(alpha):
+    """
+    Alphabets are compared by identity all over the place, but unpickling creates new instances. Swap them back.
+    :param alpha: Bio.Alphabet object
+    :return: The matching IUPAC singleton, or alpha unchanged if there isn't one
+    """
+    for iupac in [IUPAC.protein, IUPAC.ambiguous_dna, IUPAC.unambiguous_dna, IUPAC.ambiguous_rna,
+                  IUPAC.unambiguous_rna, IUPAC.extended_protein, IUPAC.extended_dna]:
+        if type(alpha) == type(iupac):
+            return iupac
+    return alpha
+
+
 def make_copy(seqbuddy):
     """
     Deepcopy a SeqBuddy object. The alphabet objects are not handled properly when deepcopy is called,
@@ -683,14 +2080,162 @@ def make_copy(seqbuddy):
     :param seqbuddy: SeqBuddy object
     :return: SeqBuddy object
     """
-    alphabet_list = [rec.seq.alphabet for rec in seqbuddy.records]
+    alphabet_list = [None if type(rec) == FastaRecord else rec.seq.alphabet for rec in seqbuddy.records]
     _copy = deepcopy(seqbuddy)
     _copy.alpha = seqbuddy.alpha
     for indx, rec in enumerate(_copy.records):
-        rec.seq.alphabet = alphabet_list[indx]
+        if type(rec) != FastaRecord:
+            rec.seq.alphabet = alphabet_list[indx]
     return _copy
 
 
+def _results(seqbuddy):
+    """
+    Fetch the ResultsTable of a SeqBuddy object, lined up with its current records. If the records have changed since
+    the table was last written to, results are carried over for any records that are still present.
+    :param seqbuddy: SeqBuddy object
+    :return: ResultsTable
+    """
+    table = getattr(seqbuddy, "results", None)
+    if table is None:
+        table = ResultsTable(seqbuddy.records)
+    elif not table.matches(seqbuddy.records):
+        table = table.reindex(seqbuddy.records)
+    seqbuddy.results = table
+    return table
+
+
+def _rng(seed=None):
+    """
+    Random number generator for the sampling and shuffling tools
+    :param seed: Anything random.seed() accepts, to make the output reproducible. A random.Random object is passed back
+    as-is, so it can be shared between calls (e.g., over the records of a SeqBuddyStream).
+    :return: random.Random object
+    """
+    return seed if isinstance(seed, Random) else Random(seed)
+
+
+def _unpack_res_count(cell):
+    """
+    Expand the compact form of count_residues() results back into the original OrderedDict
+    :param cell: (layout, values), where layout is a tuple of (key, code) and values is a flat array of floats
+    :return: OrderedDict of residue -> [count, fraction], with the '% <property>' keys holding single values
+    """
+    layout, values = cell
+    output = OrderedDict()
+    indx = 0
+    for key, code in layout:
+        if code == 2:
+            output[key] = [0, 0]
+        elif code == 1:
+            output[key] = [int(values[indx]), values[indx + 1]]
+            indx += 2
+        else:
+            output[key] = values[indx]
+            indx += 1
+    return output
+
+
+def _shallow_copy(seqbuddy, records=None):
+    """
+    Cheap snapshot of a SeqBuddy object for internal use, instead of the deepcopy in make_copy().
+    Each record is duplicated along with the containers that get modified in place (features, qualifiers,
+    annotations, letter_annotations, buddy_data, results), but the Seq objects are shared with the original. This means
+    sequences in the copy must be replaced (rec.seq = Seq(...)), never modified directly (e.g., rec.seq.alphabet).
+    :param seqbuddy: SeqBuddy object
+    :param records: Optional list of records to give the new object as-is, without copying them. Useful when the
+    copy is only going to be filtered (e.g., pull_recs()), not modified.
+    :return: SeqBuddy object
+    """
+    _copy = copy(seqbuddy)
+    table = _results(seqbuddy)
+    _copy.records = [_copy_record(rec) for rec in seqbuddy.records] if records is None else records
+    _copy.results = table.relabel(_copy.records) if records is None else table
+    return _copy
+
+
+def _copy_record(rec):
+    """
+    Duplicate a SeqRecord without copying its sequence. See _shallow_copy()
+    :param rec: SeqRecord object
+    :return: New SeqRecord object
+    """
+    new_rec = copy(rec)
+    new_rec.letter_annotations = rec.letter_annotations
+    new_rec.annotations = copy(rec.annotations)
+    new_rec.dbxrefs = copy(rec.dbxrefs)
+    new_rec.features = []
+    for feat in rec.features:
+        feat = copy(feat)
+        feat.qualifiers = copy(feat.qualifiers)
+        feat.location = copy(feat.location)
+        if type(feat.location) == CompoundLocation:
+            feat.location.parts = copy(feat.location.parts)
+        new_rec.features.append(feat)
+    if hasattr(rec, "buddy_data"):
+        new_rec.buddy_data = deepcopy(rec.buddy_data)
+    return new_rec
+
+
+def _sim_ident_row(indx, args):
+    """
+    Jaccard estimates between one sketch and every sketch after it. Work horse of sim_ident(), and multicore ready.
+    Shared hashes can all be counted with a set intersection, because anything in both bottom-s sketches must fall
+    below the smaller of the two cutoffs. The union is then everything from either sketch below that cutoff.
+    :param indx: Row index
+    :param args: [list of (sorted hash array, frozenset of hashes, truncated) tuples]
+    :return: array of float Jaccard indices
+    """
+    sketches = args[0]
+    a_hashes, a_set, a_truncated = sketches[indx]
+    row = array("f")
+    for b_hashes, b_set, b_truncated in islice(sketches, indx + 1, None):
+        shared = len(a_set & b_set)
+        if not shared:
+            row.append(0.)
+            continue
+        cutoff = min(a_hashes[-1] if a_truncated else 1 << 64, b_hashes[-1] if b_truncated else 1 << 64)
+        row.append(shared / (bisect_right(a_hashes, cutoff) + bisect_right(b_hashes, cutoff) - shared))
+    return row
+
+
+class SimilarityMatrix(object):
+    """
+    All-by-all k-mer similarity among a set of sequences, as returned by sim_ident(). Only the upper triangle of
+    Jaccard indices is stored (in a flat float array), and identities are derived from them on request with the Mash
+    distance (Ondov et al. 2016).
+    """
+    def __init__(self, ids, jaccard, kmer_size):
+        self.ids = ids
+        self.index = {seq_id: indx for indx, seq_id in enumerate(ids)}
+        self.jaccard_array = jaccard
+        self.kmer_size = kmer_size
+
+    def jaccard(self, id1, id2):
+        indx1, indx2 = sorted([self.index[id1], self.index[id2]])
+        if indx1 == indx2:
+            return 1.
+        num_ids = len(self.ids)
+        return self.jaccard_array[indx1 * (2 * num_ids - indx1 - 1) // 2 + indx2 - indx1 - 1]
+
+    def distance(self, id1, id2):
+        jaccard = self.jaccard(id1, id2)
+        if jaccard >= 1:
+            return 0.
+        elif jaccard <= 0:
+            return 1.
+        return min(-log(2 * jaccard / (1 + jaccard)) / self.kmer_size, 1.)
+
+    def identity(self, id1, id2):
+        return 1 - self.distance(id1, id2)
+
+    def __str__(self):
+        output = "\t%s\n" % "\t".join(self.ids)
+        for id1 in self.ids:
+            output += "%s\t%s\n" % (id1, "\t".join(["%.4f" % self.identity(id1, id2) for id2 in self.ids]))
+        return output
+
+
 def _stderr(message, quiet=False):
     """
     Send text to stderr
@@ -717,6 +2262,22 @@ def _stdout(message, quiet=False):
     return
 
 
+def _translate(seq, lookup, frames=1):
+    """
+    Translate an upper-case nucleotide string with a lookup dict from _codon_lookup().
+    For more than one frame, a codon is read at every position in a single pass and each frame is sliced out of that.
+    :param seq: str
+    :param lookup: dict of codon to amino acid
+    :param frames: Number of reading frames (1-3) to return, counting from the first residue
+    :return: list of translated strings, one per frame
+    """
+    if frames == 1:
+        bases = iter(seq)
+        return ["".join(map(lookup.get, map("".join, zip(bases, bases, bases)), repeat("X")))]
+    residues = list(map(lookup.get, map("".join, zip(seq, seq[1:], seq[2:])), repeat("X")))
+    return ["".join(residues[frame::3]) for frame in range(frames)]
+
+
 # ################################################ MAIN API FUNCTIONS ################################################ #
 def annotate(seqbuddy, _type, location, strand=None, qualifiers=None, pattern=None):
     """
@@ -847,13 +2408,14 @@ def ave_seq_length(seqbuddy, clean=False):
     return sum_length / len(seqbuddy.records)
 
 
-def back_translate(seqbuddy, mode='random', species=None):
+def back_translate(seqbuddy, mode='random', species=None, workers=1):
     """
     Back-translates protein sequences into DNA sequences
     :param seqbuddy: SeqBuddy object
     :param mode: The codon selection mode (random/optimized)
     :param species: The model to use for optimized codon selection (human/mouse/yeast/ecoli)
     codon preference tables derived from the data at http://www.kazusa.or.jp
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
     :return: Modified SeqBuddy object
     """
     # Homo sapiens, species=9606
@@ -861,6 +2423,9 @@ def back_translate(seqbuddy, mode='random', species=None):
         raise AttributeError("Back_translate modes accepted are 'random' or 'r' and 'optimized' or 'o'. "
                              "You entered '%s'" % mode)
 
+    if workers != 1:
+        return _parallel(seqbuddy, back_translate, workers, mode=mode, species=species)
+
     h_sapi = {'A': (['GCT', 'GCC', 'GCA', 'GCG'], [0.27, 0.40, 0.23, 0.11]),
               'C': (['TGT', 'TGC'], [0.46, 0.54]),
               'D': (['GAT', 'GAC'], [0.46, 0.54]),
@@ -1034,7 +2599,9 @@ def back_translate(seqbuddy, mode='random', species=None):
 
 def bl2seq(seqbuddy):
     """
-    Does an all-by-all analysis of the sequences
+    Does an all-by-all analysis of the sequences. If makeblastdb is available, the sequences are pulled into a single
+    temporary BLAST database and searched against it in one multi-threaded run, otherwise every pair is blasted
+    separately.
     :param seqbuddy: SeqBuddy object
     :return: OrderedDict of results dict[key][matches]
     """
@@ -1042,9 +2609,9 @@ def bl2seq(seqbuddy):
     # threshold may need to be increased quite a bit to return short alignments
 
     def mc_blast(_query, _args):
-        _subject_file = _args[0]
+        _subject, _subject_file = _args
 
-        if subject.id == _query.id:
+        if _subject.id == _query.id:
             return
 
         _blast_res = Popen("echo '%s' | %s -subject %s -outfmt 6" %
@@ -1054,20 +2621,17 @@ def bl2seq(seqbuddy):
         while True:
             try:
                 if len(_blast_res) == 1:
-                    _result = "%s\t%s\t0\t0\t0\t0\n" % (subject.id, _query.id)
+                    _result = "%s\t%s\t0\t0\t0\t0" % (_subject.id, _query.id)
                 else:
                     # values are: query, subject, %_ident, length, evalue, bit_score
                     if _blast_res[10] == '0.0':
                         _blast_res[10] = '1e-180'
-                    _result = "%s\t%s\t%s\t%s\t%s\t%s\n" % (_blast_res[0], _blast_res[1], _blast_res[2],
-                                                            _blast_res[3], _blast_res[10], _blast_res[11].strip())
+                    _result = "%s\t%s\t%s\t%s\t%s\t%s" % (_blast_res[0], _blast_res[1], _blast_res[2],
+                                                          _blast_res[3], _blast_res[10], _blast_res[11].strip())
                 break
             except ConnectionRefusedError:
                 continue
-        with lock:
-            with open("%s/blast_results.txt" % tmp_dir.path, "a") as _ofile:
-                _ofile.write(_result)
-        return
+        return _result
 
     if seqbuddy.alpha == IUPAC.protein and not _check_for_blast_bin("blastp"):
         raise RuntimeError("Blastp not present in $PATH or working directory.")
@@ -1078,23 +2642,24 @@ def bl2seq(seqbuddy):
 
     blast_bin = "blastp" if seqbuddy.alpha == IUPAC.protein else "blastn"
 
-    from multiprocessing import Lock
-    lock = Lock()
     tmp_dir = MyFuncs.TempDir()
-
-    # Copy the seqbuddy records into new list, so they can be iteratively deleted below
     make_ids_unique(seqbuddy, sep="-")
-    seqs_copy = seqbuddy.records[:]
-    subject_file = "%s/subject.fa" % tmp_dir.path
-    for subject in seqbuddy.records:
-        with open(subject_file, "w") as ifile:
-            SeqIO.write(subject, ifile, "fasta")
-
-        MyFuncs.run_multicore_function(seqs_copy, mc_blast, [subject_file], out_type=sys.stderr, quiet=True)
-        seqs_copy = seqs_copy[1:]
-
-    with open("%s/blast_results.txt" % tmp_dir.path, "r") as _ifile:
-        output_list = _ifile.read().strip().split("\n")
+    output_list = _bl2seq_db(seqbuddy, blast_bin, tmp_dir.path) if which("makeblastdb") else None
+
+    if output_list is None:
+        # Copy the seqbuddy records into new list, so they can be iteratively deleted below
+        seqs_copy = seqbuddy.records[:]
+        subject_file = "%s/subject.fa" % tmp_dir.path
+        output_list = []
+        for subject in seqbuddy.records:
+            with open(subject_file, "w") as ifile:
+                SeqIO.write(subject, ifile, "fasta")
+
+            # The heavy lifting happens in the blast subprocesses, so threads are all that's needed to keep them fed
+            output_list += MyFuncs.run_multicore_function(seqs_copy, mc_blast, [subject, subject_file], quiet=True,
+                                                          out_type=sys.stderr, backend="thread")
+            seqs_copy = seqs_copy[1:]
+        output_list = [result for result in output_list if result]
 
     # Push output into a dictionary of dictionaries, for more flexible use outside of this function
     output_list = [x.split("\t") for x in output_list]
@@ -1228,36 +2793,62 @@ def blast(subject, query, **kwargs):
     if "Error" in blast_output:
         raise RuntimeError(blast_output)
 
-    with open("%s/out.txt" % tmp_dir.path, "r") as ifile:
-        blast_results = ifile.read()
-        records = blast_results.split("\n")
-
     hit_ids = []
-    for record in records:
-        record = record.split("\t")
-        if len(record) == 1:
-            continue
-        hit_id = record[1].strip()
-        if hit_id in hit_ids:
-            continue
-
-        hit_ids.append(hit_id)
-
-    with open("%s/seqs.fa" % tmp_dir.path, "w") as ofile:
-        for hit_id in hit_ids:
-            hit = Popen("blastdbcmd -db %s -entry 'lcl|%s'" % (query, hit_id), stdout=PIPE, shell=True).communicate()
-            hit = hit[0].decode("utf-8")
-            hit = re.sub("lcl\|", "", hit)
-            ofile.write("%s\n" % hit)
+    seen = set()
+    with open("%s/out.txt" % tmp_dir.path, "r") as ifile:
+        for record in ifile:
+            record = record.split("\t")
+            if len(record) == 1:
+                continue
+            hit_id = record[1].strip()
+            if hit_id in seen:
+                continue
+            seen.add(hit_id)
+            hit_ids.append(hit_id)
 
-    new_seqs = SeqBuddy("%s/seqs.fa" % tmp_dir.path)
-    new_seqs.out_format = subject.out_format
+    records = []
+    if hit_ids:
+        # Pull every hit out of the database in one go, instead of a blastdbcmd call per hit, and parse its output as
+        # it streams in
+        with open("%s/hit_ids.txt" % tmp_dir.path, "w") as id_file:
+            id_file.write("".join(["lcl|%s\n" % hit_id for hit_id in hit_ids]))
+        with open("%s/blastdbcmd.err" % tmp_dir.path, "w+") as err_file:
+            blastdbcmd = Popen(["blastdbcmd", "-db", query, "-entry_batch", "%s/hit_ids.txt" % tmp_dir.path],
+                               stdout=PIPE, stderr=err_file, universal_newlines=True)
+            for rec in SeqIO.parse(blastdbcmd.stdout, "fasta"):
+                rec.id, rec.name = rec.id.replace("lcl|", ""), rec.name.replace("lcl|", "")
+                rec.description = rec.description.replace("lcl|", "")
+                records.append(rec)
+            blastdbcmd.wait()
+            err_file.seek(0)
+            stderr = err_file.read().strip()
+        # A missing entry only shows up on stderr, so don't hand back a partial set of hits
+        if blastdbcmd.returncode or "error" in stderr.lower():
+            raise RuntimeError("blastdbcmd failed with exit code %s. %s" % (blastdbcmd.returncode, stderr))
+
+    new_seqs = SeqBuddy(records, "fasta", subject.out_format)
     if query_sb:
         for _hash, seq_id in query_sb.hash_map.items():
             rename(new_seqs, _hash, seq_id)
     return new_seqs
 
 
+def bootstrap(seqbuddy, count=None, seed=None):
+    """
+    Resample records with replacement (e.g., to build bootstrap replicates of a gene set)
+    :param seqbuddy: SeqBuddy object
+    :param count: Number of records to draw. Defaults to the number of input records (a stream has to be read into
+    memory to find out how many that is, so pass in a count to avoid that)
+    :param seed: Seed the random number generator, for a reproducible sample
+    :return: The resampled SeqBuddy object
+    """
+    if not count:
+        if type(seqbuddy) == SeqBuddyStream:
+            seqbuddy = seqbuddy.to_seqbuddy()
+        count = len(seqbuddy) if type(seqbuddy) == SeqIndex else len(seqbuddy.records)
+    return pull_random_recs(seqbuddy, count, replace=True, seed=seed)
+
+
 def clean_seq(seqbuddy, ambiguous=True, rep_char="N", skip_list=None):
     """
     Removes all non-sequence characters, and converts ambiguous characters to 'X' if ambiguous=False
@@ -1267,27 +2858,20 @@ def clean_seq(seqbuddy, ambiguous=True, rep_char="N", skip_list=None):
     :param skip_list: Optional list of characters to be left alone
     :return: The cleaned SeqBuddy object
     """
-    seqbuddy_copy = make_copy(seqbuddy)
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(clean_seq, ambiguous=ambiguous, rep_char=rep_char, skip_list=skip_list)
+
     skip_list = "" if not skip_list else "".join(skip_list)
-    for rec, rec_copy in zip(seqbuddy.records, seqbuddy_copy.records):
-        if rec.seq.alphabet == IUPAC.protein:
-            full_skip = "ACDEFGHIKLMNPQRSTVWXYacdefghiklmnpqrstvwxy%s" % skip_list
-            rec_copy.seq = Seq(re.sub("[^%s]" % full_skip, "-", str(rec.seq)),
-                               alphabet=rec.seq.alphabet)
-            rec.seq = Seq(re.sub("[^%s]" % full_skip, "", str(rec.seq)),
-                          alphabet=rec.seq.alphabet)
-        else:
-            full_skip = "ATGCURYWSMKHBVDNXatgcurywsmkhbvdnx%s" % skip_list
-            rec_copy.seq = Seq(re.sub("[^%s]" % full_skip, "-", str(rec.seq)),
-                               alphabet=rec.seq.alphabet)
-            rec.seq = Seq(re.sub("[^%s]" % full_skip, "", str(rec.seq)),
-                          alphabet=rec.seq.alphabet)
-            if not ambiguous:
-                full_skip = "ATGCUatgcu%s" % skip_list
-                rec.seq = Seq(re.sub("[^%s]" % full_skip, rep_char, str(rec.seq)), alphabet=rec.seq.alphabet)
-                rec_copy.seq = Seq(re.sub("[^%s]" % full_skip, rep_char, str(rec.seq)), alphabet=rec.seq.alphabet)
-
-    br.remap_gapped_features(seqbuddy_copy.records, seqbuddy.records)
+    for rec in seqbuddy.records:
+        protein = rec.seq.alphabet == IUPAC.protein
+        seq = str(rec.seq)
+        rec.seq = Seq(seq.translate(_clean_seq_table(protein, ambiguous, rep_char, skip_list)),
+                      alphabet=rec.seq.alphabet)
+        if rec.features and len(rec.seq) != len(seq):
+            # Features only need to be shifted if characters were actually removed, so gap them out in a throwaway copy
+            old_seq = seq.translate(_clean_seq_table(protein, ambiguous, rep_char, skip_list, gap="-"))
+            old_rec = SeqRecord(Seq(old_seq, alphabet=rec.seq.alphabet), features=rec.features)
+            br.remap_gapped_features([old_rec], [rec])
     return seqbuddy
 
 
@@ -1299,6 +2883,8 @@ def complement(seqbuddy):
     """
     if seqbuddy.alpha == IUPAC.protein:
         raise TypeError("Nucleic acid sequence required, not protein.")
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(complement)
     for rec in seqbuddy.records:
         rec.seq = rec.seq.complement()
     return seqbuddy
@@ -1350,37 +2936,25 @@ def count_codons(seqbuddy):
         codontable = CodonTable.ambiguous_rna_by_name['Standard'].forward_table
     output = OrderedDict()
     for rec in seqbuddy.records:
-        sequence = rec.seq
-        if len(sequence) % 3 != 0:
-            while len(sequence) % 3 != 0:
-                sequence = sequence[:-1]
+        codon_counts = _composition(rec.seq, codons=True)[1]
+        num_codons = sum(codon_counts.values())
         data_table = {}
-        num_codons = len(sequence) / 3
-        while len(sequence) > 0:
-            codon = str(sequence[:3]).upper()
-            if codon in data_table:
-                data_table[codon][1] += 1
+        for codon, count in codon_counts.items():
+            if codon in ['ATG', 'AUG']:
+                amino_acid = 'M'
+            elif codon == 'NNN':
+                amino_acid = 'X'
+            elif codon in ['TAA', 'TAG', 'TGA', 'UAA', 'UAG', 'UGA']:
+                amino_acid = '*'
             else:
-                if codon.upper() in ['ATG', 'AUG']:
-                    data_table[codon] = ['M', 1, 0.0]
-                elif codon.upper() == 'NNN':
-                    data_table[codon] = ['X', 1, 0.0]
-                elif codon.upper() in ['TAA', 'TAG', 'TGA', 'UAA', 'UAG', 'UGA']:
-                    data_table[codon] = ['*', 1, 0.0]
-                else:
-                    try:
-                        data_table[codon] = [codontable[codon.upper()], 1, 0.0]
-                    except KeyError:
-                        _stderr("Warning: Codon '{0}' is invalid. Codon will be skipped.\n".format(codon))
-            sequence = sequence[3:]
-        for codon in data_table:
-            data_table[codon][2] = round(data_table[codon][1] / float(num_codons) * 100, 3)
+                try:
+                    amino_acid = codontable[codon]
+                except KeyError:
+                    _stderr("Warning: Codon '{0}' is invalid. Codon will be skipped.\n".format(codon))
+                    continue
+            data_table[codon] = [amino_acid, count, round(count / float(num_codons) * 100, 3)]
         output[rec.id] = OrderedDict(sorted(data_table.items(), key=lambda x: x[0]))
-    for rec in seqbuddy.records:
-        try:
-            rec.buddy_data['Codon_frequency'] = output[rec.id]
-        except AttributeError:
-            rec.buddy_data = OrderedDict({'Codon_frequency': output[rec.id]})
+    _results(seqbuddy).add_column("Codon_frequency", [output[rec.id] for rec in seqbuddy.records])
     return seqbuddy, output
 
 
@@ -1388,45 +2962,30 @@ def count_residues(seqbuddy):
     """
     Generate frequency statistics for residue composition
     :param seqbuddy: SeqBuddy object
-    :return: annotated SeqBuddy object. Residue counts are appended to buddy_data in the SeqRecord obects
+    :return: annotated SeqBuddy object. Residue counts are added to the 'res_count' column of seqbuddy.results
     """
+    layouts = {}  # Records with the same set of residues share a single layout tuple
+    column = []
     for rec in seqbuddy.records:
-        resid_count = {}
-        seq = str(rec.seq).upper()
-        for char in seq:
-            resid_count.setdefault(char, 0)
-            resid_count[char] += 1
-
+        counts = _composition(rec.seq)[0]
         seq_len = len(rec)
-        for residue, count in resid_count.items():
-            resid_count[residue] = [count, count / seq_len]
+        resid_count = {residue: [count, count / seq_len] for residue, count in counts.items()}
 
         if seqbuddy.alpha is IUPAC.protein:
-            ambig = len(re.findall("X", seq))
+            ambig = counts["X"]
             if ambig > 0:
                 resid_count['% Ambiguous'] = round(100 * ambig / seq_len, 2)
 
-            pos = len(re.findall("[HKR]", seq))
-            resid_count['% Positive'] = round(100 * pos / seq_len, 2)
-
-            neg = len(re.findall("[DEC]", seq))
-            resid_count['% Negative'] = round(100 * neg / seq_len, 2)
-
-            neut = len(re.findall("[GAVLIPFYWSTNQM]", seq))
-            resid_count['% Uncharged'] = round(100 * neut / seq_len, 2)
-
-            hyrdophobic = len(re.findall("[AVLIPYFWMC]", seq))
-            resid_count['% Hyrdophobic'] = round(100 * hyrdophobic / seq_len, 2)
-
-            hyrdophilic = len(re.findall("[NQSTKRHDE]", seq))
-            resid_count['% Hyrdophilic'] = round(100 * hyrdophilic / seq_len, 2)
+            for label, residues in [('% Positive', "HKR"), ('% Negative', "DEC"), ('% Uncharged', "GAVLIPFYWSTNQM"),
+                                    ('% Hyrdophobic', "AVLIPYFWMC"), ('% Hyrdophilic', "NQSTKRHDE")]:
+                resid_count[label] = round(100 * sum([counts[res] for res in residues]) / seq_len, 2)
 
             for residue in ["A", "C", "D", "E", "F", "G", "H", "I", "K", "L", "M",
                             "N", "P", "Q", "R", "S", "T", "V", "W", "Y"]:
                 resid_count.setdefault(residue, [0, 0])
 
         else:
-            ambig = len(re.findall("[^ATCGU]", seq))
+            ambig = seq_len - sum([counts[res] for res in "ATCGU"])
             if ambig > 0:
                 resid_count['% Ambiguous'] = round(100 * ambig / seq_len, 2)
 
@@ -1436,15 +2995,25 @@ def count_residues(seqbuddy):
             if "T" not in resid_count and "U" not in resid_count:
                 resid_count["T"] = [0, 0]
 
-        _add_buddy_data(rec, "res_count", OrderedDict(sorted(resid_count.items())))
+        # Layout codes: 0 = single percentage, 1 = [count, fraction], 2 = the [0, 0] placeholder (nothing stored)
+        layout = tuple([(key, 0 if type(value) != list else 2 if value == [0, 0] else 1)
+                        for key, value in sorted(resid_count.items())])
+        layout = layouts.setdefault(layout, layout)
+        values = array("d")
+        for key, code in layout:
+            if code != 2:
+                values.extend(resid_count[key] if code else [resid_count[key]])
+        column.append((layout, values))
+    _results(seqbuddy).add_column("res_count", column, _unpack_res_count)
     return seqbuddy
 
 
-def degenerate_sequence(seqbuddy, table=1):
+def degenerate_sequence(seqbuddy, table=1, workers=1):
     """
     Generate degenerate codon sequence
     :param seqbuddy: The SeqBuddy object to be analyzed
     :param table: The degenerate codon table to use
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
     :return: A SeqBuddy object containing a degenerate nucleotide sequence
 
     Contributed by Jeremy Labarge (https://github.com/biojerm)
@@ -1575,6 +3144,9 @@ def degenerate_sequence(seqbuddy, table=1):
     if seqbuddy.alpha == IUPAC.protein:
         raise TypeError("Nucleic acid sequence required, not protein.")
 
+    if workers != 1:
+        return _parallel(seqbuddy, degenerate_sequence, workers, table=table)
+
     if seqbuddy.alpha == IUPAC.ambiguous_rna or seqbuddy.alpha == IUPAC.unambiguous_rna:
         rna2dna(seqbuddy)
 
@@ -1615,6 +3187,8 @@ def delete_large(seqbuddy, max_value):
     :param max_value: The maximum threshold for sequence length
     :return: The modified SeqBuddy object
     """
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(delete_large, max_value)
     retained_records = []
     for rec in seqbuddy.records:
         if len(str(rec.seq)) <= max_value:
@@ -1638,70 +3212,58 @@ def delete_metadata(seqbuddy):
     return seqbuddy
 
 
-def delete_records(seqbuddy, patterns):
+def delete_records(seqbuddy, patterns, id_files=None):
     """
     Deletes records with IDs matching a regex pattern
     :param seqbuddy: SeqBuddy object
-    :param patterns: A single regex pattern, or list of patterns, to search with
+    :param patterns: A single regex pattern, or list of patterns, to search with (or a br.PatternFilter object)
+    :param id_files: Path, or list of paths, to files of exact IDs to delete (one per line)
     :return: The modified SeqBuddy object
     """
     if type(patterns) == str:
         patterns = [patterns]
-    if type(patterns) != list:
-        raise ValueError("'patterns' must be a list or a string.")
+    if type(patterns) not in [list, br.PatternFilter]:
+        raise ValueError("'patterns' must be a list, a string, or a br.PatternFilter object.")
 
-    retained_records = []
-    for pattern in patterns:
-        pattern = ".*" if pattern == "*" else pattern
-        deleted = [rec.id for rec in pull_recs(make_copy(seqbuddy), pattern).records]
-        for rec in seqbuddy.records:
-            if rec.id in deleted:
-                continue
-            else:
-                retained_records.append(rec)
-        seqbuddy.records = retained_records
-        retained_records = []
+    patterns = patterns if type(patterns) == br.PatternFilter else br.PatternFilter(patterns, id_files)
+    seqbuddy.records = [rec for rec in seqbuddy.records if not patterns.search(rec.id, rec.name)]
     return seqbuddy
 
 
-def delete_repeats(seqbuddy, scope='all'):  # scope in ['all', 'ids', 'seqs']
+def delete_repeats(seqbuddy, scope='all', ignore_case=False, ignore_gaps=False):  # scope in ['all', 'ids', 'seqs']
     """
     Deletes records with repeated IDs/seqs
     :param seqbuddy: SeqBuddy object
     :param scope: Specifies if deleting repeat seqs, ids, or all
+    :param ignore_case: Treat sequences that only differ by case as repeats
+    :param ignore_gaps: Treat sequences that only differ by gaps as repeats
     :return: The modified SeqBuddy object
     """
-    # First, remove duplicate IDs
+    # First, remove duplicate IDs. The first copy of each is retained, but moved to the end of the records.
     if scope in ['all', 'ids']:
-        find_repeats(seqbuddy)
+        find_repeats(seqbuddy, low_memory=True)
         if len(seqbuddy.repeat_ids) > 0:
-            for rep_id in seqbuddy.repeat_ids:
-                store_one_copy = pull_recs(make_copy(seqbuddy), ["^%s$" % rep_id]).records[0]
-                delete_records(seqbuddy, "^%s$" % rep_id)
-                seqbuddy.records.append(store_one_copy)
+            retained_records = []
+            first_copies = {}
+            for rec in seqbuddy.records:
+                if rec.id in seqbuddy.repeat_ids:
+                    first_copies.setdefault(rec.id, rec)
+                else:
+                    retained_records.append(rec)
+            seqbuddy.records = retained_records + [first_copies[rep_id] for rep_id in seqbuddy.repeat_ids]
 
-    # Then remove duplicate sequences
+    # Then remove duplicate sequences, keeping the first ID listed for each in repeat_seqs
     if scope in ['all', 'seqs']:
-        find_repeats(seqbuddy)
+        find_repeats(seqbuddy, ignore_case=ignore_case, ignore_gaps=ignore_gaps, low_memory=True)
         if len(seqbuddy.repeat_seqs) > 0:
-            rep_seq_ids = []
-            for seq in seqbuddy.repeat_seqs:
-                rep_seq_ids.append([])
-                for rep_seq_id in seqbuddy.repeat_seqs[seq]:
-                    rep_seq_ids[-1].append(rep_seq_id)
-
-            repeat_regex = ""
-
-            for repeat_seqs in rep_seq_ids:
-                for rep_seq in repeat_seqs[1:]:
-                    rep_seq = re.sub("([|.*?^\[\]()])", r"\\\1", rep_seq)
-                    repeat_regex += "^%s$|" % rep_seq
-
-            repeat_regex = repeat_regex[:-1]
-            delete_records(seqbuddy, repeat_regex)
+            deleted = set()
+            for rep_seq_ids in seqbuddy.repeat_seqs.values():
+                deleted.update(rep_seq_ids[1:])
+            seqbuddy.records = [rec for rec in seqbuddy.records if rec.id not in deleted]
 
     seqbuddy.repeat_seqs = OrderedDict()
     seqbuddy.repeat_ids = OrderedDict()
+    seqbuddy.repeat_clusters = OrderedDict()
     seqbuddy.unique_seqs = OrderedDict([(x.id, x) for x in seqbuddy.records])
     return seqbuddy
 
@@ -1713,6 +3275,8 @@ def delete_small(seqbuddy, min_value):
     :param min_value: The minimum threshold for sequence length
     :return: The modified SeqBuddy object
     """
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(delete_small, min_value)
     retained_records = []
     for rec in seqbuddy.records:
         if len(str(rec.seq)) >= min_value:
@@ -1729,6 +3293,10 @@ def dna2rna(seqbuddy):
     """
     if seqbuddy.alpha != IUPAC.ambiguous_dna:
         raise TypeError("DNA sequence required, not %s." % seqbuddy.alpha)
+    if type(seqbuddy) == SeqBuddyStream:
+        seqbuddy.pipe(dna2rna)
+        seqbuddy.alpha = IUPAC.ambiguous_rna
+        return seqbuddy
     for rec in seqbuddy.records:
         rec.seq = Seq(str(rec.seq.transcribe()), alphabet=IUPAC.ambiguous_rna)
     seqbuddy.alpha = IUPAC.ambiguous_rna
@@ -1815,104 +3383,137 @@ def extract_regions(seqbuddy, positions):
 
     new_records = []
     for rec in seqbuddy.records:
-        new_rec_positions = create_residue_list(rec, positions)
-        new_seq = ""
-        if rec.features:  # This is super slow for large records...
-            remapper = FeatureReMapper(rec)
-            for indx, residue in enumerate(str(rec.seq)):
-                if indx in new_rec_positions:
-                    remapper.extend(True)
-                    new_seq += residue
-                else:
-                    remapper.extend(False)
-            new_seq = Seq(new_seq, alphabet=rec.seq.alphabet)
-            new_seq = SeqRecord(new_seq, rec.id, rec.name, rec.description)
-            new_seq = remapper.remap_features(new_seq)
-        else:
-            seq = str(rec.seq)
-            for indx in new_rec_positions:
-                new_seq += seq[indx]
-            new_seq = Seq(new_seq, alphabet=rec.seq.alphabet)
-            new_seq = SeqRecord(new_seq, rec.id, rec.name, rec.description)
-
+        seq = str(rec.seq)
+        keep = bytearray(len(seq))
+        for indx in create_residue_list(rec, positions):
+            keep[indx] = 1
+        new_seq = Seq("".join(compress(seq, keep)), alphabet=rec.seq.alphabet)
+        new_seq = SeqRecord(new_seq, rec.id, rec.name, rec.description)
+        if rec.features:
+            new_seq = FeatureReMapper(rec, keep).remap_features(new_seq)
         new_records.append(new_seq)
 
     seqbuddy = SeqBuddy(new_records, out_format=seqbuddy.out_format)
     return seqbuddy
 
 
-def find_cpg(seqbuddy):
+def _cpg_islands(seq, window_size=200, min_gc=.5, min_oe=.6):
+    """
+    Sliding window engine for find_cpg(). Each position gets the average GC fraction and CpG observed/expected ratio
+    of every window that overlaps it, and runs of positions above both thresholds are islands. Window counts are
+    updated incrementally as the windows slide along and positions are scored one at a time, so run time is linear in
+    sequence length and memory is bounded by the window size (i.e., fine for chromosome-scale sequences).
+    :param seq: Sequence string
+    :param window_size: Shrinks to the sequence length for short sequences
+    :param min_gc: Islands must have a GC fraction greater than this
+    :param min_oe: Islands must have a CpG observed/expected ratio greater than this
+    :return: List of (start, end) tuples
+    """
+    seq = str(seq).upper()
+    seq_len = len(seq)
+    window_size = seq_len if seq_len < window_size else window_size
+    last_window = seq_len - window_size
+
+    def window_oe(_cg, _gc):  # Observed/expected value of a window
+        expected = (_gc / 2) ** 2
+        expected = 1 if not expected else expected  # Prevent DivByZero
+        return _cg * window_size / expected
+
+    def check(value, threshold, window_values, divisor, scale=1):
+        # Positions that land right on a threshold are re-summed one window at a time, so they round exactly as
+        # they did when find_cpg() accumulated every window into every position
+        if abs(value - threshold) < 1e-9:
+            value = 0
+            for window_value in window_values:
+                value += window_value / scale
+            value /= divisor
+        return value > threshold
+
+    # Counts for the first window, then slide it along one residue at a time
+    gc_count = seq.count("C", 0, window_size) + seq.count("G", 0, window_size)
+    cg_count = seq.count("CG", 0, window_size)
+    gc_windows = deque()  # Values for the windows overlapping the current position
+    oe_windows = deque()
+    gc_sum, oe_sum = 0, 0.
+    islands = []
+    start = None
+    for indx in range(seq_len):
+        if indx <= last_window:
+            if indx:
+                gc_count += (seq[indx + window_size - 1] in "CG") - (seq[indx - 1] in "CG")
+                cg_count += (seq[indx + window_size - 2:indx + window_size] == "CG") - (seq[indx - 1:indx + 1] == "CG")
+            gc_windows.append(gc_count)
+            oe_windows.append(window_oe(cg_count, gc_count))
+            gc_sum += gc_count
+            oe_sum += oe_windows[-1]
+        if indx >= window_size:  # The window starting at indx - window_size no longer overlaps
+            gc_sum -= gc_windows.popleft()
+            oe_sum -= oe_windows.popleft()
+        if not indx % window_size:
+            oe_sum = fsum(oe_windows)  # Stop floating point error from building up in the running sum
+
+        # Same (slightly odd) divisors used since find_cpg() was first written
+        if indx + 1 <= window_size:
+            divisor = indx + 1
+        elif indx >= last_window:
+            divisor = seq_len - indx
+        else:
+            divisor = window_size
+
+        if check(gc_sum / window_size / divisor, min_gc, gc_windows, divisor, window_size) \
+                and check(oe_sum / divisor, min_oe, oe_windows, divisor):
+            start = indx if start is None else start
+        elif start is not None:
+            islands.append((start, indx))
+            start = None
+
+    if start is not None:
+        islands.append((start, seq_len))
+    return islands
+
+
+def find_cpg(seqbuddy, window_size=200, min_gc=.5, min_oe=.6, workers=1):
     """
     Predicts locations of CpG islands in DNA sequences
     :param seqbuddy: SeqBuddy object
-    :return: Modified SeqBuddy object (buddy_data["cpgs"] appended to all records)
+    :param window_size: Number of residues used to calculate GC content and CpG observed/expected ratios
+    :param min_gc: Islands must have a GC fraction greater than this
+    :param min_oe: Islands must have a CpG observed/expected ratio greater than this
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
+    :return: Modified SeqBuddy object (island indices are added to the 'cpgs' column of seqbuddy.results)
     """
+    if window_size < 1:
+        raise ValueError("window_size must be at least 1, not %s." % window_size)
+    if min_gc < 0 or min_oe < 0:
+        raise ValueError("min_gc and min_oe can not be negative.")
+
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(find_cpg, window_size=window_size, min_gc=min_gc, min_oe=min_oe)
+
+    if workers != 1:
+        return _parallel(seqbuddy, find_cpg, workers, window_size=window_size, min_gc=min_gc, min_oe=min_oe)
+
     seqbuddy = clean_seq(seqbuddy)
     if seqbuddy.alpha not in [IUPAC.ambiguous_dna, IUPAC.unambiguous_dna]:
         raise TypeError("DNA sequence required, not protein or RNA.")
 
     records = []
-
-    def cpg_calc(in_seq):  # Returns observed/expected value of a sequence
-        in_seq = in_seq.upper()
-        observed_cpg = len(re.findall("CG", in_seq)) * len(in_seq)
-        expected = (len(re.findall("[CG]", in_seq)) / 2) ** 2
-        expected = 1 if not expected else expected  # Prevent DivByZero
-        return observed_cpg / expected
-
-    def cg_percent(in_seq):  # Returns the CG % of a sequence
-        in_seq = in_seq.upper()
-        return len(re.findall("[CG]", in_seq)) / len(in_seq)
-
-    def find_islands(cg_percents, oe_values):  # Returns a list of tuples containing the start and end of an island
-        _indx = 0
-        out_list = []
-        while _indx < len(cg_percents):
-            if cg_percents[_indx] > .5 and oe_values[_indx] > .6:
-                start = _indx
-                while _indx < len(cg_percents) and cg_percents[_indx] > .5 and oe_values[_indx] > .6:
-                    _indx += 1
-                end = _indx
-                out_list.append((start, end))
-            _indx += 1
-        return out_list
+    cpgs = []
 
     def map_cpg(in_seq, island_ranges):  # Maps CpG islands onto a sequence as capital letters
         cpg_seq = in_seq.lower()
+        lower_seq = str(cpg_seq)
+        new_seq = []
+        last_end = 0
         for pair in island_ranges:
-            cpg_seq = cpg_seq[:pair[0]] + cpg_seq[pair[0]:pair[1] + 1].upper() + cpg_seq[pair[1] + 1:]
-        return cpg_seq
+            new_seq += [lower_seq[last_end:pair[0]], lower_seq[pair[0]:pair[1] + 1].upper()]
+            last_end = pair[1] + 1
+        new_seq.append(lower_seq[last_end:])
+        return Seq("".join(new_seq), alphabet=cpg_seq.alphabet)
 
     for rec in seqbuddy.records:
         seq = rec.seq
-
-        oe_vals_list = [0 for _ in range(len(seq))]
-        cg_percent_list = [0 for _ in range(len(seq))]
-        window_size = len(seq) if len(seq) < 200 else 200
-
-        for indx, window in enumerate([seq[i:i + window_size] for i in range(len(seq) - window_size + 1)]):
-            cpg = cpg_calc(str(window))
-            for i in range(window_size):
-                oe_vals_list[indx + i] += cpg
-
-            cg_perc = cg_percent(str(window))
-            for i in range(window_size):
-                cg_percent_list[indx + i] += cg_perc
-
-        for indx in range(len(oe_vals_list)):
-            if indx + 1 <= window_size:
-                oe_vals_list[indx] /= (indx + 1)
-                cg_percent_list[indx] /= (indx + 1)
-
-            elif (len(oe_vals_list) - window_size) - (indx + 1) < 0:
-                oe_vals_list[indx] /= (len(oe_vals_list) - indx)
-                cg_percent_list[indx] /= (len(cg_percent_list) - indx)
-
-            else:
-                oe_vals_list[indx] /= window_size
-                cg_percent_list[indx] /= window_size
-
-        indices = find_islands(cg_percent_list, oe_vals_list)
+        indices = _cpg_islands(seq, window_size, min_gc, min_oe)
         cpg_features = [SeqFeature(location=FeatureLocation(start, end), type="CpG_island",
                                    qualifiers={'created_by': 'SeqBuddy'}) for (start, end) in indices]
         for feature in rec.features:
@@ -1922,77 +3523,111 @@ def find_cpg(seqbuddy):
                         letter_annotations=rec.letter_annotations)
 
         records.append(rec)
-        _add_buddy_data(rec, "cpgs", indices)
+        cpgs.append(indices)
+    seqbuddy.results = _results(seqbuddy).relabel(records)
     seqbuddy.records = records
+    seqbuddy.results.add_column("cpgs", cpgs)
     return seqbuddy
 
 
-def find_pattern(seqbuddy, *patterns):  # TODO ambiguous letters mode
+def find_pattern(seqbuddy, *patterns, ambig=False, include_rc=False, workers=1):
     """
-    Finds ﻿occurrences of a sequence pattern
+    Finds ﻿occurrences of sequence patterns. All of the patterns are searched for in a single pass over each sequence,
+    so thousands of plain motifs (e.g., primers or micro-RNAs) can be run at once.
     :param seqbuddy: SeqBuddy object
-    :param patterns: regex patterns
-    :return: Annotated SeqBuddy object. The match indices are also stored in rec.buddy_data["find_patters"].
+    :param patterns: regex patterns and/or plain motifs
+    :param ambig: IUPAC ambiguity codes in plain motifs match any of the bases they stand for (nucleotides only)
+    :param include_rc: Also search the reverse complement strand. These hits are placed on the -1 strand.
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
+    :return: Annotated SeqBuddy object. The match indices are also stored in the 'find_patterns' column of
+    seqbuddy.results
     """
+    nucleotide = seqbuddy.alpha in [IUPAC.ambiguous_dna, IUPAC.unambiguous_dna,
+                                    IUPAC.ambiguous_rna, IUPAC.unambiguous_rna]
+    if include_rc and not nucleotide:
+        raise TypeError("Nucleic acid sequence required, not protein.")
+
+    if workers != 1:
+        return _parallel(seqbuddy, find_pattern, workers, *patterns, ambig=ambig, include_rc=include_rc)
+
     # search through sequences for regex matches. For example, to find micro-RNAs
-    lowercase(seqbuddy)
-    for pattern in patterns:
-        for rec in seqbuddy.records:
-            _add_buddy_data(rec, 'find_patterns')
-            indices = []
-            matches = re.finditer(pattern, str(rec.seq), flags=re.IGNORECASE)
-            new_seq = ""
-            last_match = 0
-            for match in matches:
-                indices.append(match.start())
-                rec.features.append(SeqFeature(location=FeatureLocation(start=match.start(), end=match.end()),
-                                               type='match', qualifiers={'regex': pattern, 'added_by': 'SeqBuddy'}))
-                if match.start() > 0:
-                    new_seq += str(rec.seq[last_match:match.start() - 1])
-                new_seq += str(rec.seq[match.start():match.end()]).upper()
-                last_match = match.end() + 1
-            new_seq += str(rec.seq[last_match:])
-            rec.seq = Seq(new_seq, alphabet=rec.seq.alphabet)
-
-            if not rec.buddy_data['find_patterns']:
-                rec.buddy_data['find_patterns'] = OrderedDict({pattern: indices})
-            else:
-                rec.buddy_data['find_patterns'][pattern] = indices
+    pattern_set = PatternSet(patterns, ambig=ambig and nucleotide, include_rc=include_rc,
+                             rna=seqbuddy.alpha in [IUPAC.ambiguous_rna, IUPAC.unambiguous_rna])
+    table = _results(seqbuddy)
+    column = table.columns.get("find_patterns", [None] * len(seqbuddy.records))
+    column = [OrderedDict() if rec_matches is None else OrderedDict(rec_matches) for rec_matches in column]
+    for rec, rec_matches in zip(seqbuddy.records, column):
+        seq = str(rec.seq)
+        hits = pattern_set.search(seq)
+
+        # Matches are uppercase, everything else is lowercase
+        upper = seq.upper()
+        case_mask = bytearray(seq.lower(), "ascii") if seq.isascii() else list(seq.lower())
+        upper = upper.encode() if type(case_mask) == bytearray else upper
+        for pattern, pattern_hits in zip(pattern_set.patterns, hits):
+            for start, end, strand in pattern_hits:
+                case_mask[start:end] = upper[start:end]
+                location = FeatureLocation(start=start, end=end, strand=-1 if strand == -1 else None)
+                rec.features.append(SeqFeature(location=location, type='match',
+                                               qualifiers={'regex': pattern, 'added_by': 'SeqBuddy'}))
+            rec_matches[pattern] = sorted(set([start for start, end, strand in pattern_hits]))
+        seq = case_mask.decode() if type(case_mask) == bytearray else "".join(case_mask)
+        rec.seq = Seq(seq, alphabet=rec.seq.alphabet)
+    table.add_column("find_patterns", column)
     return seqbuddy
 
 
-def find_repeats(seqbuddy):
+def find_repeats(seqbuddy, ignore_case=False, ignore_gaps=False, low_memory=False):
     """
-    Finds sequences with identical IDs or sequences
-    :param seqbuddy: SeqBuddy object
-    :return: modified seqbuddy object with three new attributes --> unique_seqs, repeat_ids, and repeat_seqs
+    Finds sequences with identical IDs or sequences, in a single pass over the records
+    :param seqbuddy: SeqBuddy object. A SeqBuddyStream can also be used, but its records will be consumed.
+    :param ignore_case: Treat sequences that only differ by case as repeats
+    :param ignore_gaps: Treat sequences that only differ by gaps as repeats
+    :param low_memory: Only hold on to the MD5 digest of each sequence, instead of a copy of each record
+    :return: modified seqbuddy object with four new attributes --> unique_seqs, repeat_ids, repeat_seqs, and
+    repeat_clusters. The first two map IDs to records (or digests if low_memory), repeat_seqs maps sequence digests
+    to the IDs that share them, and repeat_clusters maps the same digests to record indices (in order).
     """
     unique_seqs = OrderedDict()
     repeat_ids = OrderedDict()
     repeat_seqs = OrderedDict()
+    seq_clusters = OrderedDict()
+
+    def _digest(_value):
+        return _value if low_memory else str(_value.seq)
 
     # First find replicate IDs
-    # MD5 hash all sequences as we go for memory efficiency when looking for replicate sequences (below)
-    # Need to work from a copy though, so sequences aren't overwritten
-    seqbuddy_copy = make_copy(seqbuddy)
-    for rec in seqbuddy_copy.records:
-        seq = str(rec.seq).encode()
-        seq = md5(seq).hexdigest()
-        rec.seq = Seq(seq)
-        if rec.id in repeat_ids:
-            repeat_ids[rec.id].append(rec)
-        elif rec.id in unique_seqs:
-            repeat_ids[rec.id] = [rec]
-            repeat_ids[rec.id].append(unique_seqs[rec.id])
-            del (unique_seqs[rec.id])
+    # MD5 hash all sequences as we go for memory efficiency when looking for replicate sequences (below).
+    # The record copies share everything but the digest with the originals, so sequences aren't overwritten.
+    records = seqbuddy if type(seqbuddy) == SeqBuddyStream else seqbuddy.records
+    for indx, rec in enumerate(records):
+        seq = str(rec.seq)
+        seq = seq.upper() if ignore_case else seq
+        seq = seq.replace("-", "") if ignore_gaps else seq
+        seq = md5(seq.encode()).hexdigest()
+        seq_clusters.setdefault(seq, []).append(indx)
+        rec_id = rec.id
+        if low_memory:
+            rec = seq
+        else:
+            rec = _copy_record(rec)
+            rec.letter_annotations = {}
+            rec.seq = Seq(seq)
+
+        if rec_id in repeat_ids:
+            repeat_ids[rec_id].append(rec)
+        elif rec_id in unique_seqs:
+            repeat_ids[rec_id] = [rec]
+            repeat_ids[rec_id].append(unique_seqs[rec_id])
+            del (unique_seqs[rec_id])
         else:
-            unique_seqs[rec.id] = rec
+            unique_seqs[rec_id] = rec
 
     # Then look for replicate sequences
     flip_uniqe = {}
     del_keys = []
     for key, value in unique_seqs.items():  # find and remove duplicates in/from the unique list
-        value = str(value.seq)
+        value = _digest(value)
         if value not in flip_uniqe:
             flip_uniqe[value] = [key]
         else:
@@ -2003,7 +3638,7 @@ def find_repeats(seqbuddy):
                     del_keys.append(flip_uniqe[value][0])
             else:
                 repeat_seqs[value].append(key)
-            del_keys.append(unique_seqs[key].id)
+            del_keys.append(key)
 
     for key in del_keys:
         if key in unique_seqs:
@@ -2011,7 +3646,7 @@ def find_repeats(seqbuddy):
 
     for key, value in repeat_ids.items():  # find duplicates in the repeat ID list
         for rep_seq in value:
-            rep_seq = str(rep_seq.seq)
+            rep_seq = _digest(rep_seq)
             if rep_seq not in flip_uniqe:
                 flip_uniqe[rep_seq] = [key]
             else:
@@ -2025,78 +3660,93 @@ def find_repeats(seqbuddy):
     seqbuddy.unique_seqs = unique_seqs
     seqbuddy.repeat_ids = repeat_ids
     seqbuddy.repeat_seqs = repeat_seqs
+    seqbuddy.repeat_clusters = OrderedDict([(seq, indices) for seq, indices in seq_clusters.items()
+                                            if len(indices) > 1])
     return seqbuddy
 
 
 # ToDo: Make sure cut sites are not already in the features list
-def find_restriction_sites(seqbuddy, enzyme_group=(), min_cuts=1, max_cuts=None):
+def find_restriction_sites(seqbuddy, enzyme_group=(), min_cuts=1, max_cuts=None, features=True, workers=1):
     """
     Finds the restriction sites in the sequences in the SeqBuddy object
     :param seqbuddy: SeqBuddy object
     :param enzyme_group: "commercial", "all", or a list of specific enzyme names
     :param min_cuts: The minimum cut threshold
     :param max_cuts: The maximum cut threshold
-    :return: annotated SeqBuddy object, and a dictionary of restriction sites added as the `restriction_sites` attribute
+    :param features: Add a feature to the records for every cut. Set to False if only the table of sites is needed.
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
+    :return: annotated SeqBuddy object, and a list of restriction sites added as the `restriction_sites` attribute
+    (also the 'res_sites' column of seqbuddy.results)
     """
     if seqbuddy.alpha == IUPAC.protein:
         raise TypeError("Unable to identify restriction sites in protein sequences.")
     if max_cuts and min_cuts > max_cuts:
         raise ValueError("min_cuts parameter has been set higher than max_cuts.")
+    if workers != 1:
+        return _parallel(seqbuddy, find_restriction_sites, workers, enzyme_group=enzyme_group, min_cuts=min_cuts,
+                         max_cuts=max_cuts, features=features)
     max_cuts = 1000000000 if not max_cuts else max_cuts
 
     enzyme_group = list(enzyme_group) if enzyme_group else ["commercial"]
 
-    blacklist = ["AbaSI", "FspEI", "MspJI", "SgeI", "AspBHI", "SgrTI", "YkrI", "BmeDI"]  # highly nonspecific
-    blacklist += ["AjuI", "AlfI", "AloI", "ArsI", "BaeI", "BarI", "BcgI", "BdaI", "BplI", "BsaXI", "Bsp24I", "CjeI",
-                  "CjePI", "CspCI", "FalI", "Hin4I", "NgoAVIII", "NmeDI", "PpiI", "PsrI", "R2_BceSIV", "RdeGBIII",
-                  "SdeOSI", "TstI", "UcoMSI"]  # two-cutting
-    blacklist += ["AlwFI", "AvaIII", "BmgI", "BscGI", "BspGI", "BspNCI", "Cdi630V", "Cgl13032I", "Cgl13032II",
-                  "CjeFIII", "CjeFV", "CjeNII", "CjeP659IV", "CjuI", "CjuII", "DrdII", "EsaSSI", "FinI", "GauT27I",
-                  "HgiEII", "Hpy99XIII", "Hpy99XIV", "Jma19592I", "MjaIV", "MkaDII", "NhaXI", "PenI", "Pfl1108I",
-                  "RdeGBI", "RflFIII", "RlaI", "RpaTI", "SnaI", "Sno506I", "SpoDI", "TssI", "TsuI", "UbaF11I",
-                  "UbaF12I", "UbaF13I", "UbaF14I", "UbaF9I", "UbaPI"]  # non-cutters
-
     batch = RestrictionBatch([])
     for enzyme in enzyme_group:
-        if enzyme == "commercial":
-            for res in CommOnly:
-                if str(res) not in blacklist:
-                    batch.add(res)
-
-        elif enzyme == "all":
-            for res in AllEnzymes:
-                if str(res) not in blacklist:
-                    batch.add(res)
-
+        if enzyme in ["commercial", "all"]:
+            batch.update(_restriction_batch(enzyme))
         else:
             try:
                 batch.add(enzyme)
             except ValueError:
                 _stderr("Warning: %s not a known enzyme\n" % enzyme)
+    enzymes, pattern_set, site_enzymes, odd_enzymes = _restriction_scan(frozenset(batch))
 
     sites = []
     for rec in seqbuddy.records:
-        rec.res_sites = {}
-        analysis = Analysis(batch, rec.seq)
-        result = analysis.with_sites()
-        for key, value in result.items():
+        seq = str(rec.seq).upper()
+        if set(seq) <= set("ACGT"):
+            # One pass over the sequence for all of the recognition sites
+            result = {}
+            formatted_seq = FormattedSeq(Seq(seq), linear=True)
+            for site_hits, site_zymes in zip(pattern_set.search(seq), site_enzymes):
+                if not site_hits:
+                    continue
+                forward = [start + 1 for start, end, strand in site_hits if strand == 1]
+                reverse = [start + 1 for start, end, strand in site_hits if strand == -1]
+                for enzyme in site_zymes:
+                    cuts = _restriction_cuts(enzyme, formatted_seq, forward, reverse)
+                    if cuts:
+                        result[enzyme] = cuts
+            for enzyme in odd_enzymes:
+                cuts = enzyme.search(formatted_seq)
+                if cuts:
+                    result[enzyme] = cuts
+        else:
+            # Ambiguous residues can match the wildcards in some sites, so leave these to Bio.Restriction
+            result = Analysis(batch, rec.seq).with_sites()
+
+        res_sites = OrderedDict()
+        for key in enzymes:
+            if key not in result:
+                continue
+            value = result[key]
             if key.cut_twice():
                 _stderr("Warning: Double-cutters not supported.\n")
                 pass
             elif min_cuts <= len(value) <= max_cuts:
                 try:
-                    for zyme in value:
-                        cut_start = zyme + key.fst3 - 1
-                        cut_end = zyme + key.fst5 + abs(key.ovhg) - 1
-                        rec.features.append(SeqFeature(FeatureLocation(start=cut_start, end=cut_end), type=str(key)))
+                    cut_sites = [(zyme + key.fst3 - 1, zyme + key.fst5 + abs(key.ovhg) - 1) for zyme in value]
+                    if features:
+                        rec.features += [SeqFeature(FeatureLocation(start=cut_start, end=cut_end), type=str(key))
+                                         for cut_start, cut_end in cut_sites]
                 except TypeError:
                     _stderr("Warning: No-cutters not supported.\n")
                     pass
-                rec.res_sites[key] = value
-        rec.res_sites = OrderedDict(sorted(rec.res_sites.items(), key=lambda x: x[0]))
-        sites.append((rec.id, rec.res_sites))
-    order_features_alphabetically(seqbuddy)
+                res_sites[key] = value
+        sites.append((rec.id, res_sites))
+    if features:
+        order_features_alphabetically(seqbuddy)
     seqbuddy.restriction_sites = sites
+    _results(seqbuddy).add_column("res_sites", [rec_sites for rec_id, rec_sites in sites])
     return seqbuddy
 
 
@@ -2108,6 +3758,7 @@ def hash_ids(seqbuddy, hash_length=10):
     :return: The modified SeqBuddy object, with a new attribute `hash_map` added
     """
     hash_list = []
+    hash_set = set()
     seq_ids = []
 
     try:
@@ -2127,10 +3778,11 @@ def hash_ids(seqbuddy, hash_length=10):
         seq_ids.append(seqbuddy.records[i].id)
         while True:
             new_hash = "".join([choice(string.ascii_letters + string.digits) for _ in range(hash_length)])
-            if new_hash in hash_list:
+            if new_hash in hash_set:
                 continue
             else:
                 hash_list.append(new_hash)
+                hash_set.add(new_hash)
                 break
         if re.match(seqbuddy.records[i].id, seqbuddy.records[i].description):
             seqbuddy.records[i].description = seqbuddy.records[i].description[len(seqbuddy.records[i].id) + 1:]
@@ -2177,21 +3829,26 @@ def insert_sequence(seqbuddy, sequence, location=0, regexes=None):
     return seqbuddy
 
 
-def isoelectric_point(seqbuddy):
+def isoelectric_point(seqbuddy, workers=1):
     """
     Calculate the isoelectric points
     :param seqbuddy: SeqBuddy object
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
     :return: SeqBuddy object with isoelectric point appended to each record as the last feature in the feature list
+    (and to the 'isoelectric_point' column of seqbuddy.results)
     """
     if seqbuddy.alpha is not IUPAC.protein:
         raise TypeError("Protein sequence required, not nucleic acid.")
-    isoelectric_points = OrderedDict()
+    if workers != 1:
+        return _parallel(seqbuddy, isoelectric_point, workers)
+    isoelectric_points = array("d")
     for rec in seqbuddy.records:
         iso_point = ProteinAnalysis(str(rec.seq))
         iso_point = round(iso_point.isoelectric_point(), 10)
-        isoelectric_points[rec.id] = iso_point
+        isoelectric_points.append(iso_point)
         rec.features.append(SeqFeature(location=FeatureLocation(start=0, end=len(rec.seq)), type='pI',
                                        qualifiers={'value': iso_point}))
+    _results(seqbuddy).add_column("isoelectric_point", isoelectric_points)
     return seqbuddy
 
 
@@ -2201,6 +3858,8 @@ def lowercase(seqbuddy):
     :param seqbuddy: SeqBuddy object
     :return: The modified SeqBuddy object
     """
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(lowercase)
     for rec in seqbuddy.records:
         rec.seq = Seq(str(rec.seq).lower(), alphabet=rec.seq.alphabet)
     return seqbuddy
@@ -2256,11 +3915,11 @@ def make_groups(seqbuddy, split_patterns=(), num_chars=None, regex=None):
     if not recs_by_identifier["Unknown"]:
         del recs_by_identifier["Unknown"]
 
-    new_seqbuddies = [(identifier, make_copy(seqbuddy)) for identifier in recs_by_identifier]
-    for identifier, sb in new_seqbuddies:
-        sb.records = recs_by_identifier[identifier]
+    new_seqbuddies = []
+    for identifier, recs in recs_by_identifier.items():
+        sb = _shallow_copy(seqbuddy, recs)
         sb.identifier = identifier
-    new_seqbuddies = [sb for identifier, sb in new_seqbuddies]
+        new_seqbuddies.append(sb)
     return new_seqbuddies
 
 
@@ -2535,36 +4194,44 @@ def molecular_weight(seqbuddy):
         dna = True
     elif seqbuddy.alpha in [IUPAC.ambiguous_rna or IUPAC.unambiguous_rna]:
         aa_dict = deoxyribonucleotide_weights
+    masses_ss = array("d")
+    masses_ds = array("d")
     for rec in seqbuddy.records:
-        rec.mass_ds = 0
-        rec.mass_ss = 0
+        mass_ds = 0
+        mass_ss = 0
         if seqbuddy.alpha == IUPAC.protein:
-            rec.mass_ss += 18.02  # molecular weight of a water molecule
+            mass_ss += 18.02  # molecular weight of a water molecule
         else:
             if dna:
-                rec.mass_ss += 79.0  # molecular weight of 5' monophosphate in ssDNA
-                rec.mass_ds += 157.9  # molecular weight of the 5' triphosphate in dsDNA
+                mass_ss += 79.0  # molecular weight of 5' monophosphate in ssDNA
+                mass_ds += 157.9  # molecular weight of the 5' triphosphate in dsDNA
             else:
-                rec.mass_ss += 159.0  # molecular weight of a 5' triphosphate in ssRNA
-        for indx, value in enumerate(str(rec.seq).upper()):
-            rec.mass_ss += aa_dict[value]
-            if dna:
-                rec.mass_ds += aa_dict[value] + deoxynucleotide_weights[deoxynucleotide_compliments[value]]
-        output['masses_ss'].append(round(rec.mass_ss, 3))
+                mass_ss += 159.0  # molecular weight of a 5' triphosphate in ssRNA
+        counts = _composition(rec.seq)[0]
+        mass_ss += sum([aa_dict[res] * count for res, count in counts.items()])
+        if dna:
+            mass_ds += sum([(aa_dict[res] + deoxynucleotide_weights[deoxynucleotide_compliments[res]]) * count
+                            for res, count in counts.items()])
+        output['masses_ss'].append(round(mass_ss, 3))
+        masses_ss.append(mass_ss)
+        masses_ds.append(mass_ds)
 
         qualifiers = {}
         if seqbuddy.alpha == IUPAC.protein:
-            qualifiers["peptide_value"] = round(rec.mass_ss, 3)
+            qualifiers["peptide_value"] = round(mass_ss, 3)
         elif dna:
-            qualifiers["ssDNA_value"] = round(rec.mass_ss, 3)
-            qualifiers["dsDNA_value"] = round(rec.mass_ds, 3)
-            output['masses_ds'].append(round(rec.mass_ds, 3))
+            qualifiers["ssDNA_value"] = round(mass_ss, 3)
+            qualifiers["dsDNA_value"] = round(mass_ds, 3)
+            output['masses_ds'].append(round(mass_ds, 3))
         elif seqbuddy.alpha in [IUPAC.ambiguous_rna or IUPAC.unambiguous_rna]:
-            qualifiers["ssRNA_value"] = round(rec.mass_ss, 3)
+            qualifiers["ssRNA_value"] = round(mass_ss, 3)
         output['ids'].append(rec.id)
         mw_feature = SeqFeature(location=FeatureLocation(start=1, end=len(rec.seq)), type='mw', qualifiers=qualifiers)
         rec.features.append(mw_feature)
     seqbuddy.molecular_weights = output
+    table = _results(seqbuddy)
+    table.add_column("mass_ss", masses_ss)
+    table.add_column("mass_ds", masses_ds)
     return seqbuddy
 
 
@@ -2574,6 +4241,8 @@ def num_seqs(seqbuddy):
     :param seqbuddy: SeqBuddy object
     :return: The int number of sequences
     """
+    if type(seqbuddy) == SeqIndex:
+        return len(seqbuddy)
     return len(seqbuddy.records)
 
 
@@ -2609,92 +4278,90 @@ def order_features_by_position(seqbuddy, reverse=False):
 
 def order_ids(seqbuddy, reverse=False):
     """
-    Sorts the sequences by ID, alphabetically
-    :param seqbuddy: SeqBuddy object
+    Sorts the sequences by ID, alpha-numerically (i.e., numbers are sorted by value, so 'Seq2' comes before 'Seq10')
+    :param seqbuddy: SeqBuddy object (or SeqBuddyStream, see order_recs())
     :param reverse: Reverses the sequence order
     :return: The sorted SeqBuddy object
     """
-    def process_current_group(_group):
-        if _group:
-            _group = [(int(re.search("[0-9]+", x.id).group(0)), x) for x in _group]
-            _group = sorted(_group, key=lambda l: l[0], reverse=reverse)
-            _group = [x[1] for x in _group]
-        return _group
-
-    # Do an initial sort
-    records = [(_rec.id, _rec) for _rec in seqbuddy.records]
-    records = sorted(records, key=lambda x: x[0], reverse=reverse)
-    records = [rec[1] for rec in records]
-
-    # Now take into account numeric-order
-    new_order = []
-    current_group = []
-    for rec in records:
-        if re.search("[0-9]", rec.id):
-            if current_group and re.match("([^0-9]*)", rec.id).group(0) != re.match("([^0-9]*)",
-                                                                                    current_group[-1].id).group(0):
-                new_order += process_current_group(current_group)
-                current_group = []
-            current_group.append(rec)
-        else:
-            new_order += process_current_group(current_group)
-            current_group = []
-            new_order.append(rec)
-    new_order += process_current_group(current_group)
-    seqbuddy.records = new_order
+    return order_recs(seqbuddy, "id", reverse=reverse)
+
+
+def order_recs(seqbuddy, sort_by="id", reverse=False, regex=None, chunk_size=100000):
+    """
+    Sorts the sequences by id, length, sequence hash, number of features, or a regex capture from the id
+    :param seqbuddy: SeqBuddy object. A SeqBuddyStream is sorted with an external merge sort instead, so no more than
+    chunk_size records are ever held in memory, and a new SeqBuddyStream of the sorted records is returned.
+    :param sort_by: One of SORT_MODES ('id', 'length', 'hash', 'features', or 'regex')
+    :param reverse: Reverses the sequence order
+    :param regex: Pattern used by the 'regex' mode (see _order_key())
+    :param chunk_size: Number of records sorted in memory at a time, when sorting a SeqBuddyStream
+    :return: The sorted SeqBuddy object
+    """
+    key = _order_key(sort_by, regex)
+    if type(seqbuddy) == SeqBuddyStream:
+        return SeqBuddyStream(_external_sort(seqbuddy, key, reverse, chunk_size), seqbuddy.in_format,
+                              seqbuddy.out_format, seqbuddy.alpha)
+
+    seqbuddy.records = sorted(seqbuddy.records, key=key, reverse=reverse)
     return seqbuddy
 
 
-def order_ids_randomly(seqbuddy):
+def order_ids_randomly(seqbuddy, seed=None):
     """
     Reorders seqbuddy.records. The order will always be changed if more than 2 recs are fed in.
     :param seqbuddy: SeqBuddy object
+    :param seed: Seed the random number generator, for a reproducible order
     :return: The reordered SeqBuddy object
     """
-    if len(seqbuddy.records) < 2:
-        return seqbuddy
-    elif len(seqbuddy.records) == 2:
-        seqbuddy.records.reverse()
+    # Records with the same id and sequence are interchangeable, so only a change in the order of these labels counts
+    labels = {}
+    labels = [labels.setdefault("%s%s" % (rec.id, rec.seq), len(labels)) for rec in seqbuddy.records]
+    if len(set(labels)) < 2:
         return seqbuddy
 
-    # make sure that every record isn't identical
-    differences = False
-    for indx, rec in enumerate(seqbuddy.records[1:]):
-        if "%s%s" % (rec.id, rec.seq) != "%s%s" % (seqbuddy.records[indx - 1].id, seqbuddy.records[indx - 1].seq):
-            differences = True
-            break
-
-    if not differences:
-        return seqbuddy
-
-    output = []
+    rng = _rng(seed)
+    order = list(range(len(labels)))
     valve = MyFuncs.SafetyValve(global_reps=1000)
     while valve.step("order_ids_randomly() was unable to reorder your sequences. This shouldn't happen, so please"
                      "contact the developers to let then know about this error."):
-        sb_copy = make_copy(seqbuddy)
-        for _ in range(len(sb_copy.records)):
-            random_index = randint(1, len(sb_copy.records)) - 1
-            output.append(sb_copy.records.pop(random_index))
-        if ["%s%s" % (rec.id, rec.seq) for rec in seqbuddy.records] != ["%s%s" % (rec.id, rec.seq) for rec in output]:
+        rng.shuffle(order)
+        if [labels[indx] for indx in order] != labels:
             break
-        output = []
 
-    seqbuddy.records = output
+    seqbuddy.records = [seqbuddy.records[indx] for indx in order]
     return seqbuddy
 
 
-def pull_random_recs(seqbuddy, count=1):
+def pull_random_recs(seqbuddy, count=1, replace=False, seed=None):
     """
-    Return a random record or subset of records (without replacement)
-    :param seqbuddy: SeqBuddy object
+    Return a random record or subset of records
+    :param seqbuddy: SeqBuddy object. SeqIndex and SeqBuddyStream objects are sampled without loading every record;
+    a stream is read once, keeping no more than count records in memory.
     :param count: The number of random records to pull (int)
-    :return: The original SeqBuddy object with only the selected records remaining
+    :param replace: Sample with replacement, so records can be pulled more than once (e.g., for bootstrapping)
+    :param seed: Seed the random number generator, for a reproducible sample
+    :return: The original SeqBuddy object with only the selected records remaining (a new SeqBuddy object if a
+    SeqIndex or SeqBuddyStream was passed in)
     """
-    count = abs(count) if abs(count) <= len(seqbuddy.records) else len(seqbuddy.records)
-    random_recs = []
-    for _ in range(count):
-        rand_index = randint(0, len(seqbuddy.records) - 1)
-        random_recs.append(seqbuddy.records.pop(rand_index))
+    rng = _rng(seed)
+    count = abs(count)
+    if type(seqbuddy) == SeqIndex:
+        return seqbuddy.sample(count, replace=replace, seed=rng)
+
+    if type(seqbuddy) == SeqBuddyStream:
+        random_recs = _reservoir_sample(seqbuddy, count, rng, replace)
+        seqbuddy = SeqBuddy(random_recs, seqbuddy.in_format, seqbuddy.out_format, seqbuddy.alpha)
+    elif replace:
+        random_recs = rng.choices(seqbuddy.records, k=count) if seqbuddy.records else []
+    else:
+        random_recs = rng.sample(seqbuddy.records, min(count, len(seqbuddy.records)))
+
+    if replace:  # Repeat picks get their own copy of the record, so they can be modified independently
+        pulled = set()
+        for indx, rec in enumerate(random_recs):
+            if id(rec) in pulled:
+                random_recs[indx] = _copy_record(rec)
+            pulled.add(id(rec))
     seqbuddy.records = random_recs
     return seqbuddy
 
@@ -2724,40 +4391,62 @@ def pull_record_ends(seqbuddy, amount):
     return seqbuddy
 
 
-def pull_recs(seqbuddy, regex, description=False):
+def pull_recs(seqbuddy, regex, description=False, id_files=None):
     """
     Retrieves sequences with names/IDs matching a search pattern
     :param seqbuddy: SeqBuddy object
-    :param regex: List of regex expressions or single regex
+    :param regex: List of regex expressions or single regex (or a br.PatternFilter object)
     :param description: Allow search in description string
+    :param id_files: Path, or list of paths, to files of exact IDs to pull (one per line)
     :return: The modified SeqBuddy object
     """
-    if type(regex) == str:
-        regex = [regex]
-    for indx, pattern in enumerate(regex):
-        regex[indx] = ".*" if pattern == "*" else pattern
+    regex = regex if type(regex) == br.PatternFilter else br.PatternFilter(regex, id_files)
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(pull_recs, regex, description)
+
+    if type(seqbuddy) == SeqIndex:
+        # Only FASTA and FASTQ records are guaranteed to have rec.name == rec.id
+        if description or seqbuddy.in_format in ["genbank", "gb"]:
+            seqbuddy = seqbuddy.to_seqbuddy()
+        else:
+            return seqbuddy.to_seqbuddy([indx for indx, rec_id in enumerate(seqbuddy.ids) if regex.search(rec_id)])
 
-    regex = "|".join(regex)
     matched_records = []
     for rec in seqbuddy.records:
-        if re.search(regex, rec.id) or re.search(regex, rec.name) \
-                or (description and re.search(regex, rec.description)):
+        if regex.search(rec.id, rec.name) or (description and regex.search(rec.description)):
             matched_records.append(rec)
     seqbuddy.records = matched_records
     return seqbuddy
 
 
-def purge(seqbuddy, threshold):
+def purge(seqbuddy, threshold, greedy=False, kmer_size=None, min_shared=.05):
     """
     Deletes highly similar sequences
     ToDo: Implement a way to return a certain # of seqs (i.e. auto-determine threshold)
         - This would probably be a different flag in the UI
     :param seqbuddy: SeqBuddy object
-    :param threshold: Sets the similarity threshold
-    :return: The purged SeqBuddy object
+    :param threshold: Sets the similarity threshold (BLAST bit score)
+    :param greedy: Cluster CD-HIT style, keeping the longest sequence of each cluster, instead of running a full bl2seq
+    :param kmer_size: Word size of the greedy mode k-mer prefilter
+    :param min_shared: Fraction of k-mers that must be shared before two sequences are BLASTed in greedy mode
+    :return: The purged SeqBuddy object. The ids removed in favour of each record are in the 'purge_set' column of
+    seqbuddy.results
     """
+    if greedy:
+        make_ids_unique(seqbuddy, sep="-")
+        clusters = _purge_greedy(seqbuddy, threshold, kmer_size, min_shared)
+        new_records = []
+        purge_sets = []
+        for indx, rec in enumerate(seqbuddy.records):
+            if indx in clusters:
+                purge_sets.append([seqbuddy.records[member].id for member in clusters[indx]])
+                new_records.append(rec)
+        seqbuddy.records = new_records
+        _results(seqbuddy).add_column("purge_set", purge_sets)
+        return seqbuddy
+
     keep_dict = {}
-    purged = []
+    purged = set()
     for query_id, match_list in bl2seq(seqbuddy).items():
         if query_id in purged:
             continue
@@ -2767,15 +4456,17 @@ def purge(seqbuddy, threshold):
                 ident, length, evalue, bit_score = match_list[subj_id]
 
                 if bit_score >= threshold:
-                    purged.append(subj_id)
+                    purged.add(subj_id)
                     keep_dict[query_id].append(subj_id)
     new_records = []
+    purge_sets = []
     for rec in seqbuddy.records:
         if rec.id in keep_dict:
-            _add_buddy_data(rec, "purge_set", keep_dict[rec.id])
+            purge_sets.append(keep_dict[rec.id])
             new_records.append(rec)
 
     seqbuddy.records = new_records
+    _results(seqbuddy).add_column("purge_set", purge_sets)
     return seqbuddy
 
 
@@ -2790,6 +4481,8 @@ def rename(seqbuddy, query, replace="", num=0, store_old_id=False):
     :return: The modified SeqBuddy object
     """
     replace = re.sub("\s+", "_", replace)  # Do not allow any whitespace in IDs
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(rename, query, replace, num, store_old_id)
     for rec in seqbuddy.records:
         new_name = br.replacements(rec.id, query, replace, num)
         if re.match(rec.id, rec.description):
@@ -2827,6 +4520,8 @@ def reverse_complement(seqbuddy):
     """
     if seqbuddy.alpha == IUPAC.protein:
         raise TypeError("SeqBuddy object is protein. Nucleic acid sequences required.")
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(reverse_complement)
     for rec in seqbuddy.records:
         try:
             rec.seq = rec.seq.reverse_complement()
@@ -2849,6 +4544,10 @@ def rna2dna(seqbuddy):
     """
     if seqbuddy.alpha != IUPAC.ambiguous_rna:
         raise TypeError("RNA sequence required, not %s." % seqbuddy.alpha)
+    if type(seqbuddy) == SeqBuddyStream:
+        seqbuddy.pipe(rna2dna)
+        seqbuddy.alpha = IUPAC.ambiguous_dna
+        return seqbuddy
     for rec in seqbuddy.records:
         rec.seq = Seq(str(rec.seq.back_transcribe()), alphabet=IUPAC.ambiguous_dna)
     seqbuddy.alpha = IUPAC.ambiguous_dna
@@ -2894,7 +4593,9 @@ def select_frame(seqbuddy, frame, add_metadata=True):
         if check_description:
             rec = reset_frame(rec, check_description.group(1))
 
-        rec.features = br.shift_features(rec.features, (frame - 1) * -1, len(rec.seq))
+        if rec.features:
+            keep = bytearray(min(frame - 1, len(rec.seq))) + b"\x01" * max(len(rec.seq) - frame + 1, 0)
+            FeatureReMapper(rec, keep).remap_features(rec)
         if frame in [2, 3] and add_metadata:
             residues = str(rec.seq)[:frame - 1]
             rec.annotations["frame_shift"] = residues
@@ -2903,84 +4604,141 @@ def select_frame(seqbuddy, frame, add_metadata=True):
     return seqbuddy
 
 
-def shuffle_seqs(seqbuddy):
+def shuffle_seqs(seqbuddy, seed=None):
     """
     Randomly reorder the residues in each sequence
     :param seqbuddy: SeqBuddy object
+    :param seed: Seed the random number generator, for reproducible shuffles
     :return: The shuffled SeqBuddy object
     """
+    rng = _rng(seed)
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(shuffle_seqs, rng)
+
     for rec in seqbuddy.records:
-        tokens = []
-        for letter in rec.seq:
-            tokens.append(letter)
-        new_seq = ''
-        while len(tokens) > 0:
-            rand_indx = randint(0, len(tokens) - 1)
-            new_seq += tokens.pop(rand_indx)
+        new_seq = str(rec.seq)
+        try:  # Fisher-Yates in place, over single bytes where possible
+            residues = bytearray(new_seq, "ascii")
+            rng.shuffle(residues)
+            new_seq = residues.decode()
+        except UnicodeEncodeError:
+            residues = list(new_seq)
+            rng.shuffle(residues)
+            new_seq = "".join(residues)
         rec.seq = Seq(data=new_seq, alphabet=seqbuddy.alpha)
     return seqbuddy
 
 
-def translate6frames(seqbuddy):
+def sim_ident(seqbuddy, kmer_size=None, sketch_size=1000, workers=1):
+    """
+    Alignment-free estimate of pairwise similarity and identity among all sequences, from MinHash sketches of their
+    k-mer content. No external binaries are needed, so this is a lot faster than BLAST for big all-by-all comparisons.
+    :param seqbuddy: SeqBuddy object
+    :param kmer_size: Defaults to 12 for nucleotide and 5 for protein
+    :param sketch_size: Number of hashes kept per sequence. Shorter sequences are compared on their full k-mer profile
+    :param workers: Number of processes to spread the comparisons over (0 for all usable cores)
+    :return: SimilarityMatrix object
+    """
+    if kmer_size is not None and kmer_size < 1:
+        raise ValueError("kmer_size must be at least 1, not %s." % kmer_size)
+    if sketch_size < 1:
+        raise ValueError("sketch_size must be at least 1, not %s." % sketch_size)
+
+    if kmer_size is None:
+        kmer_size = 5 if seqbuddy.alpha == IUPAC.protein else 12
+    sketches = _kmer_sketches([str(rec.seq) for rec in seqbuddy.records], seqbuddy.alpha, kmer_size, sketch_size)
+
+    jaccard = array("f")
+    if workers != 1 and len(sketches) > 2:
+        rows = MyFuncs.run_multicore_function(list(range(len(sketches) - 1)), _sim_ident_row, [sketches],
+                                              max_processes=workers, quiet=True)
+        failed = [seqbuddy.records[indx].id for indx, row in enumerate(rows) if row is None]
+        if failed:  # run_multicore_function() hands back None for any job that raised
+            raise RuntimeError("sim_ident() failed to compare %s record(s) against the rest (%s). See the traceback(s) "
+                               "above for details." % (len(failed), ", ".join(failed)))
+    else:
+        rows = [_sim_ident_row(indx, [sketches]) for indx in range(len(sketches) - 1)]
+    for row in rows:
+        jaccard.extend(row)
+    return SimilarityMatrix([rec.id for rec in seqbuddy.records], jaccard, kmer_size)
+
+
+def translate6frames(seqbuddy, table=1):
     """
     Translates a nucleotide sequence into a protein sequence across all six reading frames.
     :param seqbuddy: SeqBuddy object
+    :param table: NCBI translation table id
     :return: The translated SeqBuddy object
     """
-    frame1, frame2, frame3 = make_copy(seqbuddy), make_copy(seqbuddy), make_copy(seqbuddy)
-    seqbuddy = reverse_complement(seqbuddy)
+    if seqbuddy.alpha == IUPAC.protein:
+        raise TypeError("SeqBuddy object is protein. Nucleic acid sequences required.")
 
-    rframe1, rframe2, rframe3 = make_copy(seqbuddy), make_copy(seqbuddy), make_copy(seqbuddy)
+    if type(seqbuddy) == SeqBuddyStream:
+        seqbuddy.pipe(translate6frames, table=table)
+        seqbuddy.alpha = IUPAC.protein
+        return seqbuddy
 
-    frame2 = select_frame(frame2, 2, add_metadata=False)
-    frame3 = select_frame(frame3, 3, add_metadata=False)
-    rframe2 = select_frame(rframe2, 2, add_metadata=False)
-    rframe3 = select_frame(rframe3, 3, add_metadata=False)
+    lookup = _codon_lookup(table)
+    output = []
+    if any([rec.features or re.search("\(frame[23][A-Za-z]{1,2}\)", rec.description) for rec in seqbuddy.records]):
+        # Features need to be shifted and remapped frame by frame
+        frame1, frame2, frame3 = _shallow_copy(seqbuddy), _shallow_copy(seqbuddy), _shallow_copy(seqbuddy)
+        reverse_complement(seqbuddy)
+        rframe1, rframe2, rframe3 = _shallow_copy(seqbuddy), _shallow_copy(seqbuddy), _shallow_copy(seqbuddy)
 
-    frame1 = translate_cds(frame1, quiet=True)
-    frame2 = translate_cds(frame2, quiet=True)
-    frame3 = translate_cds(frame3, quiet=True)
-    rframe1 = translate_cds(rframe1, quiet=True)
-    rframe2 = translate_cds(rframe2, quiet=True)
-    rframe3 = translate_cds(rframe3, quiet=True)
+        frames = [frame1, select_frame(frame2, 2, add_metadata=False), select_frame(frame3, 3, add_metadata=False),
+                  rframe1, select_frame(rframe2, 2, add_metadata=False), select_frame(rframe3, 3, add_metadata=False)]
+        frames = [translate_cds(frame, quiet=True, table=table) for frame in frames]
 
-    output = []
-    for i in range(len(frame1.records)):
-        frame1.records[i].id = "%s_f1" % frame1.records[i].id
-        frame2.records[i].id = "%s_f2" % frame2.records[i].id
-        frame3.records[i].id = "%s_f3" % frame3.records[i].id
-        rframe1.records[i].id = "%s_rf1" % rframe1.records[i].id
-        rframe2.records[i].id = "%s_rf2" % rframe2.records[i].id
-        rframe3.records[i].id = "%s_rf3" % rframe3.records[i].id
+        for recs in zip(*[frame.records for frame in frames]):
+            for rec, suffix in zip(recs, ["f1", "f2", "f3", "rf1", "rf2", "rf3"]):
+                rec.id = "%s_%s" % (rec.id, suffix)
+            output += list(recs)
 
-        output += [frame1.records[i], frame2.records[i], frame3.records[i],
-                   rframe1.records[i], rframe2.records[i], rframe3.records[i]]
+    else:
+        nucl_chars = "ATGCURYWSMKHBVDNXatgcurywsmkhbvdnx"
+        for rec in seqbuddy.records:
+            if rec.seq.alphabet == IUPAC.protein:
+                raise TypeError("Record '%s' is protein. Nucleic acid sequences required." % rec.id)
+            raw_seq = str(rec.seq)
+            seq = re.sub("[^%s]" % nucl_chars, "", raw_seq).upper()
+            forward = _translate(seq, lookup, 3)
+            reverse = _translate(seq.translate(NUCL_COMPLEMENTS)[::-1], lookup, 3)
+            # Frames are selected before the sequence is cleaned, so leading non-sequence characters eat into the shift
+            prot_seqs = [forward[len(re.findall("[%s]" % nucl_chars, raw_seq[:shift]))] for shift in range(3)]
+            prot_seqs += [reverse[len(re.findall("[%s]" % nucl_chars, raw_seq[::-1][:shift]))] for shift in range(3)]
+            for prot_seq, suffix in zip(prot_seqs, ["f1", "f2", "f3", "rf1", "rf2", "rf3"]):
+                new_rec = _copy_record(rec)
+                new_rec.seq = Seq(prot_seq, alphabet=IUPAC.protein)
+                new_rec.id = "%s_%s" % (rec.id, suffix)
+                output.append(new_rec)
 
     seqbuddy = SeqBuddy(output, out_format=seqbuddy.out_format)
     return seqbuddy
 
 
-def translate_cds(seqbuddy, quiet=False, alignment=False):
+def translate_cds(seqbuddy, quiet=False, alignment=False, table=1, workers=1):
     """
     Translates a nucleotide sequence into a protein sequence.
     :param seqbuddy: SeqBuddy object
     :param quiet: Suppress the errors thrown by translate(cds=True)
     :param alignment: If the incoming sequence has gaps you want maintained, set to True. Otherwise they will be cleaned
+    :param table: NCBI translation table id
+    :param workers: Number of processes to spread the records over (0 for all usable cores)
     :return: The translated SeqBuddy object
     """
     if seqbuddy.alpha == IUPAC.protein:
         raise TypeError("Protein sequence cannot be translated.")
 
-    codon_dict = {'---': '-', '--A': '-', '--C': '-', '--G': '-', '--T': '-', '-A-': '-', '-C-': '-', '-G-': '-',
-                  '-T-': '-', 'A--': '-', 'AAA': 'K', 'AAC': 'N', 'AAG': 'K', 'AAT': 'N', 'ACA': 'T', 'ACC': 'T',
-                  'ACG': 'T', 'ACT': 'T', 'AGA': 'R', 'AGC': 'S', 'AGG': 'R', 'AGT': 'S', 'ATA': 'I', 'ATC': 'I',
-                  'ATG': 'M', 'ATT': 'I', 'C--': '-', 'CAA': 'Q', 'CAC': 'H', 'CAG': 'Q', 'CAT': 'H', 'CCA': 'P',
-                  'CCC': 'P', 'CCG': 'P', 'CCT': 'P', 'CGA': 'R', 'CGC': 'R', 'CGG': 'R', 'CGT': 'R', 'CTA': 'L',
-                  'CTC': 'L', 'CTG': 'L', 'CTT': 'L', 'G--': '-', 'GAA': 'E', 'GAC': 'D', 'GAG': 'E', 'GAT': 'D',
-                  'GCA': 'A', 'GCC': 'A', 'GCG': 'A', 'GCT': 'A', 'GGA': 'G', 'GGC': 'G', 'GGG': 'G', 'GGT': 'G',
-                  'GTA': 'V', 'GTC': 'V', 'GTG': 'V', 'GTT': 'V', 'T--': '-', 'TAA': '*', 'TAC': 'Y', 'TAG': '*',
-                  'TAT': 'Y', 'TCA': 'S', 'TCC': 'S', 'TCG': 'S', 'TCT': 'S', 'TGA': '*', 'TGC': 'C', 'TGG': 'W',
-                  'TGT': 'C', 'TTA': 'L', 'TTC': 'F', 'TTG': 'L', 'TTT': 'F'}
+    if type(seqbuddy) == SeqBuddyStream:
+        seqbuddy.pipe(translate_cds, quiet=quiet, alignment=alignment, table=table)
+        seqbuddy.alpha = IUPAC.protein
+        return seqbuddy
+
+    if workers != 1:
+        return _parallel(seqbuddy, translate_cds, workers, quiet=quiet, alignment=alignment, table=table)
+
+    lookup = _codon_lookup(table)
 
     if not alignment:
         clean_seq(seqbuddy)
@@ -2988,25 +4746,24 @@ def translate_cds(seqbuddy, quiet=False, alignment=False):
     if seqbuddy.alpha == IUPAC.ambiguous_rna:
         rna2dna(seqbuddy)
 
-    translated_sb = make_copy(seqbuddy)
-    uppercase(translated_sb)
+    translated_sb = _shallow_copy(seqbuddy)
     for rec in translated_sb.records:
         if rec.seq.alphabet == IUPAC.protein:
             raise TypeError("Record %s is protein." % rec.id)
-
-        new_seq = ""
-        old_seq = str(rec.seq)
-        for codon in [old_seq[::1][i:i + 3][::1] for i in range(0, len(old_seq), 3)][::1]:
-            if len(codon) == 3:
-                if codon in codon_dict:
-                    new_seq += codon_dict[codon]
-                else:
-                    new_seq += "N"
-        new_seq = Seq(new_seq, IUPAC.protein)
-        rec.seq = new_seq
+        rec.seq = Seq(_translate(str(rec.seq).upper(), lookup)[0], IUPAC.protein)
         rec.features = []
 
-    map_features_nucl2prot(seqbuddy, translated_sb, mode="list", quiet=quiet)
+    if any([rec.features for rec in seqbuddy.records]):
+        map_features_nucl2prot(seqbuddy, translated_sb, mode="list", quiet=quiet)
+    else:
+        # Nothing to remap, so just run the same length sanity check that map_features_nucl2prot() would
+        for nucl_rec, prot_rec in zip(seqbuddy.records, translated_sb.records):
+            nucl_len = len(re.sub("[^ATGCURYWSMKHBVDNXatgcurywsmkhbvdnx]", "", str(nucl_rec.seq)))
+            prot_len = len(prot_rec.seq) - prot_rec.seq.count("-")
+            if prot_len * 3 not in [nucl_len, nucl_len - 3]:
+                _stderr("Warning: size mismatch between aa and nucl seqs for %s --> %s, %s\n" %
+                        (nucl_rec.id, nucl_len, prot_len), quiet)
+
     for indx, rec in enumerate(translated_sb.records):
         seqbuddy.records[indx] = rec
     seqbuddy.alpha = IUPAC.protein
@@ -3019,6 +4776,8 @@ def uppercase(seqbuddy):
     :param seqbuddy: SeqBuddy object
     :return: The modified SeqBuddy object
     """
+    if type(seqbuddy) == SeqBuddyStream:
+        return seqbuddy.pipe(uppercase)
     for rec in seqbuddy.records:
         rec.seq = Seq(str(rec.seq).upper(), alphabet=rec.seq.alphabet)
     return seqbuddy
@@ -3035,7 +4794,7 @@ def argparse_init():
             extra_args = None
             for indx, param in enumerate(sys.argv[sb_flag_indx + 1:]):
                 if param in ["-a", "--alpha", "-f", "--in_format", "-i", "--in_place", "-k", "--keep_temp", "-o", "--out_format",
-                             "-q", "--quiet", "-t", "--test"]:
+                             "-q", "--quiet", "-s", "--stream", "-t", "--test"]:
                     extra_args = sb_flag_indx + 1 + indx
                     break
 
@@ -3079,15 +4838,43 @@ def argparse_init():
     if in_args.guess_alphabet or in_args.guess_format:
         return in_args, SeqBuddy
 
+    # Records can be pulled out of large files through a byte offset index, instead of parsing everything
+    tools = [flag for flag in br.sb_flags if getattr(in_args, flag, None)]
+    if len(in_args.sequence) == 1 and type(in_args.sequence[0]) == str and os.path.isfile(in_args.sequence[0]) \
+            and not in_args.stream and tools and not [flag for flag in tools if flag not in INDEX_TOOLS] \
+            and (in_args.index or os.path.isfile("%s.sbi" % in_args.sequence[0])):
+        try:
+            seqbuddy = SeqIndex(in_args.sequence[0], in_args.in_format, in_args.out_format, in_args.alpha)
+            return in_args, seqbuddy
+        except (TypeError, br.GuessError):
+            pass  # Not an indexable format, so fall back on the full parse below
+
+    # Same idea for tools that only need ids and sequences; plain FASTA files can skip SeqRecord construction
+    if len(in_args.sequence) == 1 and type(in_args.sequence[0]) == str and os.path.isfile(in_args.sequence[0]) \
+            and not in_args.stream and tools and not [flag for flag in tools if flag not in LITE_TOOLS] \
+            and not (in_args.ave_seq_length and in_args.ave_seq_length[0]) \
+            and not (in_args.count_residues and in_args.count_residues[0]) \
+            and (in_args.in_format if in_args.in_format else _guess_format(in_args.sequence[0])) == "fasta":
+        seqbuddy = _lite_seqbuddy(_read_fasta_lite(in_args.sequence[0]), in_args.out_format, in_args.alpha)
+        return in_args, seqbuddy
+
     try:
         for seq_set in in_args.sequence:
             if isinstance(seq_set, TextIOWrapper) and seq_set.buffer.raw.isatty():
                 _stderr("Warning: No input detected. Process will be aborted.")
                 sys.exit()
+            if in_args.stream:
+                seqbuddy.append(SeqBuddyStream(seq_set, in_args.in_format, in_args.out_format, in_args.alpha))
+                continue
             seq_set = SeqBuddy(seq_set, in_args.in_format, in_args.out_format, in_args.alpha)
             seqbuddy += seq_set.records
 
-        seqbuddy = SeqBuddy(seqbuddy, seq_set.in_format, seq_set.out_format, seq_set.alpha)
+        if in_args.stream:
+            seq_set = seqbuddy[-1]
+            seqbuddy = seq_set if len(seqbuddy) == 1 else SeqBuddyStream(chain(*seqbuddy), seq_set.in_format,
+                                                                          seq_set.out_format, seq_set.alpha)
+        else:
+            seqbuddy = SeqBuddy(seqbuddy, seq_set.in_format, seq_set.out_format, seq_set.alpha)
     except br.GuessError as e:
         _stderr("GuessError: %s\n" % e, in_args.quiet)
         sys.exit()
@@ -3098,15 +4885,49 @@ def argparse_init():
 def command_line_ui(in_args, seqbuddy, skip_exit=False):
     # ############################################# INTERNAL FUNCTION ################################################ #
     def _print_recs(_seqbuddy):
-        if in_args.test:
+        if type(_seqbuddy) == SeqBuddyStream:
+            _stream_recs(_seqbuddy)
+
+        elif in_args.test:
             _stderr("*** Test passed ***\n", in_args.quiet)
             pass
 
         elif in_args.in_place:
+            # Render to a string first, so the input file is left intact if something goes wrong
             _in_place(str(_seqbuddy), in_args.sequence[0])
 
         else:
-            _stdout("{0}\n".format(str(_seqbuddy).rstrip()))
+            try:
+                _seqbuddy.write(sys.stdout)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                br.broken_pipe()
+
+    def _stream_recs(_stream):
+        if in_args.test:
+            for _ in _stream:
+                pass
+            _stderr("*** Test passed ***\n", in_args.quiet)
+
+        elif in_args.in_place and os.path.exists(in_args.sequence[0]):
+            # The input file is still being read from, so only over-write it once the stream is exhausted
+            tmp_file = MyFuncs.TempFile()
+            _stream.write(tmp_file.path)
+            shutil.copyfile(tmp_file.path, os.path.abspath(in_args.sequence[0]))
+            _stderr("File over-written at:\n%s\n" % os.path.abspath(in_args.sequence[0]), in_args.quiet)
+
+        elif in_args.in_place:
+            _stderr("Warning: The -i flag was passed in, but the positional argument doesn't seem to be a "
+                    "file. Nothing was written.\n", in_args.quiet)
+            _stream.write(sys.stderr)
+
+        else:
+            try:
+                if not _stream.write(sys.stdout):
+                    _stdout("Error: No sequences in object.\n")
+                sys.stdout.flush()
+            except BrokenPipeError:
+                br.broken_pipe()
 
     def _in_place(_output, file_path):
         if not os.path.exists(file_path):
@@ -3141,6 +4962,23 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
         sys.exit()
 
     # ############################################## COMMAND LINE LOGIC ############################################## #
+    if type(seqbuddy) == SeqBuddyStream:
+        tools = [flag for flag in br.sb_flags if getattr(in_args, flag, None)]
+        if [flag for flag in tools if flag not in STREAM_TOOLS + SORT_TOOLS + SAMPLE_TOOLS] \
+                or not seqbuddy.streamable():
+            _stderr("Warning: Unable to stream records with the requested tool and/or format, so all records are "
+                    "being read into memory.\n", in_args.quiet)
+            seqbuddy = seqbuddy.to_seqbuddy()
+
+    if type(seqbuddy) == SeqIndex:
+        tools = [flag for flag in br.sb_flags if getattr(in_args, flag, None)]
+        if not tools or [flag for flag in tools if flag not in INDEX_TOOLS]:
+            seqbuddy = seqbuddy.to_seqbuddy()
+
+    workers = 1 if in_args.cores is None else in_args.cores
+    if workers < 0:
+        _raise_error(ValueError("The number of cores can not be negative, not %s." % workers), "cores")
+
     # Add feature
     if in_args.annotate:
         # _type, location, strand=None, qualifiers=None, pattern=None
@@ -3220,7 +5058,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
         if seqbuddy.alpha != IUPAC.protein:
             _raise_error(TypeError("The input sequence needs to be protein, not nucleotide"), "back_translate")
 
-        _print_recs(back_translate(seqbuddy, mode, species))
+        _print_recs(back_translate(seqbuddy, mode, species, workers=workers))
         _exit("back_translate")
 
     # BL2SEQ
@@ -3243,7 +5081,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
                     output_str += "%s\t%s\t%s\t%s\t%s\t%s\n" % (query_id, subj_id, ident, length, evalue, bit_score)
             _stdout(output_str)
         except RuntimeError as e:
-            _raise_error(e, "bl2seq", "not present in \$PATH or working directory")
+            _raise_error(e, "bl2seq", [r"not present in \$PATH or working directory", "failed with exit code"])
         _exit("bl2seq")
 
     # BLAST
@@ -3269,6 +5107,11 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
             _raise_error(e, "blast")
         _exit("blast")
 
+    # Bootstrap
+    if in_args.bootstrap:
+        _print_recs(bootstrap(seqbuddy, in_args.bootstrap[0], seed=in_args.seed))
+        _exit("bootstrap")
+
     # Clean Seq
     if in_args.clean_seq:
         args = in_args.clean_seq[0]
@@ -3328,7 +5171,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
         output = ""
         for rec in seqbuddy.records:
             output += "%s\n" % str(rec.id)
-            for residue, counts in rec.buddy_data["res_count"].items():
+            for residue, counts in seqbuddy.results.get(rec, "res_count").items():
                 try:
                     output += "{0}:\t{1}\t{2} %\n".format(residue, counts[0], round(counts[1] * 100, 2))
                 except TypeError:
@@ -3367,9 +5210,10 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
         deleted_seqs = []
         for next_pattern in in_args.delete_records:
-            deleted_seqs += pull_recs(make_copy(seqbuddy), next_pattern).records
+            deleted_seqs += pull_recs(_shallow_copy(seqbuddy, seqbuddy.records),
+                                      br.PatternFilter.from_args([next_pattern])).records
 
-        seqbuddy = delete_records(seqbuddy, in_args.delete_records)
+        seqbuddy = delete_records(seqbuddy, br.PatternFilter.from_args(in_args.delete_records))
 
         if len(deleted_seqs) > 0 and not in_args.quiet:
             counter = 1
@@ -3403,7 +5247,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
                     for scope_option in ["all", "ids", "seqs"]:
                         scope = scope_option if scope_option.startswith(arg) else scope
 
-        find_repeats(seqbuddy)
+        find_repeats(seqbuddy, low_memory=in_args.low_memory)
         stderr_output = ""
         if len(seqbuddy.repeat_ids) > 0 and scope in ["all", "ids"]:
             stderr_output += "# Records with duplicate ids deleted\n"
@@ -3415,7 +5259,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
                 counter += 1
             stderr_output = "%s\n\n" % stderr_output.strip()
             seqbuddy = delete_repeats(seqbuddy, 'ids')
-            find_repeats(seqbuddy)
+            find_repeats(seqbuddy, low_memory=in_args.low_memory)
 
         rep_seq_ids = []
         for seq in seqbuddy.repeat_seqs:
@@ -3458,7 +5302,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
         # if no argument provided will use table 1 first reading frame as default(set above)
         degen_args = 1 if not in_args.degenerate_sequence[0] else in_args.degenerate_sequence[0]
         try:
-            degenerate_sequence(seqbuddy, degen_args)
+            degenerate_sequence(seqbuddy, degen_args, workers=workers)
         except KeyError as e:
             _raise_error(e, "degenerate_sequence", "Could not locate codon dictionary")
         except TypeError as e:
@@ -3479,19 +5323,23 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
     # Find CpG
     if in_args.find_CpG:
+        cpg_args = in_args.find_CpG[0] if type(in_args.find_CpG) == list and in_args.find_CpG[0] else []
+        cpg_kwargs = OrderedDict([("window_size", 200), ("min_gc", .5), ("min_oe", .6)])
         try:
-            find_cpg(seqbuddy)
+            for arg, key in zip(cpg_args, cpg_kwargs):
+                cpg_kwargs[key] = int(arg) if key == "window_size" else float(arg)
+            find_cpg(seqbuddy, workers=workers, **cpg_kwargs)
             islands = False
             for rec in seqbuddy.records:
-                if rec.buddy_data["cpgs"]:
+                if seqbuddy.results.get(rec, "cpgs"):
                     islands = True
                     break
 
             if islands:
                 output = ""
                 for rec in seqbuddy.records:
-                    if rec.buddy_data["cpgs"]:
-                        value = ["%s-%s" % (x[0], x[1]) for x in rec.buddy_data["cpgs"]]
+                    if seqbuddy.results.get(rec, "cpgs"):
+                        value = ["%s-%s" % (x[0], x[1]) for x in seqbuddy.results.get(rec, "cpgs")]
                         output += "{0}: {1}\n".format(rec.id, ", ".join(value))
 
                 _stderr('########### Islands identified ###########\n%s\n'
@@ -3504,15 +5352,31 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
         except TypeError as e:
             _raise_error(e, "find_CpG", "DNA sequence required, not protein or RNA.")
+        except ValueError as e:
+            _raise_error(e, "find_CpG")
 
     # Find pattern
     if in_args.find_pattern:
-        find_pattern(seqbuddy, *in_args.find_pattern)
-        for pattern in in_args.find_pattern:
+        patterns = [pattern for pattern in in_args.find_pattern if pattern not in ["ambig", "revcomp"]]
+        for indx, pattern in enumerate(patterns):
+            if pattern.startswith(br.PatternFilter.file_prefix):  # One motif per line, or a FASTA file of motifs
+                with open(pattern[len(br.PatternFilter.file_prefix):], "r") as ifile:
+                    motifs = [line.strip() for line in ifile if line.strip() and not line.startswith(">")]
+                patterns[indx] = motifs
+            else:
+                patterns[indx] = [pattern]
+        patterns = list(OrderedDict.fromkeys(chain(*patterns)))
+        try:
+            find_pattern(seqbuddy, *patterns, ambig="ambig" in in_args.find_pattern,
+                         include_rc="revcomp" in in_args.find_pattern, workers=workers)
+        except TypeError as e:
+            _raise_error(e, "find_pattern", "Nucleic acid sequence required")
+
+        for pattern in patterns:
             output = ""
             num_matches = 0
             for rec in seqbuddy.records:
-                indices = rec.buddy_data['find_patterns'][pattern]
+                indices = seqbuddy.results.get(rec, "find_patterns")[pattern]
                 if not len(indices):
                     output += "{0}: None\n".format(rec.id)
                 else:
@@ -3528,7 +5392,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
     # Find repeat sequences or ids
     if in_args.find_repeats:
         columns = 1 if not in_args.find_repeats[0] else in_args.find_repeats[0]
-        find_repeats(seqbuddy)
+        find_repeats(seqbuddy, low_memory=in_args.low_memory)
 
         output_str = ""
         if len(seqbuddy.repeat_ids) > 0:
@@ -3570,7 +5434,7 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
     # Find restriction sites
     if in_args.find_restriction_sites:
-        min_cuts, max_cuts, _enzymes, order = None, None, [], 'position'
+        min_cuts, max_cuts, _enzymes, order, table_only = None, None, [], 'position', False
         if not in_args.out_format:
             seqbuddy.out_format = "gb"
 
@@ -3593,6 +5457,8 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
             elif param in ['alpha', 'position']:
                 order = param
+            elif param == 'table':
+                table_only = True
             else:
                 _enzymes.append(param)
 
@@ -3602,7 +5468,8 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
         clean_seq(seqbuddy)
         try:
-            find_restriction_sites(seqbuddy, tuple(_enzymes), min_cuts, max_cuts)
+            find_restriction_sites(seqbuddy, tuple(_enzymes), min_cuts, max_cuts, features=not table_only,
+                                   workers=workers)
         except TypeError as e:
             _raise_error(e, "find_restriction_sites")
 
@@ -3619,8 +5486,11 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
                 output += "{0}\t{1}\n".format(_enzyme[0], ", ".join(cut_sites))
             output += "\n"
         output = "%s\n# ############################################### #\n\n" % output.strip()
-        _stderr(output, quiet=in_args.quiet)
-        _print_recs(seqbuddy)
+        if table_only:
+            _stdout(output)
+        else:
+            _stderr(output, quiet=in_args.quiet)
+            _print_recs(seqbuddy)
         _exit("find_restriction_sites")
 
     # Group sequences by prefix. I might want to delete this in favour of group_by_regex... Keep them both for now.
@@ -3798,9 +5668,9 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
     if in_args.isoelectric_point:
         if seqbuddy.alpha != IUPAC.protein:
             _stderr("Nucleic acid sequences detected, converting to protein.\n\n")
-            seqbuddy = translate_cds(seqbuddy, quiet=True)
+            seqbuddy = translate_cds(seqbuddy, quiet=True, workers=workers)
 
-        isoelectric_point(seqbuddy)
+        isoelectric_point(seqbuddy, workers=workers)
         _stderr("ID\tpI\n")
         output = ""
         for rec in seqbuddy.records:
@@ -3985,13 +5855,27 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
     # Order ids randomly
     if in_args.order_ids_randomly:
-        _print_recs(order_ids_randomly(seqbuddy))
+        _print_recs(order_ids_randomly(seqbuddy, seed=in_args.seed))
         _exit("order_ids_randomly")
 
+    # Order records by other attributes
+    if in_args.order_recs:
+        args = in_args.order_recs[0]
+        sort_by = args[0].lower()
+        regex = args[1] if sort_by == "regex" and len(args) > 1 else None
+        args = args[2:] if sort_by == "regex" else args[1:]
+        reverse = True if args and "reverse".startswith(args[0].lower()) else False
+        try:
+            _print_recs(order_recs(seqbuddy, sort_by, reverse=reverse, regex=regex))
+        except ValueError as e:
+            _raise_error(e, "order_recs", ["Unknown sort mode", "A regular expression is required",
+                                           "Invalid regular expression"])
+        _exit("order_recs")
+
     # Pull random records
     if in_args.pull_random_record:
         count = 1 if not in_args.pull_random_record[0] else in_args.pull_random_record[0]
-        _print_recs(pull_random_recs(seqbuddy, count))
+        _print_recs(pull_random_recs(seqbuddy, count, seed=in_args.seed))
         _exit("pull_random_record")
 
     # Pull record ends
@@ -4007,17 +5891,29 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
                 description = True
                 del in_args.pull_records[indx]
                 break
-        _print_recs(pull_recs(seqbuddy, in_args.pull_records, description))
+        _print_recs(pull_recs(seqbuddy, br.PatternFilter.from_args(in_args.pull_records), description))
         _exit("pull_records")
 
     # Purge
     if in_args.purge:
-        purge(seqbuddy, in_args.purge)
+        purge_args = in_args.purge if type(in_args.purge) == list else [in_args.purge]
+        try:
+            threshold = int(purge_args[0])
+        except ValueError:
+            _raise_error(ValueError("Purge threshold must be an integer, not '%s'" % purge_args[0]), "purge")
+        if len(purge_args) > 2 or (len(purge_args) == 2 and str(purge_args[1]).lower() != "greedy"):
+            _raise_error(ValueError("Unrecognized purge argument(s) '%s'. The only option is 'greedy'."
+                                    % " ".join([str(arg) for arg in purge_args[1:]])), "purge")
+        greedy = True if len(purge_args) == 2 else False
+        try:
+            purge(seqbuddy, threshold, greedy=greedy)
+        except RuntimeError as e:
+            _raise_error(e, "purge", [r"not present in \$PATH or working directory", "failed with exit code"])
         record_map = "### Deleted record mapping ###\n"
         for rec in seqbuddy.records:
             record_map += "%s\n" % rec.id
-            if rec.buddy_data["purge_set"]:
-                for del_seq_id in rec.buddy_data["purge_set"]:
+            if seqbuddy.results.get(rec, "purge_set"):
+                for del_seq_id in seqbuddy.results.get(rec, "purge_set"):
                     record_map += "%s, " % del_seq_id
             record_map = record_map.strip(", ") + "\n\n"
         record_map = record_map.strip() + "\n##############################\n\n"
@@ -4107,9 +6003,23 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
 
     # Shuffle Seqs
     if in_args.shuffle_seqs:
-        _print_recs(shuffle_seqs(seqbuddy))
+        _print_recs(shuffle_seqs(seqbuddy, seed=in_args.seed))
         _exit("shuffle_seqs")
 
+    # Similarity/identity matrix
+    if in_args.sim_ident:
+        sid_args = in_args.sim_ident[0]
+        try:
+            kmer_size = int(sid_args[0]) if len(sid_args) > 0 else None
+            sketch_size = int(sid_args[1]) if len(sid_args) > 1 else 1000
+            _stdout(str(sim_ident(seqbuddy, kmer_size, sketch_size, workers=workers)))
+        except ValueError as e:
+            _raise_error(e, "sim_ident", ["is too large for the alphabet", "invalid literal for int",
+                                          "must be at least 1"])
+        except RuntimeError as e:
+            _raise_error(e, "sim_ident", "failed to compare")
+        _exit("sim_ident")
+
     # Transcribe
     if in_args.transcribe:
         try:
@@ -4122,20 +6032,27 @@ def command_line_ui(in_args, seqbuddy, skip_exit=False):
     if in_args.translate:
         if seqbuddy.alpha == IUPAC.protein:
             _raise_error(TypeError("Nucleic acid sequence required, not protein."), "translate")
+        table = in_args.translate[0] if type(in_args.translate) == list and in_args.translate[0] else 1
         try:
-            _print_recs(translate_cds(seqbuddy, quiet=in_args.quiet))
+            _print_recs(translate_cds(seqbuddy, quiet=in_args.quiet, table=table, workers=workers))
         except TypeError as e:
             _raise_error(e, "translate", ["Nucleic acid sequence required, not protein.", "Record .* is protein."])
+        except ValueError as e:
+            _raise_error(e, "translate", "Unknown NCBI translation table")
         _exit("translate")
 
     # Translate 6 reading frames
     if in_args.translate6frames:
         if seqbuddy.alpha == IUPAC.protein:
             _raise_error(TypeError("You need to supply DNA or RNA sequences to translate"), "translate6frames")
+        table = in_args.translate6frames[0] if type(in_args.translate6frames) == list \
+            and in_args.translate6frames[0] else 1
         try:
-            seqbuddy = translate6frames(seqbuddy)
+            seqbuddy = translate6frames(seqbuddy, table=table)
         except TypeError as e:
             _raise_error(e, "translate6frames", ["Nucleic acid sequence required, not protein.", " is protein."])
+        except ValueError as e:
+            _raise_error(e, "translate6frames", "Unknown NCBI translation table")
         if in_args.out_format:
             seqbuddy.out_format = in_args.out_format
         _print_recs(seqbuddy)
@@ -4154,6 +6071,8 @@ if __name__ == '__main__':
         command_line_ui(*initiation)
     except (KeyboardInterrupt, br.GuessError) as _e:
         print(_e)
+    except BrokenPipeError:
+        br.broken_pipe()
     except SystemExit:
         pass
     except Exception as _e:
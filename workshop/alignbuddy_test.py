@@ -38,6 +38,7 @@ from Bio.Alphabet import IUPAC
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio.Align import MultipleSeqAlignment
+from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
 
 sys.path.insert(0, "./")
 import MyFuncs
@@ -392,6 +393,19 @@ def test_write3():  # Unloopable components
     assert align_to_hash(tester) == "16b3397d6315786e8ad8b66e0d9c798f"
 
 
+def test_write_handle():
+    tester = alb_resources.get_one("o d c")
+    handle = io.StringIO()
+    tester.write(handle)
+    assert handle.getvalue() == str(tester)
+    assert handle.getvalue().endswith("\n\n") and not handle.getvalue().endswith("\n\n\n")
+
+    handle = io.StringIO()
+    tester.write(handle, out_format="phylipsr")
+    assert handle.getvalue() == str(Alb.AlignBuddy(str(tester), out_format="phylipsr"))
+    assert tester._out_format == "clustal"
+
+
 # ################################################# HELPER FUNCTIONS ################################################# #
 def test_guess_error():
     # File path
@@ -447,6 +461,17 @@ def test_guess_format():
     assert not Alb.guess_format(resource("malformed_phylip_records.physs"))
     assert not Alb.guess_format(resource("malformed_phylip_columns.physs"))
 
+    # Only the head of the file is checked, but every record in it needs to be the same length
+    with open(resource("Mnemiopsis_cds_aln.fa"), "r") as ifile:
+        aligned = ifile.read()
+    assert Alb.guess_format(io.StringIO(aligned * 200 + ">foo\nATG\n")) == "fasta"
+    with open(resource("Mnemiopsis_cds.fa"), "r") as ifile:
+        assert not Alb.guess_format(io.StringIO(ifile.read() * 200))
+
+    # Multiple phylip alignments are identified from the first one
+    with open(resource("Mnemiopsis_cds.physr"), "r") as ifile:
+        assert Alb.guess_format(io.StringIO(ifile.read() * 100)) == "phylipsr"
+
     with pytest.raises(br.GuessError) as e:
         Alb.guess_format({"Dummy dict": "Type not recognized by guess_format()"})
     assert "Unsupported _input argument in guess_format()" in str(e)
@@ -496,7 +521,33 @@ def test_stdout(capsys):
     assert out == ""
 
 
-# ToDo: def test_feature_remapper()
+# ######################  'FeatureReMapper' ###################### #
+def test_feature_remapper():
+    old_rec = SeqRecord(Seq("AC--GTAC-T"), id="Seq1")
+    def features():
+        return [SeqFeature(FeatureLocation(0, 6), type="gene"),
+                SeqFeature(FeatureLocation(2, 4), type="gaps_only"),
+                SeqFeature(CompoundLocation([FeatureLocation(1, 3), FeatureLocation(7, 10)]), type="CDS")]
+
+    old_rec.features = features()
+    old_alignment = MultipleSeqAlignment([old_rec])
+    new_alignment = MultipleSeqAlignment([SeqRecord(Seq("ACGTACT"), id="Seq1")])
+
+    position_map = Alb.FeatureReMapper(b"\x01\x01\x00\x00\x01\x01\x01\x01\x00\x01")
+    position_map.remap_features(old_alignment, new_alignment)
+    new_features = new_alignment[0].features
+    assert len(new_features) == 2
+    assert str(new_features[0].location) == "[0:4]"
+    assert str(new_features[1].location) == "order{[1:2], [5:7]}"
+
+    # Building the map one column at a time gives the same result
+    position_map = Alb.FeatureReMapper()
+    for exists in [True, True, False, False, True, True, True, True, False, True]:
+        position_map.extend(exists)
+    new_alignment[0].features = []
+    old_rec.features = features()
+    position_map.remap_features(old_alignment, new_alignment)
+    assert [str(feat.location) for feat in new_alignment[0].features] == ["[0:4]", "order{[1:2], [5:7]}"]
 
 
 # ################################################ MAIN API FUNCTIONS ################################################ #
@@ -527,6 +578,11 @@ def test_bootstrap():
     for _ in range(20):
         assert align_to_hash(Alb.bootstrap(tester)) in _hashes
 
+    # Seeded replicates are reproducible
+    tester = alb_resources.get_one("m d s")
+    assert align_to_hash(Alb.bootstrap(Alb.make_copy(tester), 2, seed=5)) == \
+        align_to_hash(Alb.bootstrap(Alb.make_copy(tester), 2, seed=5))
+
 
 # ##############################################  '-cs', '--clean_seqs' ############################################## #
 def test_clean_seqs():
@@ -1092,6 +1148,20 @@ def test_pull_records(alignbuddy, next_hash):
     assert align_to_hash(alignbuddy) == next_hash
 
 
+def test_pull_records_batch():
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n")
+    tester = Alb.pull_records(alb_resources.get_one("o d g"), ["^Mle-Panxα1$"], id_files=id_file.path)
+    assert sorted([rec.id for rec in tester.records()]) == ['Mle-Panxα1', 'Mle-Panxα4', 'Mle-Panxα8']
+
+    tester = Alb.delete_records(alb_resources.get_one("o d g"), ["α1"], id_files=[id_file.path])
+    assert len(tester.records()) == 6
+
+    # A pattern that happens to name a file is still just a pattern
+    tester = Alb.pull_records(alb_resources.get_one("o d g"), id_file.path)
+    assert not tester.records()
+
+
 # ###########################################  '-ri', '--rename_ids' ############################################ #
 hashes = {'o d g': 'c35db8b8353ef2fb468b0981bd960a38', 'o d n': '243024bfd2f686e6a6e0ef65aa963494',
           'o d py': '98bb9b57f97555d863054ddb526055b4', 'o p g': '2e4e3c365cd011821bcdc6275a3559af',
@@ -1108,14 +1178,14 @@ def test_rename_ids(alignbuddy, next_hash):
 
 
 # ###########################################  'tr', '--translate' ############################################ #
-hashes = {'o d f': 'b7fe22a87fb78ce747d80e1d73e39c35', 'o d g': 'a949edce98525924dbbc3ced03c18214',
-          'o d n': 'a2586af672ad71f16bbd54f359b323ff', 'o d py': 'd0d4dd408e559215b2780f4f0ae0c418',
-          'o d pr': 'f77705e32cd753267916539ee0936e1f', 'o d pss': 'ede672b15221ec60981287ca1e286c52',
-          'o d psr': '623fe1634752e812f482cfa7b7ea20ee', 'o d s': '4ff563c39229d30aa3eda193cb290344',
-          'o d c': '150179326629fffadb7aef7796bd1cec', 'm d py': '7fd28236f491c38ba261dfde20919595',
-          'm d pr': '0de676236eda864172b73b6abe4d7a05', 'm d pss': 'c7feff60c16b2b187e03db5d160a4748',
-          'm d psr': 'b5945f0317fe9ce8fc03ac7f4c0d5932', 'm d s': 'ee5a41b6f8b32645359beafc72efe825',
-          'm d c': '09251e1f4fc0e07a5bba4c64c22bac9b'}
+hashes = {'o d f': 'd410306e950fd25f86a9340d90942756', 'o d g': 'a949edce98525924dbbc3ced03c18214',
+          'o d n': 'fa8430bd8b073bd283856561818e7b56', 'o d py': 'd87c83b67c9a66853dde06a6ca924ca9',
+          'o d pr': 'ce423d5b99d5917fbef6f3b47df40513', 'o d pss': '48e21cfa06aed47fd2e5d99f4b88b23e',
+          'o d psr': '8ff80c7f0b8fc7f237060f94603c17be', 'o d s': '2340addad40e714268d2523cdb17a78c',
+          'o d c': 'cd78644bbbbe01e2d4a8ad432f3643cc', 'm d py': '982d7a8e780db777b1b1ef61f7109db7',
+          'm d pr': '349e2944d5ccb4c5e01d5c41bd171760', 'm d pss': '8ffd21df111ac0b8ccba02644ae3c097',
+          'm d psr': 'df674450da63ef46b3ec9d8feb09ef09', 'm d s': '29c77e7aad6c936d9d8180176c0323f1',
+          'm d c': '7ba8c75a2248f78a70682b8c28febc49'}
 
 hashes = [(alignbuddy, hashes[key]) for key, alignbuddy in alb_resources.get("o m d c f g n py pr psr pss s").items()]
 
@@ -1355,6 +1425,16 @@ def test_delete_records_ui(capsys):
     assert "No sequence identifiers match 'foo'\n" in err
 
 
+def test_delete_records_ui_id_file(capsys):
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n")
+    test_in_args = deepcopy(in_args)
+    test_in_args.delete_records = [["file:%s" % id_file.path]]
+    Alb.command_line_ui(test_in_args, alb_resources.get_one("o d f"), skip_exit=True)
+    out, err = capsys.readouterr()
+    assert out.count(">") == len(alb_resources.get_one("o d f").records()) - 2
+
+
 # ##################### '-et', '--enforce_triplets' ###################### ##
 def test_enforce_triplets_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -1518,6 +1598,13 @@ def test_pull_records_ui(capsys):
     out, err = capsys.readouterr()
     assert string2hash(out) == "fb82ffec15ece60a74d9ac8db92d2999"
 
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n")
+    test_in_args.pull_records = [["file:%s" % id_file.path, "^Mle-Panxα1$"]]
+    Alb.command_line_ui(test_in_args, alb_resources.get_one("o d s"), skip_exit=True)
+    out, err = capsys.readouterr()
+    assert sorted([rec.id for rec in Alb.AlignBuddy(out).records()]) == ['Mle-Panxα1', 'Mle-Panxα4', 'Mle-Panxα8']
+
 
 # ######################  '-ri', '--rename_ids' ###################### #
 def test_rename_ids_ui(capsys):
@@ -1730,3 +1817,18 @@ def test_uppercase_ui(capsys):
     Alb.command_line_ui(test_in_args, alb_resources.get_one("m p s"), skip_exit=True)
     out, err = capsys.readouterr()
     assert string2hash(out) == "6f3f234d796520c521cb85c66a3e239a"
+
+
+def test_broken_pipe_ui():
+    # Output bigger than the pipe buffer, read by something that hangs up early (e.g., `| head -1`)
+    tmp_file = MyFuncs.TempFile()
+    with open(resource("Mnemiopsis_cds_aln.fa"), "r") as ifile:
+        tmp_file.write(ifile.read() * 10)
+    process = Popen([sys.executable, os.path.join(os.path.dirname(Alb.__file__), "AlignBuddy.py"), tmp_file.path,
+                     "-uc"], stdout=PIPE, stderr=PIPE)
+    assert process.stdout.readline().decode() == ">Mle-Panxα9\n"
+    process.stdout.close()
+    err = process.stderr.read().decode()
+    process.stderr.close()
+    assert process.wait() == 0
+    assert err == ""
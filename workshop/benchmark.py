@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This program is free software in the public domain as stipulated by the Copyright Law
+of the United States of America, chapter 1, subsection 105. You may modify it and/or redistribute it
+without restriction.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+name: benchmark.py
+author: Stephen R. Bond
+email: steve.bond@nih.gov
+institute: Computational and Statistical Genomics Branch, Division of Intramural Research,
+           National Human Genome Research Institute, National Institutes of Health
+           Bethesda, MD
+repository: https://github.com/biologyguy/BuddySuite
+© license: None, this work is public domain
+
+Description: Time SeqBuddy functions on randomly generated records. Point --tree at another checkout of workshop/
+             (e.g., a 'git worktree' of an older commit) to get before/after numbers for the same input.
+             $: ./benchmark.py shallow_copy -n 20000 --tree /tmp/old_workshop
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from time import time
+
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+
+def random_records(num, length, alphabet, seed):
+    """
+    :param num: Number of records
+    :param length: Length of each sequence
+    :param alphabet: String of characters to draw residues from
+    :param seed: Random seed, so every run sees the same input
+    :return: list of SeqRecord objects
+    """
+    rand = random.Random(seed)
+    return [SeqRecord(Seq("".join(rand.choice(alphabet) for _ in range(length))), id="Seq%s" % indx,
+                      description="") for indx in range(num)]
+
+
+def run(label, func, trace=False):
+    """
+    Time a single call and print the result
+    :param label: Name to print
+    :param func: Zero-argument callable
+    :param trace: Also report peak memory from tracemalloc (slows everything down, so times aren't comparable
+    with untraced runs)
+    :return: None
+    """
+    if trace:
+        tracemalloc.start()
+    start = time()
+    func()
+    elapsed = time() - start
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%-24s %8.2fs %8.1fMB" % (label, elapsed, peak / 1048576))
+    else:
+        print("%-24s %8.2fs" % (label, elapsed))
+    return
+
+
+def shallow_copy(Sb, in_args):
+    # Functions that switched from make_copy() to _shallow_copy()/record views
+    records = random_records(in_args.num_records or 20000, in_args.length or 300, "ACGT", in_args.seed)
+    rand = random.Random(in_args.seed)
+    for rec in rand.sample(records, len(records) // 10):  # Give find_repeats/delete_repeats something to find
+        records.append(SeqRecord(Seq(str(rec.seq)), id="Dup%s" % rec.id, description=""))
+
+    def new_sb():
+        return Sb.SeqBuddy(list(records), in_format="fasta", out_format="fasta")
+
+    run("to_dict", lambda: new_sb().to_dict(), in_args.trace)
+    run("find_repeats", lambda: Sb.find_repeats(new_sb()), in_args.trace)
+    run("clean_seq", lambda: Sb.clean_seq(new_sb()), in_args.trace)
+
+    def delete_records():
+        seqbuddy = new_sb()
+        for pattern in ["Seq1$", "Seq2$", "Seq3$", "Seq4$", "Seq5$"]:
+            Sb.delete_records(seqbuddy, pattern)
+    run("delete_records x5", delete_records, in_args.trace)
+    run("make_groups", lambda: Sb.make_groups(new_sb(), num_chars=5), in_args.trace)
+    run("delete_repeats", lambda: Sb.delete_repeats(new_sb()), in_args.trace)
+    run("translate6frames", lambda: Sb.translate6frames(Sb.SeqBuddy(list(records[:5000]), in_format="fasta")),
+        in_args.trace)
+    return
+
+
+def composition(Sb, in_args):
+    # Functions built on the shared _composition() kernel
+    proteins = random_records(in_args.num_records or 100000, in_args.length or 300, "ACDEFGHIKLMNPQRSTVWY",
+                              in_args.seed)
+    cds = random_records(in_args.num_records or 20000, in_args.length or 1500, "ACGT", in_args.seed)
+
+    def new_sb(records):
+        return Sb.SeqBuddy(list(records), in_format="fasta", out_format="fasta")
+
+    run("count_residues (aa)", lambda: Sb.count_residues(new_sb(proteins)), in_args.trace)
+    run("molecular_weight (aa)", lambda: Sb.molecular_weight(new_sb(proteins)), in_args.trace)
+    run("count_codons (nucl)", lambda: Sb.count_codons(new_sb(cds)), in_args.trace)
+    run("molecular_weight (nucl)", lambda: Sb.molecular_weight(new_sb(cds)), in_args.trace)
+    return
+
+
+BENCHMARKS = {"shallow_copy": shallow_copy, "composition": composition}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Time SeqBuddy functions on random records")
+    parser.add_argument("benchmarks", nargs="*", default=sorted(BENCHMARKS),
+                        help="Which benchmarks to run: %s (default: all)" % ", ".join(sorted(BENCHMARKS)))
+    parser.add_argument("-n", "--num_records", type=int, help="Number of records to generate")
+    parser.add_argument("-l", "--length", type=int, help="Length of each generated sequence")
+    parser.add_argument("-s", "--seed", type=int, default=12345, help="Random seed")
+    parser.add_argument("-t", "--tree", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Directory containing the SeqBuddy.py to benchmark")
+    parser.add_argument("-m", "--trace", action="store_true", help="Report peak memory with tracemalloc")
+    in_args = parser.parse_args()
+    unknown = [benchmark for benchmark in in_args.benchmarks if benchmark not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark(s): %s" % ", ".join(unknown))
+
+    sys.path.insert(0, os.path.abspath(in_args.tree))
+    import SeqBuddy as Sb
+    print("# %s" % os.path.abspath(Sb.__file__))
+    for benchmark in in_args.benchmarks:
+        print("## %s" % benchmark)
+        BENCHMARKS[benchmark](Sb, in_args)
+    return
+
+
+if __name__ == '__main__':
+    main()
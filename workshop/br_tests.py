@@ -25,6 +25,9 @@ Description: Collection of PyTest unit tests for the buddy_resources.py module
 
 import pytest
 from subprocess import Popen, PIPE
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
 
 import buddy_resources as Br
 
@@ -145,4 +148,31 @@ def test_shift_features():
         features = tester.records[0].features
         features[0].location = [dict]
         Sb._shift_features(features, 3, 1203)
-'''
\ No newline at end of file
+'''
+
+
+# ######################  'remap_gapped_features' ###################### #
+def test_remap_gapped_features():
+    old_rec = SeqRecord(Seq("AC--GTAC-T"), id="Seq1")
+    old_rec.features = [SeqFeature(FeatureLocation(0, 6), type="gene"),
+                        SeqFeature(FeatureLocation(4, 10, strand=-1), type="rev"),
+                        SeqFeature(CompoundLocation([FeatureLocation(1, 3), FeatureLocation(7, 10)]), type="CDS")]
+    new_rec = SeqRecord(Seq("-a-cGT--ACT"), id="Seq1")
+    Br.remap_gapped_features([old_rec], [new_rec])
+    assert [str(feat.location) for feat in new_rec.features] == ["[1:6]", "[4:11](-)", "join{[3:4](+), [9:11]}"]
+
+    # Features are dropped if the residues in front of them have changed, and run to the end of the sequence if their
+    # own residues have changed
+    old_rec.features = [SeqFeature(FeatureLocation(0, 2), type="front"),
+                        SeqFeature(FeatureLocation(4, 6), type="back")]
+    new_rec = SeqRecord(Seq("AG-GTAC-T"), id="Seq1")
+    Br.remap_gapped_features([old_rec], [new_rec])
+    assert [str(feat.location) for feat in new_rec.features] == ["[0:9]"]
+
+    # A long record with many features, which would be too slow to remap residue by residue
+    old_rec = SeqRecord(Seq("ACGT" * 250000), id="Seq1")
+    old_rec.features = [SeqFeature(FeatureLocation(indx, indx + 500), type="gene") for indx in range(0, 999500, 1000)]
+    new_rec = SeqRecord(Seq("ACGT-" * 250000), id="Seq1")
+    Br.remap_gapped_features([old_rec], [new_rec])
+    assert len(new_rec.features) == 1000
+    assert str(new_rec.features[-1].location) == "[1248750:1249374]"
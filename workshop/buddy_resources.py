@@ -36,10 +36,12 @@ from configparser import ConfigParser
 import json
 import traceback
 import re
+from bisect import bisect_left, bisect_right
 
 sys.path.insert(0, "./")
 from MyFuncs import TempFile
-from Bio import AlignIO
+from io import StringIO
+from Bio import AlignIO, SeqIO
 from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
 
 
@@ -62,6 +64,93 @@ class PhylipError(Exception):
         return self.value
 
 
+class RstripWriter(object):
+    """
+    Wraps an output handle, passing writes straight through except for trailing whitespace, which is held back until
+    more content arrives. The end result is the same as writing "%s\n" % output.rstrip(), without needing to hold the
+    whole output in memory first.
+    """
+    def __init__(self, handle):
+        self.handle = handle
+        self.pending = ""
+
+    def write(self, text):
+        content = text.rstrip()
+        if content:
+            self.handle.write(self.pending + content)
+            self.pending = text[len(content):]
+        else:
+            self.pending += text
+
+    def close(self, suffix="\n"):
+        self.handle.write(suffix)
+        self.pending = ""
+
+
+class PatternFilter(object):
+    """
+    Sort a batch of search patterns (e.g., for pull_records) by how they need to be matched, so every record only gets
+    one pass. Anchored literals like '^Seq1$' are exact IDs and go into a set, other plain strings are substring
+    checks, and only real regular expressions are compiled (once, into a single alternation).
+    Lists of exact IDs can be read from file, but only if they are passed in explicitly as id_files; patterns are
+    never checked against the file system. On the command line, ID files are flagged with a 'file:' prefix.
+    """
+    metacharacters = ".^$*+?{}[]\\|()"
+    file_prefix = "file:"
+
+    def __init__(self, patterns, id_files=None):
+        """
+        :param patterns: A single pattern or list of patterns
+        :param id_files: A single path or list of paths to files of exact IDs, one per line
+        """
+        patterns = [patterns] if type(patterns) == str else patterns
+        id_files = [id_files] if type(id_files) == str else id_files if id_files else []
+        self.exact = set()
+        self.literals = []
+        regexes = []
+        for id_file in id_files:
+            with open(id_file, "r") as ifile:
+                self.exact.update([line.strip() for line in ifile if line.strip()])
+
+        for pattern in patterns:
+            pattern = ".*" if pattern == "*" else pattern
+            exact_id = re.match("^\^((?:[^%s]|\\\\[%s])*)\$$" % (re.escape(self.metacharacters),
+                                                                  re.escape(self.metacharacters)), pattern)
+            if exact_id:
+                self.exact.add(re.sub(r"\\(.)", r"\1", exact_id.group(1)))
+            elif not [char for char in pattern if char in self.metacharacters]:
+                self.literals.append(pattern)
+            else:
+                regexes.append(pattern)
+        self.regex = re.compile("|".join(regexes)) if regexes else None
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Build a filter from command line arguments, where any argument starting with 'file:' is an ID file
+        :param args: List of patterns and 'file:<path>' arguments
+        :return: PatternFilter object
+        """
+        patterns = [arg for arg in args if not arg.startswith(cls.file_prefix)]
+        id_files = [arg[len(cls.file_prefix):] for arg in args if arg.startswith(cls.file_prefix)]
+        return cls(patterns, id_files)
+
+    def search(self, *strings):
+        """
+        :param strings: Things to test, such as a record's id, name, and description
+        :return: True if any of the strings match any of the patterns
+        """
+        for _string in strings:
+            if _string in self.exact:
+                return True
+            for literal in self.literals:
+                if literal in _string:
+                    return True
+            if self.regex and self.regex.search(_string):
+                return True
+        return False
+
+
 class Contributor(object):
     def __init__(self, first, last, middle="", commits=None, github=None):
         self.first = first.strip()
@@ -196,6 +285,17 @@ Contributors:
 
 
 # #################################################### FUNCTIONS ##################################################### #
+def broken_pipe():
+    """
+    Whatever was reading stdout has gone away (e.g., output piped into `head`). That isn't a crash, so point stdout at
+    devnull (otherwise the interpreter hits the same error flushing it again on the way out) and exit quietly.
+    :return: None (raises SystemExit)
+    """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    sys.exit()
+
+
 def config_values():
     config_file = "%s/.buddysuite/config.ini" % os.path.expanduser('~')
     if os.path.isfile(config_file):
@@ -270,6 +370,21 @@ def flags(parser, _positional=None, _flags=None, _modifiers=None, version=None):
         misc.add_argument('-v', '--version', action='version', version=str(version))
 
 
+def natural_sort_key(text):
+    """
+    Split a string into alternating text and integer runs, so numbers sort by value (e.g., 'Seq2' before 'Seq10').
+    Text is always at the even indices and integers at the odd, so any two keys can be compared with each other. Text
+    runs that are followed by a number end in a '0' placeholder, so they still sort against other characters the way
+    the digit would have in a plain alphabetical sort (e.g., 'Mle-Panx1' before 'Mle04-Panx4').
+    :param text: Any string (e.g., a sequence id)
+    :return: tuple
+    """
+    runs = NUMBER_RUNS.split(text)
+    runs[1::2] = map(int, runs[1::2])
+    runs[:-1:2] = [run + "0" for run in runs[:-1:2]]
+    return tuple(runs)
+
+
 def parse_format(_format):
     available_formats = ["clustal", "embl", "fasta", "genbank", "gb", "nexus", "stockholm",
                          "phylip", "phylipis", "phylip-strict", "phylip-interleaved-strict",
@@ -393,6 +508,23 @@ def phylip_sequential_read(sequence, relaxed=True):
     return aligns
 
 
+def read_head(handle, size=65536):
+    """
+    Read the start of a file without moving the handle. A partial last line is completed, so lines are never split.
+    :param handle: Seekable file handle
+    :param size: Number of characters to read
+    :return: Tuple of (text, True if the whole file was read)
+    """
+    position = handle.tell()
+    head = handle.read(size)
+    complete = len(head) < size
+    if not complete:
+        head += handle.readline()
+        complete = handle.read(1) == ""
+    handle.seek(position)
+    return head, complete
+
+
 def replacements(input_str, query, replace="", num=0):
     """
     This will allow fancy positional regular expression replacements from left-to-right, as well as normal right-to-left
@@ -516,6 +648,155 @@ def shift_features(features, shift, full_seq_len):
     return shifted_features
 
 
+def sniff_format(handle, _type="seqbuddy"):
+    """
+    Decide the format of a file from its first few KB, instead of trial parsing the whole thing in every format.
+    :param handle: Seekable file handle. The read position is left where it started.
+    :param _type: {"seqbuddy", "alignbuddy", "phylobuddy"}
+    :return: Format, "empty file", or None if the head is not conclusive (i.e., fall back to trial parsing the head)
+    """
+    head, complete = read_head(handle)
+    if head == "":
+        return "empty file"
+
+    if _type == "phylobuddy":
+        return _sniff_tree_format(handle, head, complete)
+
+    lines = head.strip().split("\n")
+    first_line = lines[0].strip()
+    _format = None
+    if first_line.startswith("# STOCKHOLM"):
+        _format = "stockholm"
+
+    elif first_line.upper().startswith("#NEXUS"):
+        # Tree-only nexus files do not have any sequences
+        _format = "nexus" if re.search("begin +(data|characters) *;", head, re.IGNORECASE) else None
+
+    elif first_line.startswith("LOCUS"):
+        _format = "gb"
+
+    elif first_line.startswith("ID   "):
+        _format = "embl"
+
+    elif re.match("(CLUSTAL|PROBCONS|MUSCLE|MSAPROBS|Kalign)", first_line):
+        _format = "clustal"
+
+    elif first_line.startswith(">"):
+        _format = "fasta"
+
+    elif first_line.startswith("@") and len(lines) > 2 and lines[2].startswith("+"):
+        _format = "fastq"
+
+    elif first_line.startswith("<") and "<seqXML" in head:
+        _format = "seqxml"
+
+    elif re.match("[0-9]+ +[0-9]+$", first_line):
+        return _sniff_phylip(handle, head, complete)
+
+    if _type == "alignbuddy":
+        if _format not in ["gb", "stockholm", "fasta", "nexus", "clustal"]:
+            return None
+        if _format in ["gb", "fasta"]:
+            # Only an alignment if all of the records are the same length. The last record may have been cut off.
+            lengths = []
+            try:
+                for rec in SeqIO.parse(StringIO(head), _format):
+                    lengths.append(len(rec.seq))
+            except ValueError:
+                pass
+            lengths = lengths if complete else lengths[:-1]
+            if not lengths or len(set(lengths)) != 1:
+                return None
+    return _format
+
+
+def _sniff_phylip(handle, head, complete):
+    """
+    Phylip flavours can only be told apart by reading the records, so parse the first alignment (and only the first).
+    However big that first alignment is, it is read in full, so detection never gives up on large files.
+    :return: phylipss, phylipsr, phylip, phylip-relaxed, or None
+    """
+    size = len(head)
+    while not complete and not re.search("\n *[0-9]+ +[0-9]+ *\n", head.strip()):
+        size *= 4
+        head, complete = read_head(handle, size)
+
+    next_align = re.search("\n *[0-9]+ +[0-9]+ *\n", head.strip())
+    if next_align:
+        head = head.strip()[:next_align.start()]
+
+    for relaxed, _format in [(False, "phylipss"), (True, "phylipsr")]:
+        try:
+            if phylip_sequential_read(head, relaxed=relaxed):
+                return _format
+        except (PhylipError, AttributeError, ValueError):
+            pass
+
+    try:
+        sequence = "\n %s" % head.strip()
+        alignments = re.split("\n ([0-9]+) ([0-9]+)\n", sequence)[1:]
+        align_sizes = []
+        for indx in range(int(len(alignments) / 3)):
+            align_sizes.append((int(alignments[indx * 3]), int(alignments[indx * 3 + 1])))
+
+        phy = list(AlignIO.parse(StringIO(head), "phylip"))
+        phy_ids = []
+        for indx, key in enumerate(align_sizes):
+            phy_ids.append([])
+            for rec in phy[indx]:
+                assert len(rec.seq) == key[1]
+                phy_ids[-1].append(rec.id)
+
+        phy_rel = list(AlignIO.parse(StringIO(head), "phylip-relaxed"))
+        for indx, aln in enumerate(phy_rel):
+            for rec in aln:
+                if len(rec.seq) != align_sizes[indx][1]:
+                    return "phylip"
+                if rec.id not in phy_ids[indx]:
+                    return "phylip-relaxed"
+        return "phylip"
+
+    except (ValueError, AssertionError, IndexError):
+        pass
+
+    try:
+        if list(AlignIO.parse(StringIO(head), "phylip-relaxed")):
+            return "phylip-relaxed"
+    except ValueError:
+        pass
+    return None
+
+
+def _sniff_tree_format(handle, head, complete):
+    """
+    Tree files are recognized by their tags, so keep scanning a chunk at a time if nothing turns up in the head
+    :return: nexml, nexus, newick, or None
+    """
+    position = handle.tell()
+    handle.read(len(head))
+    chunk = head
+    tail = ""
+    while chunk:
+        text = tail + chunk
+        if re.search("<nex:nexml", text, re.IGNORECASE):
+            _format = "nexml"
+        # Maddison, Swofford, and Maddison, 1997 DOI: 10.1093/sysbio/46.4.590
+        elif re.search("#nexus", text, re.IGNORECASE):
+            _format = "nexus"
+        elif "(" in text:
+            _format = "newick"
+        else:
+            _format = None
+
+        if _format or complete:
+            handle.seek(position)
+            return _format
+        tail = text[-10:]
+        chunk = handle.read(1048576)
+    handle.seek(position)
+    return None
+
+
 def ungap_feature_ends(feat, rec):
     """
     If a feature begins or ends on a gap, it makes it much harder to track changes, so force the feature onto actual
@@ -564,14 +845,56 @@ def ungap_feature_ends(feat, rec):
     return feat
 
 
-def _old2new(feat, old_rec, new_rec):
+def _gap_index(seq):
+    """
+    Locate the gaps in a sequence, so residue counts and positions can be looked up with a binary search
+    :param seq: Sequence string
+    :return: Sorted list of gap positions, and the number of residues in front of each of those gaps
+    """
+    gaps = [match.start() for match in re.finditer("-", seq)]
+    return gaps, [pos - indx for indx, pos in enumerate(gaps)]
+
+
+def _common_prefix(seq1, seq2):
+    """
+    Length of the shared prefix between two strings (bisecting on slice comparisons keeps the work in C)
+    :return: int
+    """
+    if seq1 == seq2:
+        return len(seq1)
+    low, high = 0, min(len(seq1), len(seq2))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if seq1[:mid] == seq2[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _gapped_map(old_rec, new_rec):
+    """
+    Everything _old2new() needs to translate coordinates between two gap patterns of the same sequence. This is built
+    once per record pair, so each feature location can then be mapped with a couple of binary searches.
+    :return: (old gap positions, new residues in front of each gap, new gapped length, new residue count,
+              length of the shared ungapped prefix)
+    """
+    old_seq, new_seq = str(old_rec.seq), str(new_rec.seq)
+    old_gaps = _gap_index(old_seq)[0]
+    new_gaps, new_res_before_gaps = _gap_index(new_seq)
+    common = _common_prefix(old_seq.replace("-", "").lower(), new_seq.replace("-", "").lower())
+    return old_gaps, new_res_before_gaps, len(new_seq), len(new_seq) - len(new_gaps), common
+
+
+def _old2new(feat, old_rec, new_rec, gapped_map=None):
     if feat.location.start == feat.location.end == 0:
         return feat
 
+    gapped_map = gapped_map if gapped_map else _gapped_map(old_rec, new_rec)
     if type(feat.location) == CompoundLocation:
         parts = []
         for part in feat.location.parts:
-            new_part = _old2new(SeqFeature(part), old_rec, new_rec)
+            new_part = _old2new(SeqFeature(part), old_rec, new_rec, gapped_map)
             if new_part:
                 parts.append(new_part.location)
         if len(parts) == 1:
@@ -581,40 +904,27 @@ def _old2new(feat, old_rec, new_rec):
         else:
             return None
     elif type(feat.location) == FeatureLocation:
+        old_gaps, new_res_before_gaps, new_len, new_residues, common = gapped_map
         if feat.location.start > feat.location.end:
-            start, end = feat.location.end, feat.location.start
+            start, end = int(feat.location.end), int(feat.location.start)
         else:
-            start, end = feat.location.start, feat.location.end
-        old_seq = str(old_rec.seq).lower()
-        new_seq = str(new_rec.seq).lower()
-        old_front_seq = old_seq[:start]
-        old_front_seq = re.sub("-", "", old_front_seq)
-        old_feat_seq = old_seq[start:end]
-        old_feat_seq = re.sub("-", "", old_feat_seq)
-        start, end = 0, 0
-        new_front_seq, new_feat_seq = "", ""
-        for indx, residue in enumerate(new_seq):
-            if residue == "-":
-                continue
+            start, end = int(feat.location.start), int(feat.location.end)
+        old_len = len(old_rec.seq)
+        start, end = min(start, old_len), min(end, old_len)
 
-            if not start:
-                if old_front_seq in ["", new_front_seq]:
-                    start = indx + 1
-                    new_feat_seq += residue
-                    if new_feat_seq == old_feat_seq:
-                        end = indx + 1
-                        break
-                else:
-                    new_front_seq += residue
-            else:
-                new_feat_seq += residue
-                if new_feat_seq == old_feat_seq:
-                    end = indx + 1
-                    break
-        start -= 1
-        if start == -1:
+        # Residues (not counting gaps) in front of the feature and under it in the old sequence
+        front = start - bisect_left(old_gaps, start)
+        length = end - bisect_left(old_gaps, end) - front
+
+        # The feature can only be placed if the residues in front of it are unchanged in the new sequence
+        if front >= new_residues or front > common:
             return None
-        end = end if end != 0 else len(new_seq)
+        start = front + bisect_right(new_res_before_gaps, front)
+        if length and front + length <= common:
+            last = front + length - 1
+            end = last + bisect_right(new_res_before_gaps, last) + 1
+        else:
+            end = new_len
         feat.location = FeatureLocation(start, end, feat.location.strand)
     else:
         raise TypeError("FeatureLocation or CompoundLocation object required.")
@@ -636,8 +946,9 @@ def remap_gapped_features(old_records, new_records):
             features.append(ungap_feature_ends(feat, old_rec))
         old_rec.features = features
         features = []
+        gapped_map = _gapped_map(old_rec, new_rec) if old_rec.features else None
         for feat in old_rec.features:
-            feat = _old2new(feat, old_rec, new_rec)
+            feat = _old2new(feat, old_rec, new_rec, gapped_map)
             if feat:
                 features.append(feat)
         new_rec.features = features
@@ -646,6 +957,8 @@ def remap_gapped_features(old_records, new_records):
 
 # #################################################### VARIABLES ##################################################### #
 
+NUMBER_RUNS = re.compile("([0-9]+)")  # Used by natural_sort_key()
+
 contributors = [Contributor("Stephen", "Bond", commits=720, github="https://github.com/biologyguy"),
                 Contributor("Karl", "Keat", commits=299, github="https://github.com/KarlKeat"),
                 Contributor("Jeremy", "Labarge", commits=25, github="https://github.com/biojerm")]
@@ -693,6 +1006,13 @@ sb_flags = {"annotate": {"flag": "ano",
                       "metavar": ("subject", "<blast params>"),
                       "help": "Search a BLAST database or subject sequence file with your query sequence file, "
                               "returning the full hits"},
+            "bootstrap": {"flag": "bts",
+                          "action": "append",
+                          "nargs": "?",
+                          "type": int,
+                          "metavar": "Num records (int)",
+                          "help": "Resample records with replacement. Optionally, pass in the number of records to "
+                                  "draw (default: as many as were input)"},
             "clean_seq": {"flag": "cs",
                           "action": "append",
                           "nargs": "*",
@@ -744,7 +1064,8 @@ sb_flags = {"annotate": {"flag": "ano",
                                "metavar": "args",
                                "help": "Remove records from a file (deleted IDs are sent to stderr). "
                                        "Regular expressions are understood, and an int as the final argument will"
-                                       "specify number of columns for deleted IDS"},
+                                       "specify number of columns for deleted IDS. Use 'file:<path>' to read "
+                                       "exact IDs from file"},
             "delete_repeats": {"flag": "drp",
                                "action": "append",
                                "nargs": "*",
@@ -762,13 +1083,18 @@ sb_flags = {"annotate": {"flag": "ano",
                                 "metavar": "positions",
                                 "help": "Pull out specific residues"},
             "find_CpG": {"flag": "fcpg",
-                         "action": "store_true",
-                         "help": "Predict regions under strong purifying selection based on high CpG content"},
+                         "action": "append",
+                         "nargs": "*",
+                         "metavar": ("[window size (int)]", "[min GC (float)] [min O/E (float)]"),
+                         "help": "Predict regions under strong purifying selection based on high CpG content. "
+                                 "Defaults: 200 0.5 0.6"},
             "find_pattern": {"flag": "fp",
                              "action": "store",
                              "nargs": "+",
                              "metavar": "<regex>",
-                             "help": "Search for subsequences, returning the start positions of all matches"},
+                             "help": "Search for subsequences, returning the start positions of all matches. "
+                                     "Use 'file:<path>' to read patterns from file (one per line, or FASTA). "
+                                     "Add 'ambig' to expand IUPAC codes and/or 'revcomp' to search both strands"},
             "find_repeats": {"flag": "frp",
                              "action": "append",
                              "nargs": "?",
@@ -783,7 +1109,7 @@ sb_flags = {"annotate": {"flag": "ano",
                                        "metavar": "",
                                        "help": "Identify restriction sites. Args: [enzymes "
                                                "{specific enzymes, commercial, all}], [Num cuts (int) [num cuts]], "
-                                               "[order {alpha, position}]"},
+                                               "[order {alpha, position}], ['table' (only output the sites)]"},
             "group_by_prefix": {"flag": "gbp",
                                 "action": "append",
                                 "nargs": "*",
@@ -875,6 +1201,14 @@ sb_flags = {"annotate": {"flag": "ano",
             "order_ids_randomly": {"flag": "oir",
                                    "action": "store_true",
                                    "help": "Randomly reorder the position of each record"},
+            "order_recs": {"flag": "or",
+                           "action": "append",
+                           "nargs": "+",
+                           "metavar": "args",
+                           "help": "Sort records by 'length', 'hash' (groups identical sequences), 'features' "
+                                   "(number of features), 'id', or the first capture group of a 'regex' applied to "
+                                   "ids. "
+                                   "Args: <mode> [regex] ['rev']"},
             "pull_random_record": {"flag": "prr",
                                    "action": "append",
                                    "nargs": "?",
@@ -891,12 +1225,14 @@ sb_flags = {"annotate": {"flag": "ano",
                              "action": "store",
                              "nargs": "+",
                              "metavar": "<regex>",
-                             "help": "Get all the records with ids containing a given string"},
+                             "help": "Get all the records with ids containing a given string. "
+                                     "Use 'file:<path>' to read exact IDs from file"},
             "purge": {"flag": "prg",
                       "action": "store",
-                      "metavar": "<Max BLAST score (int)>",
-                      "type": int,
-                      "help": "Delete sequences with high similarity"},
+                      "nargs": "+",
+                      "metavar": "<Max BLAST score (int)> ['greedy']",
+                      "help": "Delete sequences with high similarity. Pass in 'greedy' to cluster from the longest "
+                              "sequence down, instead of running a full all-by-all BLAST"},
             "rename_ids": {"flag": "ri",
                            "action": "append",
                            "metavar": "args",
@@ -928,15 +1264,28 @@ sb_flags = {"annotate": {"flag": "ano",
             "shuffle_seqs": {"flag": "ss",
                              "action": "store_true",
                              "help": "Randomly rearrange the residues in each record"},
+            "sim_ident": {"flag": "sid",
+                          "action": "append",
+                          "nargs": "*",
+                          "metavar": "args",
+                          "help": "Alignment-free all-by-all identity matrix from k-mer sketches. "
+                                  "Args: [kmer_size (int)] [sketch_size (int)]"},
             "transcribe": {"flag": "d2r",
                            "action": "store_true",
                            "help": "Convert DNA sequences to RNA"},
             "translate": {"flag": "tr",
-                          "action": "store_true",
-                          "help": "Convert coding sequences into amino acid sequences"},
+                          "action": "append",
+                          "nargs": "?",
+                          "type": int,
+                          "metavar": "ncbi_table",
+                          "help": "Convert coding sequences into amino acid sequences (default table: 1)"},
             "translate6frames": {"flag": "tr6",
-                                 "action": "store_true",
-                                 "help": "Translate nucleotide sequences into all six reading frames"},
+                                 "action": "append",
+                                 "nargs": "?",
+                                 "type": int,
+                                 "metavar": "ncbi_table",
+                                 "help": "Translate nucleotide sequences into all six reading frames "
+                                         "(default table: 1)"},
             "uppercase": {"flag": "uc",
                           "action": "store_true",
                           "help": "Convert all sequences to uppercase"}}
@@ -945,12 +1294,27 @@ sb_flags = {"annotate": {"flag": "ano",
 sb_modifiers = {"alpha": {"flag": "a",
                           "action": "store",
                           "help": "If you want the file read with a specific alphabet"},
+                "cores": {"flag": "x",
+                          "action": "store",
+                          "nargs": "?",
+                          "const": 0,
+                          "type": int,
+                          "metavar": "int",
+                          "help": "Spread records over a process pool for per-record tools (all cores if no number)"},
                 "in_format": {"flag": "f",
                               "action": "store",
                               "help": "If SeqBuddy can't guess the file format, just specify it directly"},
+                "index": {"flag": "ix",
+                          "action": "store_true",
+                          "help": "Build (or reuse) a byte offset index beside the input file (<file>.sbi), so "
+                                  "--num_seqs, --pull_records, and --pull_random_record only read what they need"},
                 "in_place": {"flag": "i",
                              "action": "store_true",
                              "help": "Rewrite the input file in-place. Be careful!"},
+                "low_memory": {"flag": "l",
+                               "action": "store_true",
+                               "help": "Only keep sequence digests in memory when looking for repeats "
+                                       "(works with -s for --find_repeats)"},
                 "out_format": {"flag": "o",
                                "metavar": "",
                                "action": "store",
@@ -963,6 +1327,16 @@ sb_modifiers = {"alpha": {"flag": "a",
                 "quiet": {"flag": "q",
                           "action": "store_true",
                           "help": "Suppress stderr messages"},
+                "seed": {"flag": "sd",
+                         "action": "store",
+                         "type": int,
+                         "metavar": "int",
+                         "help": "Seed the random number generator, so --pull_random_record, --bootstrap, "
+                                 "--shuffle_seqs, and --order_ids_randomly give reproducible results"},
+                "stream": {"flag": "s",
+                           "action": "store_true",
+                           "help": "Read, modify, and write one record at a time (for very large files). "
+                                   "Only applies to tools that work on records independently."},
                 "test": {"flag": "t",
                          "action": "store_true",
                          "help": "Run the function and return any stderr/stdout other than sequences"}}
@@ -997,7 +1371,8 @@ alb_flags = {"alignment_lengths": {"flag": "al",
                                 "nargs": "+",
                                 "action": "append",
                                 "metavar": "regex",
-                                "help": "Remove alignment rows with IDs that contain matches to the provided patterns"},
+                                "help": "Remove alignment rows with IDs that contain matches to the provided patterns. "
+                                        "Use 'file:<path>' to read exact IDs from file"},
              "enforce_triplets": {"flag": "et",
                                   "action": "store_true",
                                   "help": "Shift gaps so sequences are organized in triplets"},
@@ -1047,7 +1422,8 @@ alb_flags = {"alignment_lengths": {"flag": "al",
                               "nargs": "+",
                               "action": "append",
                               "metavar": "regex",
-                              "help": "Keep alignment rows with IDs that contains matches to the provided patterns"},
+                              "help": "Keep alignment rows with IDs that contains matches to the provided patterns. "
+                                      "Use 'file:<path>' to read exact IDs from file"},
              "rename_ids": {"flag": "ri",
                             "action": "append",
                             "metavar": "args",
@@ -1096,6 +1472,11 @@ alb_modifiers = {"in_format": {"flag": "f",
                  "quiet": {"flag": "q",
                            "action": "store_true",
                            "help": "Suppress stderr messages"},
+                 "seed": {"flag": "sd",
+                          "action": "store",
+                          "type": int,
+                          "metavar": "int",
+                          "help": "Seed the random number generator, so --bootstrap gives reproducible results"},
                  "test": {"flag": "t",
                           "action": "store_true",
                           "help": "Run the function and return any stderr/stdout other than sequences"}}
@@ -1145,7 +1526,8 @@ pb_flags = {"consensus_tree": {"flag": "ct",
                            "action": "append",
                            "nargs": "+",
                            "metavar": "Regex",
-                           "help": "Remove taxa with matching labels/IDs"},
+                           "help": "Remove taxa with matching labels/IDs. Use 'file:<path>' to read exact labels "
+                                   "from file"},
             "rename_ids": {"flag": "ri",
                            "action": "store",
                            "nargs": 2,
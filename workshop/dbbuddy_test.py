@@ -55,3 +55,78 @@ input_tuples = [(next_file, accession_types[indx]) for indx, next_file in enumer
 #@pytest.mark.parametrize("align_file,file_type", input_tuples)
 #def test_instantiate_dbbuddy_from_file(align_file, file_type):
 #    assert type(Db.DbBuddy(resource(align_file), _in_format=file_type)) == Db.DbBuddy
+
+
+# ######################  Database clients ###################### #
+class MockResponse(object):
+    def __init__(self, text):
+        self.text = text
+
+    def read(self):
+        return self.text.encode()
+
+
+def mock_uniprot(request):
+    url = request.full_url
+    if "format=list" in url:
+        return MockResponse("A1\nA2\n")
+    if "format=txt" in url:
+        records = ""
+        for accn in url.split("query=")[1].split("&")[0].split(","):
+            records += "ID   %s_HUMAN                Reviewed;         10 AA.\nAC   %s;\n" \
+                       "DE   RecName: Full=Pannexin;\n" \
+                       "OS   Homo sapiens.\nOX   NCBI_TaxID=9606;\nSQ   SEQUENCE   10 AA;  1111 MW;  A CRC64;\n" \
+                       "     MAAAAAAAAA\n//\n" % (accn, accn)
+        return MockResponse(records)
+    if "query=bad" in url:
+        raise Db.HTTPError(url, 500, "Internal Server Error", {}, None)
+    accn = "A1" if "query=panx1" in url else "A2"
+    return MockResponse("Entry\tEntry name\tLength\tOrganism ID\tOrganism\tProtein names\tComments\n"
+                        "%s\t%s_HUMAN\t100\t9606\tHomo sapiens\tPannexin\tFoo\n" % (accn, accn))
+
+
+def test_uniprot_search_proteins(monkeypatch):
+    monkeypatch.setattr(Db, "urlopen", mock_uniprot)
+    dbbuddy = Db.DbBuddy()
+    dbbuddy.search_terms = ["panx1", "panx2", "bad"]
+    client = Db.UniProtRestClient(dbbuddy)
+    client.search_proteins()
+    assert list(dbbuddy.records) == ["A1", "A2"]
+    assert dbbuddy.records["A2"].summary["entry_name"] == "A2_HUMAN"
+    assert [failure.query for failure in dbbuddy.failures.values()] == ["bad"]
+
+
+def test_uniprot_fetch_proteins(monkeypatch):
+    monkeypatch.setattr(Db, "urlopen", mock_uniprot)
+    dbbuddy = Db.DbBuddy()
+    dbbuddy.search_terms = ["panx1", "panx2"]
+    client = Db.UniProtRestClient(dbbuddy)
+    client.search_proteins()
+    client.max_url = 3  # One accession per request
+    client.fetch_proteins()
+    assert [str(rec.record.seq) for rec in dbbuddy.records.values()] == ["MAAAAAAAAA", "MAAAAAAAAA"]
+    assert [rec.record.id for rec in dbbuddy.records.values()] == ["A1", "A2"]
+
+
+def mock_ensembl(request):
+    url = request.full_url
+    if url.endswith("info/species"):
+        return MockResponse('{"species": [{"display_name": "Human", "taxon_id": "9606"}, '
+                            '{"display_name": "Mouse", "taxon_id": "10090"}]}')
+    if "/Mouse/" in url:
+        raise Db.HTTPError(url, 400, "Bad Request", {}, None)
+    return MockResponse('{"id": "ENSG01", "start": 1, "end": 101, "version": 2, "display_name": "PANX1", '
+                        '"species": "Human", "description": "Pannexin 1"}')
+
+
+def test_ensembl_search(monkeypatch):
+    monkeypatch.setattr(Db, "urlopen", mock_ensembl)
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)  # Species are searched in separate processes
+    dbbuddy = Db.DbBuddy()
+    dbbuddy.search_terms = ["panx1"]
+    client = Db.EnsemblRestClient(dbbuddy)
+    client.search_ensembl()
+    assert list(dbbuddy.records) == ["ENSG01"]
+    assert dbbuddy.records["ENSG01"].summary["organism-id"] == "9606"
+    with open(client.http_errors_file, "r") as ifile:
+        assert "Ensemble request failed. HTTP Error 400: Bad Request" in ifile.read()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This program is free software in the public domain as stipulated by the Copyright Law
+of the United States of America, chapter 1, subsection 105. You may modify it and/or redistribute it
+without restriction.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+name: myfuncs_test.py
+version: 1, alpha
+author: Stephen R. Bond
+email: steve.bond@nih.gov
+institute: Computational and Statistical Genomics Branch, Division of Intramural Research,
+           National Human Genome Research Institute, National Institutes of Health
+           Bethesda, MD
+repository: https://github.com/biologyguy/BuddySuite
+© license: None, this work is public domain
+
+Description: Collection of PyTest unit tests for the MyFuncs.py module
+"""
+
+import pytest
+import os
+import sys
+
+sys.path.insert(0, "./")
+import MyFuncs
+
+
+def double(num, args=None):
+    return num * 2 if not args else num * args[0]
+
+
+def get_pid(_):
+    return os.getpid()
+
+
+def fail_on_three(num):
+    if num == 3:
+        raise ValueError("Three is right out")
+    return num
+
+
+# ######################  'run_multicore_function' ###################### #
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_run_multicore_function_order(backend, monkeypatch):
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)  # Make sure there is a real pool, even on a single core
+    assert MyFuncs.run_multicore_function(list(range(50)), double, max_processes=3, quiet=True, backend=backend,
+                                          chunk_size=4) == [num * 2 for num in range(50)]
+    assert MyFuncs.run_multicore_function(list(range(50)), double, [3], max_processes=3, quiet=True,
+                                          backend=backend) == [num * 3 for num in range(50)]
+
+
+def test_run_multicore_function_dict(monkeypatch):
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)
+    jobs = {"a": 1, "b": 2, "c": 3}
+    assert MyFuncs.run_multicore_function(jobs, double, max_processes=2, quiet=True) == [2, 4, 6]
+
+
+def test_run_multicore_function_func_args():
+    with pytest.raises(SystemExit):
+        MyFuncs.run_multicore_function([1, 2, 3], double, func_args=3, quiet=True)
+
+
+def test_run_multicore_function_errors(capfd, monkeypatch):
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)
+    # A job that raises doesn't stop the others, its result is just None
+    for backend in ["process", "thread"]:
+        assert MyFuncs.run_multicore_function(list(range(6)), fail_on_three, max_processes=2, quiet=True,
+                                              backend=backend, chunk_size=1) == [0, 1, 2, None, 4, 5]
+        out, err = capfd.readouterr()
+        assert "ValueError: Three is right out" in err
+
+
+# ######################  'WorkerPool' ###################### #
+def test_workerpool_backend(monkeypatch):
+    with pytest.raises(ValueError) as e:
+        MyFuncs.WorkerPool(2, backend="foo")
+    assert "WorkerPool backend must be 'process' or 'thread', not 'foo'" in str(e)
+
+    # Threads are for I/O, so they aren't capped at the number of cores
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)
+    assert MyFuncs.WorkerPool(10, backend="thread").max_processes == 10
+    assert MyFuncs.WorkerPool(10, backend="process").max_processes == 4
+
+
+def test_workerpool_workers(monkeypatch):
+    monkeypatch.setattr(MyFuncs, "cpu_count", lambda: 4)
+    pids = MyFuncs.WorkerPool(2, backend="process", chunk_size=5).map(get_pid, list(range(20)))
+    assert os.getpid() not in pids
+    # Every chunk goes to a single worker
+    for indx in range(0, 20, 5):
+        assert len(set(pids[indx:indx + 5])) == 1
+
+    assert set(MyFuncs.WorkerPool(2, backend="thread").map(get_pid, list(range(20)))) == {os.getpid()}
+
+
+def test_workerpool_in_process():
+    # Nothing is farmed out if only one worker is asked for, or only one job is passed in
+    assert set(MyFuncs.WorkerPool(1).map(get_pid, list(range(10)))) == {os.getpid()}
+    assert MyFuncs.WorkerPool(4).map(get_pid, [1]) == [os.getpid()]
+
+
+def test_workerpool_lazy():
+    pulled = []
+
+    def jobs():
+        for num in range(1000):
+            pulled.append(num)
+            yield num
+
+    results = MyFuncs.WorkerPool(2, backend="thread", chunk_size=1).imap(double, jobs())
+    assert next(results) == 0
+    # Only a couple of chunks per worker should be pulled off of the iterable at any one time
+    assert len(pulled) <= 2 * 2 + 1
+    results.close()
+    assert len(pulled) < 1000
@@ -544,6 +544,18 @@ def test_prune_taxa(phylobuddy, next_hash):
     assert phylo_to_hash(phylobuddy) == next_hash
 
 
+def test_prune_taxa_batch():
+    id_file = MyFuncs.TempFile()
+    id_file.write("penSH30a\npenSH30b\n")
+    tester = pb_resources.get_one("o k")
+    labels = Pb.list_ids(Pb.make_copy(tester))
+    labels = [label for tree_labels in labels.values() for label in tree_labels]
+    Pb.prune_taxa(tester, "^firSA24a$", "SH3[12]", id_files=id_file.path)
+    remaining = Pb.list_ids(tester)
+    remaining = [label for tree_labels in remaining.values() for label in tree_labels]
+    assert sorted(set(labels) - set(remaining)) == ['firSA24a', 'penSH30a', 'penSH30b', 'penSH31a', 'penSH31b']
+
+
 # ######################  'ri', '--rename_ids' ###################### #
 hashes = ['6843a620b725a3a0e0940d4352f2036f', '543d2fc90ca1f391312d6b8fe896c59c', '6ce146e635c20ad62e21a1ed6fddbd3a',
           '4dfed97b2a23b8957ee5141bf4681fe4', '77d00fdc512fa09bd1146037d25eafa0', '9b1014be1b38d27f6b7ef73d17003dae']
@@ -844,6 +856,13 @@ def test_prune_taxa_ui(capsys):
     out, err = capsys.readouterr()
     assert string2hash(out) == "2a385fa95024323fea412fd2b3c3e91f"
 
+    id_file = MyFuncs.TempFile()
+    id_file.write("penSH30a\npenSH30b\n")
+    test_in_args.prune_taxa = [["file:%s" % id_file.path]]
+    Pb.command_line_ui(test_in_args, Pb.make_copy(pb_objects[1]), skip_exit=True)
+    out, err = capsys.readouterr()
+    assert "penSH30a" not in out and "penSH30b" not in out
+
 
 # ###################### 'ri', '--rename_ids' ###################### #
 def test_rename_ids_ui(capsys):
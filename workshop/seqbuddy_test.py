@@ -28,13 +28,15 @@ from hashlib import md5
 import os
 import re
 import sys
+import shutil
 import argparse
 import io
 from copy import deepcopy
 from collections import OrderedDict
+from subprocess import Popen, PIPE
 from unittest import mock
 
-from Bio.SeqFeature import FeatureLocation, CompoundLocation
+from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
 from Bio.Alphabet import IUPAC
 
 sys.path.insert(0, "./")
@@ -65,13 +67,8 @@ br.flags(parser, ("sequence", "Supply file path(s) or raw sequence. If piping se
                               "into SeqBuddy this argument can be left blank."),
          br.sb_flags, br.sb_modifiers, VERSION)
 
-# This is to allow py.test to work with the -x flag
-parser.add_argument("-x", nargs="?")
-parser.add_argument("-m", nargs="?")
-parser.add_argument("-n", nargs="?")
-parser.add_argument("--cov", nargs="?")
-parser.add_argument("--cov-report", nargs="?")
-in_args = parser.parse_args()
+# py.test's own flags (e.g., -x, -k, -m) collide with SeqBuddy's, so don't hand its command line over
+in_args, _ = parser.parse_known_args([])
 
 
 def seqs_to_hash(_seqbuddy, mode='hash'):
@@ -309,6 +306,177 @@ def test_to_string(capsys):
     assert str(tester) == "Error: No sequences in object.\n"
 
 
+def test_write_handle():
+    tester = Sb.SeqBuddy(resource("Mnemiopsis_cds.nex"))
+    handle = io.StringIO()
+    tester.write(handle)
+    assert handle.getvalue() == str(tester)
+
+    handle = io.StringIO()
+    tester.write(handle, out_format="clustal")
+    assert tester.out_format == "nexus"
+    assert handle.getvalue().endswith("-\n")
+    tester.out_format = "clustal"
+    assert handle.getvalue() == str(tester)
+
+    tester.out_format = "raw"
+    handle = io.StringIO()
+    tester.write(handle)
+    assert handle.getvalue() == str(tester)
+    assert handle.getvalue().count("\n\n") == 12
+
+
+# ##################### SeqBuddyStream ###################### ##
+@pytest.mark.parametrize("seq_file", sb_resources.get_list("d p f g", mode="paths"))
+def test_stream_matches_seqbuddy(seq_file):
+    tester = Sb.SeqBuddyStream(seq_file)
+    seqbuddy = Sb.SeqBuddy(seq_file)
+    assert tester.in_format == seqbuddy.in_format
+    assert tester.alpha == seqbuddy.alpha
+
+    tester = Sb.lowercase(Sb.uppercase(tester))
+    Sb.lowercase(Sb.uppercase(seqbuddy))
+    output = io.StringIO()
+    assert tester.write(output) == 13
+    assert output.getvalue() == str(seqbuddy)
+
+
+def test_stream_pipeline():
+    tester = Sb.SeqBuddyStream(resource("Mnemiopsis_rna.fa"))
+    tester = Sb.pull_recs(Sb.rna2dna(tester), "α[2-9]")
+    assert tester.alpha == IUPAC.ambiguous_dna
+    tester = Sb.translate_cds(tester)
+    assert tester.alpha == IUPAC.protein
+
+    seqbuddy = Sb.translate_cds(Sb.pull_recs(Sb.rna2dna(Sb.SeqBuddy(resource("Mnemiopsis_rna.fa"))), "α[2-9]"))
+    assert str(tester.to_seqbuddy()) == str(seqbuddy)
+
+    tester = Sb.SeqBuddyStream(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")))
+    Sb.delete_small(tester, 1285)
+    tester.out_format = "raw"
+    output = io.StringIO()
+    assert tester.write(output) == 4
+    assert output.getvalue() == str(Sb.delete_small(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb"), out_format="raw"), 1285))
+
+    with pytest.raises(TypeError):
+        Sb.complement(Sb.SeqBuddyStream(resource("Mnemiopsis_pep.fa")))
+
+
+def test_stream_unstreamable_format():
+    tester = Sb.SeqBuddyStream(resource("Mnemiopsis_cds.nex"))
+    assert not tester.streamable()
+    Sb.uppercase(tester)
+    output = io.StringIO()
+    assert tester.write(output) == 13
+    assert output.getvalue() == str(Sb.uppercase(Sb.SeqBuddy(resource("Mnemiopsis_cds.nex"))))
+
+    tester = Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa"), out_format="phylip-relaxed")
+    assert not tester.streamable()
+    assert tester.streamable("gb")
+    assert len(tester.to_seqbuddy().records) == 13
+
+
+# ##################### SeqIndex ###################### ##
+@pytest.mark.parametrize("seq_file", ["Mnemiopsis_cds.fa", "Mnemiopsis_pep.gb", "Mnemiopsis_cds.gb"])
+def test_seq_index(seq_file):
+    tmp_dir = MyFuncs.TempDir()
+    tmp_path = os.path.join(tmp_dir.path, seq_file)
+    shutil.copyfile(resource(seq_file), tmp_path)
+    seqbuddy = Sb.SeqBuddy(tmp_path)
+
+    tester = Sb.SeqIndex(tmp_path)
+    assert os.path.isfile("%s.sbi" % tmp_path)
+    assert tester.ids == [rec.id for rec in seqbuddy.records]
+    assert str(tester.to_seqbuddy(list(range(len(tester))))) == str(seqbuddy)
+    assert Sb.num_seqs(tester) == 13
+
+    rec_id = seqbuddy.records[3].id
+    assert rec_id in tester
+    assert str(tester.lookup([rec_id, "foo"])) == str(Sb.SeqBuddy(seqbuddy.records[3:4], seqbuddy.in_format))
+    assert len(Sb.pull_random_recs(tester, 5).records) == 5
+    assert str(Sb.pull_recs(Sb.SeqIndex(tmp_path), "α[2-4]")) == str(Sb.pull_recs(Sb.make_copy(seqbuddy), "α[2-4]"))
+
+    # Cached index is reused, and rebuilt once the file changes
+    with open("%s.sbi" % tmp_path, "r") as ifile:
+        cached = ifile.read()
+    assert Sb.SeqIndex(tmp_path).ids == tester.ids
+    seqbuddy.records = seqbuddy.records[:5]
+    seqbuddy.write(tmp_path)
+    tester = Sb.SeqIndex(tmp_path)
+    assert len(tester) == 5
+    with open("%s.sbi" % tmp_path, "r") as ifile:
+        assert ifile.read() != cached
+
+
+def test_seq_index_fastq():
+    tmp_file = MyFuncs.TempFile()
+    tmp_file.write("@seq1 first\nACGT\nAC\n+\n@@@@\n@@\n@seq2\n\n+\n\n@seq3\nTTTT\n+seq3\nIIII\n")
+    tester = Sb.SeqIndex(tmp_file.path, save=False)
+    assert not os.path.isfile("%s.sbi" % tmp_file.path)
+    assert tester.ids == ["seq1", "seq2", "seq3"]
+    assert str(tester.lookup(["seq3"]).records[0].seq) == "TTTT"
+    assert str(tester.to_seqbuddy([0]).records[0].seq) == "ACGTAC"
+
+    with pytest.raises(TypeError) as e:
+        Sb.SeqIndex(resource("Mnemiopsis_cds.nex"))
+    assert "Unable to index 'nexus' files" in str(e.value)
+
+
+# ##################### FastaRecord ###################### ##
+@pytest.mark.parametrize("seq_file", ["Mnemiopsis_cds.fa", "Mnemiopsis_pep.fa", "Mnemiopsis_rna.fa"])
+def test_fasta_record(seq_file):
+    seqbuddy = Sb.SeqBuddy(resource(seq_file))
+    tester = Sb._lite_seqbuddy(Sb._read_fasta_lite(resource(seq_file)))
+    assert type(tester.records[0]) == Sb.FastaRecord
+    assert tester.alpha == seqbuddy.alpha
+    assert str(tester) == str(seqbuddy)
+    assert Sb.num_seqs(tester) == 13
+    assert Sb.ave_seq_length(tester) == Sb.ave_seq_length(seqbuddy)
+    assert str(Sb.delete_small(Sb.make_copy(tester), 1285)) == str(Sb.delete_small(Sb.make_copy(seqbuddy), 1285))
+
+    Sb.count_residues(tester)
+    Sb.count_residues(seqbuddy)
+    assert tester.results.to_tsv() == seqbuddy.results.to_tsv()
+
+    rec = tester.records[0].to_seqrecord(tester.alpha)
+    assert type(rec) == Sb.SeqRecord
+    assert str(rec.seq) == str(seqbuddy.records[0].seq)
+    assert rec.seq.alphabet == seqbuddy.alpha
+
+    # Non-fasta output upgrades to full SeqRecords
+    tester.out_format = "gb"
+    seqbuddy.out_format = "gb"
+    assert str(tester) == str(seqbuddy)
+    assert type(tester.records[0]) == Sb.SeqRecord
+    assert tester.results.to_tsv() == seqbuddy.results.to_tsv()
+
+
+def test_fasta_record_public_api():
+    # FastaRecords handed to the SeqBuddy constructor are upgraded, so every tool can be used on them
+    tester = Sb.SeqBuddy(Sb._read_fasta_lite(resource("Mnemiopsis_cds.fa")), "fasta")
+    assert type(tester.records[0]) == Sb.SeqRecord
+    assert tester.records[0].seq.alphabet == tester.alpha == IUPAC.ambiguous_dna
+    assert str(Sb.reverse_complement(tester)) == str(Sb.reverse_complement(Sb.make_copy(sb_objects[0])))
+
+    tester = Sb.SeqBuddy(Sb._lite_seqbuddy(Sb._read_fasta_lite(resource("Mnemiopsis_pep.fa"))))
+    assert type(tester.records[0]) == Sb.SeqRecord
+    assert tester.records[0].seq.alphabet == IUPAC.protein
+
+
+def test_fasta_record_copy():
+    tester = Sb._lite_seqbuddy(Sb._read_fasta_lite(resource("Mnemiopsis_cds.fa")))
+    Sb.count_residues(tester)
+    copied = Sb.make_copy(tester)
+    assert str(copied) == str(tester)
+    copied.results.columns["res_count"][0] = None
+    assert copied.results.get(copied.records[0], "res_count") is None
+    assert tester.results.get(tester.records[0], "res_count")["A"] == [304, 0.25270157938487114]
+
+    copied.records[0].seq = "ACGT"
+    assert len(copied.records[0]) == 4
+    assert str(tester.records[0].seq) != "ACGT"
+
+
 # Now that we know that all the files are being turned into SeqBuddy objects okay, make them all objects so it doesn't
 # need to be done over and over for each subsequent test.
 sb_objects = [Sb.SeqBuddy(resource(x)) for x in seq_files]
@@ -347,6 +515,119 @@ def test_make_copy():
     assert seqs_to_hash(Sb.make_copy(sb_objects[0])) == seqs_to_hash(sb_objects[0])
 
 
+def test_shallow_copy():
+    tester = Sb.make_copy(sb_objects[1])
+    Sb._add_buddy_data(tester.records[0], "foo", "bar")
+    orig_hash = seqs_to_hash(tester)
+    sb_copy = Sb._shallow_copy(tester)
+    assert seqs_to_hash(sb_copy) == orig_hash
+    assert sb_copy.records[0].seq is tester.records[0].seq
+
+    # Changes to the copy must not leak back into the original
+    Sb.select_frame(sb_copy, 2)
+    Sb.clean_seq(sb_copy)
+    sb_copy.records[0].annotations["foo"] = "bar"
+    sb_copy.records[0].buddy_data["foo"] = "baz"
+    assert seqs_to_hash(tester) == orig_hash
+    assert "foo" not in tester.records[0].annotations
+    assert tester.records[0].buddy_data["foo"] == "bar"
+
+    # Results are carried over to the copies
+    Sb.find_cpg(tester)
+    sb_copy = Sb._shallow_copy(tester)
+    assert sb_copy.results.get(sb_copy.records[0], "cpgs") == tester.results.get(tester.records[0], "cpgs")
+    Sb.find_pattern(sb_copy, "ATG")
+    assert "find_patterns" not in tester.results
+
+    # Passing in records skips the record copies altogether
+    sb_copy = Sb._shallow_copy(tester, tester.records[:2])
+    assert len(sb_copy.records) == 2
+    assert sb_copy.records[0] is tester.records[0]
+
+
+# ######################  'ResultsTable' ###################### #
+def test_results_table():
+    tester = Sb.make_copy(sb_objects[0])
+    Sb.count_residues(tester)
+    Sb.find_cpg(tester)
+    table = tester.results
+    assert table.keys() == ["res_count", "cpgs"]
+    assert len(table) == 13 and "cpgs" in table
+    assert table.get(tester.to_dict()['Mle-Panxα6'], "res_count")["G"] == [265, 0.21703521703521703]
+    assert table.get(tester.records[0], "foo", "bar") == "bar"
+    assert list(table.buddy_data(tester.records[0]).keys()) == ["res_count", "cpgs"]
+    with pytest.raises(ValueError) as err:
+        table.add_column("foo", [1, 2])
+    assert "Column 'foo' has 2 values for 13 rows" in str(err)
+
+    # Results follow the records through filtering and reordering
+    first, last = tester.records[0], tester.records[-1]
+    Sb.delete_records(tester, first.id)
+    tester.records.reverse()
+    table = Sb._results(tester)
+    assert len(table) == 12 and table.get(first, "cpgs") is None
+    assert table.get(last, "res_count") == tester.results.get(tester.records[0], "res_count")
+
+    # Split and stitch back together, as _parallel() does
+    stitched = Sb.ResultsTable.concat([table.reindex(tester.records[:5]), table.reindex(tester.records[5:])])
+    assert stitched.to_tsv() == table.to_tsv()
+
+    # Nothing is written to the records until asked for
+    assert not hasattr(last, "buddy_data")
+    table.materialize()
+    assert last.buddy_data["res_count"] == table.get(last, "res_count")
+
+
+def test_results_table_to_tsv():
+    tester = Sb.SeqBuddy(">seq1\nATGCGCGC\n>seq2\nATGTTTATG\n", in_format="fasta")
+    Sb.find_pattern(tester, "ATG")
+    Sb.molecular_weight(tester)
+    assert tester.results.to_tsv() == """\
+#id\tfind_patterns:ATG\tmass_ss\tmass_ds
+seq1\t0\t2551.6\t5103.099999999999
+seq2\t0,6\t2884.8\t5716.5
+"""
+    assert tester.results.to_tsv(["mass_ss"]) == "#id\tmass_ss\nseq1\t2551.6\nseq2\t2884.8\n"
+
+
+# ######################  '_parallel' ###################### #
+def test_parallel():
+    serial = Sb.translate_cds(Sb.make_copy(sb_objects[1]), quiet=True)
+    tester = Sb.translate_cds(Sb.make_copy(sb_objects[1]), quiet=True, workers=2)
+    assert seqs_to_hash(tester) == seqs_to_hash(serial)
+    assert tester.alpha is IUPAC.protein
+    assert tester.records[0].seq.alphabet is IUPAC.protein
+
+    serial = Sb.find_restriction_sites(Sb.make_copy(sb_objects[1]))
+    tester = Sb.find_restriction_sites(Sb.make_copy(sb_objects[1]), workers=3)
+    assert seqs_to_hash(tester) == seqs_to_hash(serial)
+    assert str(tester.restriction_sites) == str(serial.restriction_sites)
+
+    serial = Sb.find_cpg(Sb.make_copy(sb_objects[1]))
+    tester = Sb.find_cpg(Sb.make_copy(sb_objects[1]), workers=0)
+    assert tester.results.to_tsv() == serial.results.to_tsv()
+
+    serial = Sb.find_pattern(Sb.make_copy(sb_objects[1]), "ATg{2}T", "tga.{1,6}tg")
+    tester = Sb.find_pattern(Sb.make_copy(sb_objects[1]), "ATg{2}T", "tga.{1,6}tg", workers=2)
+    assert seqs_to_hash(tester) == seqs_to_hash(serial)
+    assert tester.results.to_tsv() == serial.results.to_tsv()
+
+    tester = Sb.isoelectric_point(Sb.make_copy(sb_objects[7]), workers=2)
+    assert seqs_to_hash(tester) == seqs_to_hash(Sb.isoelectric_point(Sb.make_copy(sb_objects[7])))
+
+    # A single record is never worth a pool
+    tester = Sb.SeqBuddy(">seq1\nATGAAATGA", in_format="fasta")
+    assert str(Sb.translate_cds(tester, workers=4).records[0].seq) == "MK*"
+
+
+def test_restore_alphabet():
+    from pickle import dumps, loads
+    for alpha in [IUPAC.protein, IUPAC.ambiguous_dna, IUPAC.unambiguous_dna, IUPAC.ambiguous_rna]:
+        assert loads(dumps(alpha)) is not alpha
+        assert Sb._restore_alphabet(loads(dumps(alpha))) is alpha
+    assert Sb._restore_alphabet("foo") == "foo"
+
+
 # ######################  '_check_for_blast_bin' ###################### #
 @pytest.mark.internet
 @pytest.mark.slow
@@ -450,6 +731,54 @@ def test_guess_format():
     assert not Sb._guess_format(temp_file.path)
 
 
+def test_guess_format_reads_head_only():
+    class CountingIO(io.StringIO):
+        chars_read = 0
+
+        def read(self, size=-1):
+            output = io.StringIO.read(self, size)
+            self.chars_read += len(output)
+            return output
+
+    with open(resource("Mnemiopsis_cds.fa"), "r") as ifile:
+        fasta = ifile.read()
+    # Tack some garbage onto the end; if the whole file was being parsed this would no longer be fasta
+    tester = CountingIO(fasta * 500 + "\nfoo bar baz\n")
+    assert Sb._guess_format(tester) == "fasta"
+    assert tester.chars_read < 200000
+    assert tester.tell() == 0
+
+    with open(resource("Mnemiopsis_cds.gb"), "r") as ifile:
+        tester = CountingIO(ifile.read() * 100)
+    assert Sb._guess_format(tester) == "gb"
+    assert tester.chars_read < 200000
+
+    tester = CountingIO("Lorem ipsum dolor sit amet\n" * 50000)
+    assert not Sb._guess_format(tester)
+    assert tester.chars_read < 200000
+
+
+def test_guess_format_large_phylip():
+    # Phylip flavours can only be told apart by parsing the records, so the whole first alignment is read, however big
+    seq = "ACGT" * 650000
+    tester = io.StringIO(" 8 %s\n%s" % (len(seq), "".join(["Seq%s      %s\n" % (indx, seq) for indx in range(8)])))
+    assert Sb._guess_format(tester) == "phylipss"
+    assert tester.tell() == 0
+
+
+# ######################  '_read_fasta_lite' ###################### #
+def test_read_fasta_lite():
+    temp_file = MyFuncs.TempFile()
+    assert Sb._read_fasta_lite(temp_file.path) == []
+
+    temp_file.write("Some comment\n>Seq1 foo bar\nAC GT\r\nTT\n>Seq2\n>Seq3\nAAA")
+    tester = Sb._read_fasta_lite(temp_file.path)
+    assert [(rec.id, rec.description, rec.seq) for rec in tester] == [("Seq1", "Seq1 foo bar", "ACGTTT"),
+                                                                       ("Seq2", "Seq2", ""), ("Seq3", "Seq3", "AAA")]
+    assert type(tester[0]._seq) == memoryview
+    assert len(tester[0]) == 6
+
+
 # ######################  '_stdout and _stderr' ###################### #
 def test_stdout(capsys):
     Sb._stdout("Hello std_out", quiet=False)
@@ -471,6 +800,40 @@ def test_stderr(capsys):
     assert err == ""
 
 
+# ######################  'FeatureReMapper' ###################### #
+def test_feature_remapper():
+    old_rec = Sb.SeqRecord(Sb.Seq("ACGTACGTAC"), id="Seq1")
+    def features():
+        return [SeqFeature(FeatureLocation(0, 6, strand=-1), type="gene"),
+                SeqFeature(FeatureLocation(2, 4), type="removed"),
+                SeqFeature(CompoundLocation([FeatureLocation(1, 3), FeatureLocation(7, 10)]), type="CDS")]
+
+    old_rec.features = features()
+    new_rec = Sb.SeqRecord(Sb.Seq("ACACGTC"), id="Seq1")
+
+    Sb.FeatureReMapper(old_rec, b"\x01\x01\x00\x00\x01\x01\x01\x01\x00\x01").remap_features(new_rec)
+    assert [str(feat.location) for feat in new_rec.features] == ["[0:4](-)", "order{[1:2], [5:7]}"]
+
+    position_map = Sb.FeatureReMapper(old_rec)
+    for exists in [True, True, False, False, True, True, True, True, False]:
+        position_map.extend(exists)
+    with pytest.raises(AttributeError) as e:
+        position_map.remap_features(new_rec)
+    assert "The position map has not been fully populated." in str(e)
+    position_map.extend(True)
+    with pytest.raises(AttributeError) as e:
+        position_map.extend(True)
+    assert "The position map has already been fully populated." in str(e)
+    new_rec.features = []
+    old_rec.features = features()
+    position_map.remap_features(new_rec)
+    assert [str(feat.location) for feat in new_rec.features] == ["[0:4](-)", "order{[1:2], [5:7]}"]
+
+    with pytest.raises(AttributeError) as e:
+        Sb.FeatureReMapper(old_rec, [True, False])
+    assert "The keep mask is 2 long, but the sequence is 10." in str(e)
+
+
 # ################################################ MAIN API FUNCTIONS ################################################ #
 # ##################### '-ano', '--annotate' ###################### ##
 def test_annotate_pattern():
@@ -646,6 +1009,49 @@ def test_bl2seq():
     assert string2hash(str(result)) == '248d4c53d7947c4c8dfd7c415bfbfbf2'
 
 
+def mock_blast_bins(*binaries):
+    bin_dir = MyFuncs.TempDir()
+    for binary in binaries:
+        with open("%s/%s" % (bin_dir.path, binary), "w") as ofile:
+            ofile.write('#!/bin/sh\nexec "%s" "%s" %s "$@"\n' % (sys.executable, resource("blast/mock_blast.py"),
+                                                                 binary))
+        os.chmod("%s/%s" % (bin_dir.path, binary), 0o755)
+    return bin_dir
+
+
+def test_bl2seq_mock_blast():
+    for seqbuddy in [sb_objects[0], sb_objects[6]]:
+        bin_dir = mock_blast_bins("makeblastdb", "blastn", "blastp")
+        with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+            db_result = Sb.bl2seq(Sb.make_copy(seqbuddy))
+
+        # Without makeblastdb every pair is blasted on its own, which must give the same answer
+        bin_dir = mock_blast_bins("blastn", "blastp")
+        with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+            pair_result = Sb.bl2seq(Sb.make_copy(seqbuddy))
+
+        assert str(db_result) == str(pair_result)
+        assert len(db_result) == len(seqbuddy.records)
+        assert all([len(matches) == len(seqbuddy.records) - 1 for rec_id, matches in db_result.items()])
+        assert [x for matches in db_result.values() for x in matches.values() if x[0]]
+
+
+def test_bl2seq_mock_blast_errors():
+    bin_dir = mock_blast_bins("makeblastdb", "blastn", "blastp")
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+        expected = Sb.bl2seq(Sb.make_copy(sb_objects[0]))
+
+    # A broken makeblastdb falls back on the pairwise searches
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path, "MOCK_BLAST_FAIL": "makeblastdb"}):
+        assert str(Sb.bl2seq(Sb.make_copy(sb_objects[0]))) == str(expected)
+
+    # But a failed blast run is an error, not a table full of zeros
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path, "MOCK_BLAST_FAIL": "blastn"}):
+        with pytest.raises(RuntimeError) as e:
+            Sb.bl2seq(Sb.make_copy(sb_objects[0]))
+    assert "blastn failed with exit code 1. BLAST engine error: Mock failure" in str(e.value)
+
+
 def test_bl2_no_binary():
     # noinspection PyUnresolvedReferences
     with mock.patch.dict(os.environ, {"PATH": ""}):
@@ -696,6 +1102,25 @@ def test_blastp():
         assert 'blastp not found in system path' in str(e.value)
 
 
+def test_blast_mock_blast():
+    bin_dir = mock_blast_bins("makeblastdb", "blastdbcmd", "blastp")
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+        subject = Sb.pull_recs(Sb.make_copy(sb_objects[6]), "Mle-Panxα[89]", True)
+        tester = Sb.blast(subject, Sb.make_copy(sb_objects[6]), quiet=True)
+
+    # Each hit is only pulled from the database once, in the order it was first seen
+    assert [rec.id for rec in tester.records] == ['Mle-Panxα9', 'Mle-Panxα8', 'Mle-Panxα12', 'Mle-Panxα6']
+    assert "lcl|" not in str(tester)
+    originals = Sb.SeqBuddy(resource(seq_files[6])).to_dict()
+    assert [str(rec.seq) for rec in tester.records] == [str(originals[rec.id].seq).upper() for rec in tester.records]
+
+    # A failed entry lookup is an error, rather than an empty or partial set of hits
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path, "MOCK_BLAST_FAIL": "blastdbcmd"}):
+        with pytest.raises(RuntimeError) as e:
+            Sb.blast(subject, Sb.make_copy(sb_objects[6]), quiet=True)
+        assert "blastdbcmd failed with exit code 1. BLAST engine error: Mock failure" in str(e)
+
+
 # ######################  '-cs', '--clean_seq'  ###################### #
 def test_clean_seq():
     # Protein
@@ -730,6 +1155,28 @@ def test_clean_seq():
         tester = Sb.clean_seq(Sb.make_copy(tester))
         seqs_to_hash(tester) == "aa92396a9bb736ae6a669bdeaee36038"
 
+
+def test_clean_seq_features():
+    # Features are left alone if nothing was removed
+    tester = Sb.make_copy(sb_objects[1])
+    locations = [str(feat.location) for feat in tester.records[0].features]
+    Sb.clean_seq(tester)
+    assert [str(feat.location) for feat in tester.records[0].features] == locations
+
+    # Removed characters shift the features, whether or not ambiguous residues are being replaced
+    for ambiguous in [True, False]:
+        tester = Sb.SeqBuddy([Sb.SeqRecord(Sb.Seq("AC*GTR-RT.A", alphabet=IUPAC.ambiguous_dna), id="Seq1")])
+        tester.records[0].features = [SeqFeature(FeatureLocation(3, 9, strand=1), type="gene"),
+                                      SeqFeature(FeatureLocation(9, 11, strand=1), type="end")]
+        Sb.clean_seq(tester, ambiguous=ambiguous)
+        assert str(tester.records[0].seq) == ("ACGTRRTA" if ambiguous else "ACGTNNTA")
+        assert [str(feat.location) for feat in tester.records[0].features] == ["[2:7](+)", "[7:8](+)"]
+
+    # Skip list characters are taken literally, not as a regex character class
+    tester = Sb.SeqBuddy([Sb.SeqRecord(Sb.Seq("AC*G-T.A^", alphabet=IUPAC.ambiguous_dna), id="Seq1")])
+    Sb.clean_seq(tester, skip_list="-.^")
+    assert str(tester.records[0].seq) == "ACG-T.A^"
+
 # ######################  '-cmp', '--complement' ###################### #
 hashes = ["e4a358ca57aca0bbd220dc6c04c88795", "3366fcc6ead8f1bba4a3650e21db4ec3",
           "365bf5d08657fc553315aa9a7f764286", "520036b49dd7c70b9dbf4ce4d2c0e1d8",
@@ -771,6 +1218,16 @@ def test_concat_seqs_clean():
 
 
 # ##################### '-cc', 'count_codons' ###################### ##
+def test_composition():
+    residues, codons = Sb._composition("atgAAAtgaNN")
+    assert residues == {"A": 5, "T": 2, "G": 2, "N": 2}
+    assert codons is None
+
+    residues, codons = Sb._composition("atgAAAtgaNN", codons=True)
+    assert residues == {"A": 5, "T": 2, "G": 2, "N": 2}
+    assert codons == {"ATG": 1, "AAA": 1, "TGA": 1}
+
+
 def test_count_codons_dna():
     tester = Sb.make_copy(sb_objects[0])
     tester.records[0].seq = tester.records[0].seq[:-4]
@@ -799,26 +1256,26 @@ def test_count_codons_pep_exception():
 def test_count_residues():
     # Unambiguous DNA
     tester = Sb.SeqBuddy(">seq1\nACGCGAAGCGAACGCGCAGACGACGCGACGACGACGACGCA", in_format="fasta")
-    tester = Sb.count_residues(tester).to_dict()
-    assert tester["seq1"].buddy_data["res_count"]['A'] == [13, 0.3170731707317073]
+    tester = Sb.count_residues(tester)
+    assert tester.results.get(tester.records[0], "res_count")['A'] == [13, 0.3170731707317073]
 
     tester = Sb.make_copy(sb_objects[0])
     Sb.count_residues(tester)
-    res_count = tester.to_dict()['Mle-Panxα6'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα6'], "res_count")
     assert res_count['G'] == [265, 0.21703521703521703]
     assert "% Ambiguous" not in res_count and "U" not in res_count
 
     # Unambiguous RNA
     Sb.dna2rna(tester)
     Sb.count_residues(tester)
-    res_count = tester.to_dict()['Mle-Panxα6'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα6'], "res_count")
     assert res_count['U'] == [356, 0.2915642915642916]
     assert "% Ambiguous" not in res_count and "T" not in res_count
 
     # Ambiguous DNA
     tester = Sb.make_copy(sb_objects[12])
     Sb.count_residues(tester)
-    res_count = tester.to_dict()['Mle-Panxα6'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα6'], "res_count")
     assert "U" not in res_count
     assert res_count['Y'] == [1, 0.000819000819000819]
     assert res_count['% Ambiguous'] == 0.98
@@ -826,7 +1283,7 @@ def test_count_residues():
     # Ambiguous RNA
     tester = Sb.make_copy(sb_objects[13])
     Sb.count_residues(tester)
-    res_count = tester.to_dict()['Mle-Panxα6'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα6'], "res_count")
     assert "T" not in res_count
     assert res_count['U'] == [353, 0.2891072891072891]
     assert res_count["Y"] == [1, 0.000819000819000819]
@@ -835,11 +1292,11 @@ def test_count_residues():
     # Protein
     tester = Sb.make_copy(sb_objects[6])
     Sb.count_residues(tester)
-    res_count = tester.to_dict()['Mle-Panxα6'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα6'], "res_count")
     assert res_count['P'] == [17, 0.04176904176904177]
     assert res_count["G"] == [23, 0.056511056511056514]
     assert "% Ambiguous" not in res_count
-    res_count = tester.to_dict()['Mle-Panxα8'].buddy_data["res_count"]
+    res_count = tester.results.get(tester.to_dict()['Mle-Panxα8'], "res_count")
     assert res_count["% Ambiguous"] == 1.2
     assert res_count["% Positive"] == 12.23
     assert res_count["% Negative"] == 12.71
@@ -934,7 +1391,7 @@ def test_delete_records2():
 
     with pytest.raises(ValueError) as e:
         Sb.delete_records(Sb.make_copy(sb_objects[0]), dict)
-    assert "'patterns' must be a list or a string." in str(e.value)
+    assert "'patterns' must be a list, a string, or a br.PatternFilter object." in str(e.value)
 
 
 # #####################  '-drp', '--delete_repeats' ###################### ##
@@ -945,6 +1402,12 @@ def test_delete_repeats():
     assert len(tester.repeat_ids) == 0
     assert len(tester.repeat_seqs) == 0
 
+    tester = Sb.SeqBuddy(">Seq1\nAAAA\n>Seq2\nCCCC\n>Seq1\nGGGG\n>Seq3\nCCCC\n", in_format="fasta")
+    Sb.delete_repeats(tester, scope="ids")
+    assert [(rec.id, str(rec.seq)) for rec in tester.records] == [("Seq2", "CCCC"), ("Seq3", "CCCC"), ("Seq1", "AAAA")]
+    Sb.delete_repeats(tester, scope="seqs")
+    assert [rec.id for rec in tester.records] == ["Seq3", "Seq1"]
+
 
 # ######################  '-ds', '--delete_small' ###################### #
 def test_delete_small():
@@ -1006,14 +1469,84 @@ def test_find_cpg():
     assert seqs_to_hash(tester) == "9499f524da0c35a60502031e94864928"
 
 
+def test_find_cpg_window_and_stream():
+    tester = Sb.find_cpg(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")), window_size=100, min_gc=.55)
+    assert tester.results.get(tester.records[0], "cpgs") == [(989, 1203)]
+    assert tester.records[0].features[0].location.start == 989
+
+    tester = Sb.find_cpg(Sb.SeqBuddy(">seq1\nATATATATATCGCGCGCGCGCGCGATATATATAT", in_format="fasta"), window_size=10)
+    assert tester.results.get(tester.records[0], "cpgs") == [(10, 24)]
+    assert str(tester.records[0].seq) == "atatatatatCGCGCGCGCGCGCGAtatatatat"
+
+    stream = Sb.find_cpg(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.gb")))
+    tester = Sb.find_cpg(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")))
+    tester.results.materialize()
+    assert [rec.buddy_data["cpgs"] for rec in stream] == [rec.buddy_data["cpgs"] for rec in tester.records]
+
+    with pytest.raises(ValueError) as e:
+        Sb.find_cpg(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")), window_size=0)
+    assert "window_size must be at least 1" in str(e)
+
+    with pytest.raises(ValueError) as e:
+        Sb.find_cpg(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")), min_oe=-1)
+    assert "can not be negative" in str(e)
+
+
 # #####################  '-fp', '--find_pattern' ###################### ##
 def test_find_pattern():
     tester = Sb.find_pattern(Sb.make_copy(sb_objects[1]), "ATGGT")
-    assert seqs_to_hash(tester) == "a2e110d3ba14ea5d1b236a8abef7341a"
+    assert seqs_to_hash(tester) == "556f9cd96a49ef2ad452e85c774a0f75"
     tester = Sb.find_pattern(Sb.make_copy(sb_objects[1]), "ATg{2}T")
-    assert seqs_to_hash(tester) == "c8a3e2e8b97f47c5cc41f04a44243e34"
+    assert seqs_to_hash(tester) == "ddc15945095d1861a7d1506b2ada158a"
     tester = Sb.find_pattern(Sb.make_copy(sb_objects[1]), "ATg{2}T", "tga.{1,6}tg")
-    assert seqs_to_hash(tester) == "0e11b2c0e9451fbfcbe39e3b5be2cf60"
+    assert seqs_to_hash(tester) == "93fa8aa3581d5e129d4b013436f87a8c"
+
+    # Matches no longer eat the residues on either side of them
+    tester = Sb.find_pattern(Sb.SeqBuddy(">seq1\nccATGGcATGGcc", in_format="fasta"), "ATGG")
+    assert str(tester.records[0].seq) == "ccATGGcATGGcc"
+    assert tester.results.get(tester.records[0], "find_patterns") == OrderedDict([("ATGG", [2, 7])])
+
+
+def test_find_pattern_ambig_revcomp():
+    tester = Sb.SeqBuddy(">seq1\nttATGGATAGccCCATaaaa", in_format="fasta")
+    Sb.find_pattern(tester, "ATRG", "aa", ambig=True)
+    assert str(tester.records[0].seq) == "ttATGGATAGccccatAAAA"
+    assert tester.results.get(tester.records[0], "find_patterns") == OrderedDict([("ATRG", [2, 6]), ("aa", [16, 18])])
+
+    tester = Sb.SeqBuddy(">seq1\nttATGGATAGccCCATaaaa", in_format="fasta")
+    Sb.find_pattern(tester, "ATGG", "ATRG", "AT.G", include_rc=True)
+    assert tester.results.get(tester.records[0], "find_patterns") == \
+        OrderedDict([("ATGG", [2, 12]), ("ATRG", []), ("AT.G", [2, 6, 12])])
+    assert [(feat.qualifiers["regex"], int(feat.location.start), feat.location.strand)
+            for feat in tester.records[0].features] == [("ATGG", 2, None), ("ATGG", 12, -1), ("AT.G", 2, None),
+                                                        ("AT.G", 6, None), ("AT.G", 12, -1)]
+
+    # Motifs with too many degenerate variants fall back on a regex
+    tester = Sb.SeqBuddy(">seq1\nttATGGATAGccCCATaaaa", in_format="fasta")
+    Sb.find_pattern(tester, "ATNNNNNNNNNNNNNNNNNNNNNNNG", "ATNNNNNNC", ambig=True)
+    assert tester.results.get(tester.records[0], "find_patterns") == \
+        OrderedDict([("ATNNNNNNNNNNNNNNNNNNNNNNNG", []), ("ATNNNNNNC", [2])])
+
+    # RNA
+    tester = Sb.SeqBuddy(">seq1\nuuAUGGAUAGccCCAUaaaa", in_format="fasta")
+    Sb.find_pattern(tester, "AUGG", "AYRG", ambig=True, include_rc=True)
+    assert tester.results.get(tester.records[0], "find_patterns") == \
+        OrderedDict([("AUGG", [2, 12]), ("AYRG", [2, 6, 12])])
+
+    with pytest.raises(TypeError) as err:
+        Sb.find_pattern(Sb.make_copy(sb_objects[6]), "MKV", include_rc=True)
+    assert "Nucleic acid sequence required, not protein." in str(err)
+
+
+def test_pattern_set():
+    pattern_set = Sb.PatternSet(["he", "she", "his", "hers", "h.s", "she"])
+    assert pattern_set.patterns == ["he", "she", "his", "hers", "h.s"]
+    hits = pattern_set.search("ushers hishe")
+    assert [[start for start, end, strand in pattern_hits] for pattern_hits in hits] == [[2, 10], [1, 9], [7], [2], [7]]
+
+    # Overlapping hits of a single motif are thinned out, same as re.finditer()
+    assert Sb.PatternSet(["aa"]).search("aaaaa") == [[(0, 2, 1), (2, 4, 1)]]
+    assert Sb.PatternSet(["aa"], include_rc=True).search("ttttt") == [[(1, 3, -1), (3, 5, -1)]]
 
 
 # #####################  '-frp', '--find_repeats' ###################### ##
@@ -1027,6 +1560,31 @@ def test_find_repeats():
     for key in tester.repeat_seqs:
         assert 'Seq12' in tester.repeat_seqs[key] or 'Seq10A' in tester.repeat_seqs[key]
 
+    low_mem = Sb.find_repeats(Sb.SeqBuddy(resource("Duplicate_seqs.fa")), low_memory=True)
+    assert list(low_mem.unique_seqs) == list(tester.unique_seqs)
+    assert list(low_mem.repeat_ids) == list(tester.repeat_ids)
+    assert low_mem.repeat_seqs == tester.repeat_seqs
+    assert low_mem.repeat_clusters == tester.repeat_clusters
+    assert type(low_mem.repeat_ids['Seq12'][0]) == str
+
+    for seq, indices in tester.repeat_clusters.items():
+        assert len(indices) > 1
+        assert len(set([str(tester.records[indx].seq) for indx in indices])) == 1
+
+
+def test_find_repeats_normalized():
+    tester = Sb.SeqBuddy(">Seq1\nAC-GT\n>Seq2\nacgt\n>Seq3\nACGT\n>Seq4\nACGT\n", in_format="fasta")
+    Sb.find_repeats(tester)
+    assert list(tester.repeat_clusters.values()) == [[2, 3]]
+    Sb.find_repeats(tester, ignore_gaps=True)
+    assert list(tester.repeat_clusters.values()) == [[0, 2, 3]]
+    Sb.find_repeats(tester, ignore_case=True, ignore_gaps=True)
+    assert list(tester.repeat_clusters.values()) == [[0, 1, 2, 3]]
+    assert sorted(list(tester.repeat_seqs.values())[0]) == ["Seq1", "Seq2", "Seq3", "Seq4"]
+
+    Sb.delete_repeats(tester, ignore_case=True, ignore_gaps=True)
+    assert len(tester.records) == 1
+
 
 # ######################  '-frs', '--find_restriction_sites' ###################### #
 def test_restriction_sites(capsys):
@@ -1063,6 +1621,31 @@ def test_restriction_sites(capsys):
     assert "Warning: No-cutters not supported." in err
 
 
+def test_restriction_sites_batch():
+    # Enzyme groups are only filtered once
+    with_features = Sb.find_restriction_sites(Sb.make_copy(sb_objects[1]))
+    batch = Sb.RESTRICTION_BATCHES["commercial"]
+    assert not [enzyme for enzyme in batch if str(enzyme) in Sb.RESTRICTION_BLACKLIST]
+    tester = Sb.find_restriction_sites(Sb.make_copy(sb_objects[1]), features=False)
+    assert Sb.RESTRICTION_BATCHES["commercial"] is batch
+
+    # Same sites as with features, but the records are left alone
+    assert str(tester.restriction_sites) == str(with_features.restriction_sites)
+    assert seqs_to_hash(tester) == seqs_to_hash(sb_objects[1])
+    assert tester.results.get(tester.records[0], "res_sites") == tester.restriction_sites[0][1]
+
+    # The single pass scan agrees with Bio.Restriction, including sites with wildcards and odd enzymes
+    tester = Sb.SeqBuddy(">seq1\nGGTCTCAAGAATTCGCCAAGTGGCAGATCGGTCTCAGGAGACCTTGAGACCAGGATAG\n"
+                         ">seq2\nGGTCTCAAGAATTCGCCNAGTGGCAGATCGGTCTCAGGAGACCTTGAGACCAGGATAG", in_format="fasta")
+    enzymes = ["BsaI", "EcoRI", "BglI", "TasI", "Bme1390I", "HpyUM037X", "BsrI"]
+    Sb.find_restriction_sites(tester, enzymes, features=False)
+    for rec, (rec_id, res_sites) in zip(tester.records, tester.restriction_sites):
+        analysis = Sb.Analysis(Sb.RestrictionBatch(enzymes), rec.seq).with_sites()
+        assert res_sites == OrderedDict(sorted(analysis.items(), key=lambda x: x[0]))
+    assert str(tester.restriction_sites[0][1]) == "OrderedDict([(TasI, [10]), (Bme1390I, [52]), " \
+                                                  "(BsaI, [8, 33, 37, 41]), (EcoRI, [10])])"
+
+
 # ######################  '-hsi', '--hash_sequence_ids' ###################### #
 def test_hash_seq_ids():
     tester = Sb.SeqBuddy(Sb.make_copy(sb_objects[0]))
@@ -1427,6 +2010,72 @@ def test_order_ids_randomly2():
     assert seqs_to_hash(tester) == seqs_to_hash(Sb.order_ids_randomly(tester))
 
 
+def test_order_ids_randomly_seed():
+    tester1 = Sb.order_ids_randomly(Sb.make_copy(sb_objects[0]), seed=3)
+    tester2 = Sb.order_ids_randomly(Sb.make_copy(sb_objects[0]), seed=3)
+    assert [rec.id for rec in tester1.records] == [rec.id for rec in tester2.records]
+    assert [rec.id for rec in tester1.records] != [rec.id for rec in sb_objects[0].records]
+
+
+# ######################  '-or', '--order_recs' ###################### #
+def test_order_recs():
+    tester = Sb.SeqBuddy(resource("Mnemiopsis_cds.fa"))
+    Sb.order_recs(tester, "length")
+    lengths = [len(rec.seq) for rec in tester.records]
+    assert lengths == sorted(lengths)
+    Sb.order_recs(tester, "length", reverse=True)
+    assert [len(rec.seq) for rec in tester.records] == sorted(lengths, reverse=True)
+
+    # Identical sequences end up next to each other
+    tester = Sb.SeqBuddy(Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")).records * 2)
+    Sb.order_recs(tester, "hash")
+    assert [rec.id for rec in tester.records][::2] == [rec.id for rec in tester.records][1::2]
+
+    tester = Sb.SeqBuddy(resource("Mnemiopsis_cds.gb"))
+    Sb.order_recs(tester, "features")
+    assert [len(rec.features) for rec in tester.records] == sorted([len(rec.features) for rec in tester.records])
+
+    # Sort on a number buried in the id, and anything that doesn't match goes to the end
+    tester = Sb.SeqBuddy(resource("Mnemiopsis_cds.fa"))
+    Sb.rename(tester, "Mle-Panxα4", "Mle-Panx-4")
+    Sb.order_recs(tester, "regex", regex="α([0-9]+)")
+    assert [rec.id for rec in tester.records][:4] == ["Mle-Panxα1", "Mle-Panxα2", "Mle-Panxα3", "Mle-Panxα5"]
+    assert tester.records[-1].id == "Mle-Panx-4"
+
+    with pytest.raises(ValueError) as e:
+        Sb.order_recs(tester, "foo")
+    assert "Unknown sort mode 'foo'" in str(e)
+
+    with pytest.raises(ValueError) as e:
+        Sb.order_recs(tester, "regex")
+    assert "A regular expression is required" in str(e)
+
+    with pytest.raises(ValueError) as e:
+        Sb.order_recs(tester, "regex", regex="α([0-9]+")
+    assert "Invalid regular expression 'α([0-9]+': missing ), unterminated subpattern" in str(e)
+
+
+def test_order_ids_natural():
+    tester = Sb.SeqBuddy(">Seq10\nA\n>seq3\nA\n>Seq2b1\nA\n>Seq2b10\nA\n>Seq2b9\nA\n>Seq\nA\n>Seq-1\nA\n>Seq02\nA\n",
+                         in_format="fasta")
+    Sb.order_ids(tester)
+    assert [rec.id for rec in tester.records] == ["Seq", "Seq-1", "Seq02", "Seq2b1", "Seq2b9", "Seq2b10", "Seq10",
+                                                  "seq3"]
+
+
+def test_order_recs_stream():
+    expected = Sb.order_ids(Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")))
+    # A small chunk size forces the records to be spilled into several sorted runs and merged back together
+    tester = Sb.order_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.gb")), "id", chunk_size=4)
+    assert type(tester) == Sb.SeqBuddyStream
+    assert [(rec.id, str(rec.seq), len(rec.features)) for rec in tester] == \
+        [(rec.id, str(rec.seq), len(rec.features)) for rec in expected.records]
+
+    expected = Sb.order_recs(Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")), "length", reverse=True)
+    tester = Sb.order_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), "length", reverse=True, chunk_size=3)
+    assert [rec.id for rec in tester] == [rec.id for rec in expected.records]
+
+
 # #####################  '-prr', '--pull_random_recs' ###################### ##
 @pytest.mark.parametrize("seqbuddy", sb_objects)
 def test_pull_random_recs(seqbuddy):
@@ -1436,6 +2085,49 @@ def test_pull_random_recs(seqbuddy):
     assert tester.records[0].id in orig_seqs
 
 
+def test_pull_random_recs_seed():
+    ids = [rec.id for rec in Sb.pull_random_recs(Sb.make_copy(sb_objects[0]), 5, seed=7).records]
+    assert len(set(ids)) == 5
+    assert ids == [rec.id for rec in Sb.pull_random_recs(Sb.make_copy(sb_objects[0]), 5, seed=7).records]
+
+    tester = Sb.pull_random_recs(Sb.make_copy(sb_objects[0]), 50, replace=True, seed=7)
+    assert len(tester.records) == 50
+    assert len(set([rec.id for rec in tester.records])) <= 13
+    # Repeat picks are separate objects
+    assert len(set([id(rec) for rec in tester.records])) == 50
+
+
+def test_pull_random_recs_stream():
+    ids = [rec.id for rec in sb_objects[0].records]
+    tester = Sb.pull_random_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 5, seed=2)
+    assert type(tester) == Sb.SeqBuddy
+    assert len(set([rec.id for rec in tester.records])) == 5
+    assert not [rec.id for rec in tester.records if rec.id not in ids]
+    assert [rec.id for rec in tester.records] == \
+        [rec.id for rec in Sb.pull_random_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 5, seed=2).records]
+
+    tester = Sb.pull_random_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 20)
+    assert sorted([rec.id for rec in tester.records]) == sorted(ids)
+
+    tester = Sb.pull_random_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 40, replace=True)
+    assert len(tester.records) == 40
+    assert not [rec.id for rec in tester.records if rec.id not in ids]
+
+
+# ######################  '-bts', '--bootstrap' ###################### #
+def test_bootstrap():
+    ids = [rec.id for rec in sb_objects[0].records]
+    tester = Sb.bootstrap(Sb.make_copy(sb_objects[0]), seed=4)
+    assert len(tester.records) == 13
+    assert not [rec.id for rec in tester.records if rec.id not in ids]
+    assert len(set([rec.id for rec in tester.records])) < 13  # Odds of no repeats in 13 draws are ~1 in 50,000
+    assert [rec.id for rec in tester.records] == \
+        [rec.id for rec in Sb.bootstrap(Sb.make_copy(sb_objects[0]), seed=4).records]
+
+    tester = Sb.bootstrap(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 30)
+    assert len(tester.records) == 30
+
+
 # #####################  '-pre', '--pull_record_ends' ###################### ##
 def test_pull_record_ends():
     tester = Sb.pull_record_ends(Sb.make_copy(sb_objects[1]), 10)
@@ -1467,6 +2159,29 @@ def test_pull_recs(seqbuddy, next_hash):
     assert seqs_to_hash(tester) == next_hash
 
 
+def test_pull_recs_batch():
+    # Anchored literals are exact matches, plain strings are substrings, and everything else is a regex
+    tester = Sb.pull_recs(Sb.make_copy(sb_objects[0]), ['^Mle-Panxα1$', 'α1[01]', 'Panxα3'])
+    assert sorted([rec.id for rec in tester.records]) == ['Mle-Panxα1', 'Mle-Panxα10A', 'Mle-Panxα10B', 'Mle-Panxα11',
+                                                        'Mle-Panxα3']
+
+    tester = Sb.pull_recs(Sb.make_copy(sb_objects[0]), ['^Mle\\-Panxα1$'])
+    assert [rec.id for rec in tester.records] == ['Mle-Panxα1']
+
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n\nMle-Panxα1\n")
+    tester = Sb.pull_recs(Sb.make_copy(sb_objects[0]), [], id_files=id_file.path)
+    assert sorted([rec.id for rec in tester.records]) == ['Mle-Panxα1', 'Mle-Panxα4', 'Mle-Panxα8']
+
+    tester = Sb.delete_records(Sb.make_copy(sb_objects[0]), ['α1'], id_files=[id_file.path])
+    assert len(tester.records) == 6
+    assert not [rec.id for rec in tester.records if rec.id in ['Mle-Panxα4', 'Mle-Panxα8'] or 'α1' in rec.id]
+
+    # A pattern that happens to name a file is still just a pattern
+    tester = Sb.pull_recs(Sb.make_copy(sb_objects[0]), id_file.path)
+    assert not tester.records
+
+
 # #####################  '-prg', '--purge' ###################### ##
 def test_purge():
     tester = Sb.SeqBuddy(resource("Mnemiopsis_pep.fa"))
@@ -1474,6 +2189,54 @@ def test_purge():
     assert seqs_to_hash(tester) == 'b21b2e2f0ca1fcd7b25efbbe9c08858c'
 
 
+def test_purge_greedy():
+    families = """\
+>fam2_2
+HFWFQEGQNFCQLFRYGTRSMSKISPFEPVGSMGDSKTVTNDNWCLNVKSKLMGWAWVKMCRLT
+>fam1_2
+PWARCGYHEIRNTNTKREWQLCQDHMTYNFMKVWLYLGDFLSGCDYVPCYYNKR
+>fam1_1
+PWARCGYHEIQNTNTKREWNLCQDHMTYNFMKVDLMLGDFLSGCDYDPCIYNKRQFC
+>fam2_1
+HFWKQEGQNFCQLFRYGTRSHSKLSPFEPVGSMGDSKTVTNDNWCLNVKSKLMGWASVKMKRLTNNK
+>fam2_0
+HFWFQEGQNFCQLFRYGTRSMSKLSPFEPVGSMGDSKTVTNDNWCLNVKSKLMGWASVKMKRLTNNKNQN
+>fam0_1
+YKNTARICGENSIPVEWIAHQKGPGDFYYRFFAAHHGGLMHVNGHPLANQGFKDMLYGAYMDLNLSMGSSGCKANPA
+>fam0_0
+YKNTARICGENSIPVEWIAHQKGPGDFYYRFFAAHHGGLMHVHGHPLANQGFKDMLYWAYMDLNLSMGSSGCKANPAVQN
+>fam0_2
+YKNTARICGENSIPVEWITHQTGPGDFYYRFFAAHHSGLMHVHGHPHANQGFKDMLYWAYMDLNLSMGSSGCKA
+>fam1_0
+PWARCGYHEIRNTNTKREWNLCQDHMTYNFMKVDLMLGDFLSGCDYVPCIYNKRQFCCSM
+"""
+    bin_dir = mock_blast_bins("makeblastdb", "blastp")
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+        # The longest member of each family is kept
+        tester = Sb.purge(Sb.SeqBuddy(families, in_format="fasta"), 50, greedy=True)
+        assert [(rec.id, tester.results.get(rec, "purge_set")) for rec in tester.records] == \
+            [('fam2_0', ['fam2_1', 'fam2_2']), ('fam0_0', ['fam0_1', 'fam0_2']), ('fam1_0', ['fam1_1', 'fam1_2'])]
+        assert tester.results.to_tsv() == Sb.purge(Sb.SeqBuddy(families, in_format="fasta"), 50).results.to_tsv()
+
+        # Small batches lean on the established representatives instead of the intra-batch search
+        clusters = Sb._purge_greedy(Sb.SeqBuddy(families, in_format="fasta"), 50, batch_size=2)
+        assert clusters == OrderedDict([(6, [5, 7]), (4, [3, 0]), (8, [2, 1])])
+
+        # Nothing is BLASTed if the k-mer prefilter can't be satisfied
+        clusters = Sb._purge_greedy(Sb.SeqBuddy(families, in_format="fasta"), 50, min_shared=1.1)
+        assert list(clusters.values()) == [[]] * 9
+
+        # The prefilter works on sim_ident() style sketches, so long sequences can be subsampled without losing hits
+        clusters = Sb._purge_greedy(Sb.SeqBuddy(families, in_format="fasta"), 50, sketch_size=10)
+        assert clusters == OrderedDict([(6, [5, 7]), (4, [3, 0]), (8, [2, 1])])
+
+    # A failed BLAST run is an error, not a set of unrelated sequences
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path, "MOCK_BLAST_FAIL": "blastp"}):
+        with pytest.raises(RuntimeError) as e:
+            Sb._purge_greedy(Sb.SeqBuddy(families, in_format="fasta"), 50)
+        assert "blastp failed with exit code 1. BLAST engine error: Mock failure" in str(e)
+
+
 # ######################  '-ri', '--rename_ids' ###################### #
 hashes = ["8b4a9e3d3bb58cf8530ee18b9df67ff1", "78c73f97117bd937fd5cf52f4bd6c26e", "243024bfd2f686e6a6e0ef65aa963494",
           "98bb9b57f97555d863054ddb526055b4", "2443c47a712f19099e94fc015dc980a9", "65196fd4f2a4e339e1545f6ed2a6acc3"]
@@ -1581,6 +2344,85 @@ def test_shuffle_seqs():
         for indx, record in enumerate(tester1.records):
             assert sorted(record.seq) == sorted(tester2.records[indx].seq)
 
+    tester1 = Sb.shuffle_seqs(Sb.make_copy(sb_objects[0]), seed=12)
+    tester2 = Sb.shuffle_seqs(Sb.make_copy(sb_objects[0]), seed=12)
+    assert seqs_to_hash(tester1) == seqs_to_hash(tester2)
+
+    tester2 = Sb.shuffle_seqs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), seed=12)
+    assert [str(rec.seq) for rec in tester2] == [str(rec.seq) for rec in tester1.records]
+
+
+# ##################### '-sid', 'sim_ident' ###################### ##
+def test_sim_ident():
+    tester = Sb.SeqBuddy(">a\nACGTACGTAA\n>b\nACGTACGTAA\n>c\nACGTACGTCC\n>d\nGGGGGGGGGG\n", in_format="fasta")
+    matrix = Sb.sim_ident(tester, kmer_size=4)
+    assert matrix.jaccard("a", "b") == 1.
+    assert matrix.identity("a", "b") == 1.
+    assert matrix.jaccard("a", "a") == 1.
+    # a = {ACGT, CGTA, GTAC, TACG, GTAA}, c = {ACGT, CGTA, GTAC, TACG, CGTC, GTCC}
+    assert round(matrix.jaccard("a", "c"), 4) == round(4 / 7, 4)
+    assert matrix.jaccard("c", "a") == matrix.jaccard("a", "c")
+    assert matrix.jaccard("a", "d") == 0.
+    assert matrix.distance("a", "d") == 1.
+    assert 0 < matrix.identity("a", "c") < 1
+
+    tester = Sb.SeqBuddy(">a\nACGTAC-NACGTAC\n>b\nACGUAC\n", in_format="fasta")
+    assert Sb.sim_ident(tester, kmer_size=4).jaccard("a", "b") == 1.
+
+    with pytest.raises(ValueError) as e:
+        Sb.sim_ident(Sb.make_copy(sb_objects[6]), kmer_size=13)
+    assert "is too large for the alphabet" in str(e.value)
+
+    for kmer_size in [0, -3]:
+        with pytest.raises(ValueError) as e:
+            Sb.sim_ident(Sb.make_copy(sb_objects[6]), kmer_size=kmer_size)
+        assert "kmer_size must be at least 1, not %s." % kmer_size in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        Sb.sim_ident(Sb.make_copy(sb_objects[6]), sketch_size=0)
+    assert "sketch_size must be at least 1, not 0." in str(e.value)
+
+
+def test_kmer_sketches():
+    (hashes1, set1, truncated1), (hashes2, set2, truncated2) = Sb._kmer_sketches(["ACGTAC", "acgNac"],
+                                                                                 IUPAC.ambiguous_dna, 3, 2)
+    assert len(hashes1) == 2 and truncated1  # ACG, CGT, GTA, and TAC, subsampled down to 2
+    assert len(hashes2) == 1 and not truncated2  # Only ACG, the ambiguous residue breaks up the rest
+    assert set1 == set(hashes1) and set2 == set(hashes2)
+    assert list(hashes2) == list(Sb._minhash(Sb._kmer_profile("ACG", 3, "ACGT"), 2)[0])
+
+    sketches = Sb._kmer_sketches(["MKVLAAG"], IUPAC.protein, 3, 100)
+    assert len(sketches[0][0]) == 5
+
+
+def test_sim_ident_sketch():
+    tester = Sb.make_copy(sb_objects[0])
+    exact = Sb.sim_ident(tester, sketch_size=100000)
+    sketched = Sb.sim_ident(tester, sketch_size=200)
+    ids = [rec.id for rec in tester.records]
+    for id1, id2 in zip(ids[:-1], ids[1:]):
+        assert abs(exact.jaccard(id1, id2) - sketched.jaccard(id1, id2)) < 0.1
+
+    tester = Sb.make_copy(sb_objects[6])
+    assert str(Sb.sim_ident(tester, workers=2)) == str(Sb.sim_ident(tester))
+
+
+def test_sim_ident_failed_rows(monkeypatch):
+    def fail_row_two(jobs, func, func_args, **kwargs):  # Same as if the job for row 2 had raised in its worker
+        return [None if indx == 2 else func(indx, func_args) for indx in jobs]
+
+    monkeypatch.setattr(Sb.MyFuncs, "run_multicore_function", fail_row_two)
+    with pytest.raises(RuntimeError) as e:
+        Sb.sim_ident(Sb.make_copy(sb_objects[6]), workers=2)
+    assert "sim_ident() failed to compare 1 record(s) against the rest (%s)" % sb_objects[6].records[2].id \
+        in str(e.value)
+
+    test_in_args = deepcopy(in_args)
+    test_in_args.sim_ident = [[]]
+    test_in_args.cores = 2
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[6]))
+
 
 # #####################  make_groups' ###################### ##
 def test_make_groups():
@@ -1630,7 +2472,7 @@ def test_make_groups():
 
 # ######################  '-tr6', '--translate6frames' ###################### #
 # Only fasta and genbank
-hashes = ["95cf24202007399e6ccd6e6f33ae012e", "0b5daa810e1589c3973e1436c40baf08"]
+hashes = ["d5d39ae9212397f491f70d6928047341", "0b5daa810e1589c3973e1436c40baf08"]
 hashes = [(Sb.make_copy(sb_objects[indx]), value) for indx, value in enumerate(hashes)]
 
 
@@ -1646,9 +2488,9 @@ def test_translate6frames_pep_exception():
 
 
 # ######################  '-tr', '--translate' ###################### #
-hashes = ["06893e14839dc0448e6f522c1b8f8957", "e8840e22096e933ce10dbd91036f3fa5", "f3339e0193c10427f017dd8f6bd81d7e"]
+hashes = ["3de7b7be2f2b92cf166b758625a1f316", "e8840e22096e933ce10dbd91036f3fa5", "9e6634c1b8adfba6b64d30caf94103c5"]
 hashes = [(Sb.make_copy(sb_objects[indx]), value) for indx, value in enumerate(hashes)]
-hashes.append((Sb.make_copy(sb_objects[13]), "648ccc7c3400882be5bf6e8d9781f74e"))
+hashes.append((Sb.make_copy(sb_objects[13]), "093e4d8ad756f4e9ffb3aef3f3364000"))
 
 
 @pytest.mark.parametrize("seqbuddy,next_hash", hashes)
@@ -1674,6 +2516,27 @@ def test_translate_edges_and_exceptions(capsys):
     assert string2hash(err) == "9e2a0b4b03f54c209d3a9111792762df"
 
 
+def test_translate_tables():
+    tester = Sb.translate_cds(Sb.SeqBuddy(">seq1\nATGAGATGAGCNTARNNN", in_format="fasta"))
+    assert str(tester.records[0].seq) == "MR*A*X"
+
+    tester = Sb.translate_cds(Sb.SeqBuddy(">seq1\nATGAGATGAGCNTARNNN", in_format="fasta"), table=2)
+    assert str(tester.records[0].seq) == "M*WA*X"
+
+    tester = Sb.translate_cds(Sb.SeqBuddy(">seq1\nATG---AG-GCA--T", in_format="fasta"), alignment=True, quiet=True)
+    assert str(tester.records[0].seq) == "M-XA-"
+
+    with pytest.raises(ValueError) as e:
+        Sb.translate_cds(Sb.SeqBuddy(">seq1\nATGAGATGA", in_format="fasta"), table=99)
+    assert "Unknown NCBI translation table: 99" in str(e)
+
+    tester = Sb.translate6frames(Sb.SeqBuddy(">seq1\nATGAGATGAGC", in_format="fasta"), table=2)
+    assert [str(rec.seq) for rec in tester.records] == ["M*W", "WDE", "EMS", "AHL", "LIS", "SSH"]
+
+    stream = Sb.translate6frames(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")))
+    assert str(stream.to_seqbuddy()) == str(Sb.translate6frames(Sb.SeqBuddy(resource("Mnemiopsis_cds.fa"))))
+
+
 # ################################################# COMMAND LINE UI ################################################## #
 # ##################### '-ano', '--annotate' ###################### ##
 def test_annotate_ui(capsys):
@@ -1774,6 +2637,22 @@ def test_blast_ui(capsys):
     assert "RuntimeError:" in err
 
 
+# ######################  '-bts', '--bootstrap' ###################### #
+def test_bootstrap_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.bootstrap = [None]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert len(Sb.SeqBuddy(out).records) == 13
+
+    test_in_args.bootstrap = [25]
+    test_in_args.seed = 9
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert [rec.id for rec in Sb.SeqBuddy(out).records] == \
+        [rec.id for rec in Sb.bootstrap(Sb.make_copy(sb_objects[0]), 25, seed=9).records]
+
+
 # ######################  '-cs', '--clean_seq' ###################### #
 def test_clean_seq_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -1937,6 +2816,17 @@ def test_delete_records_ui(capsys):
     assert string2hash(err) == "553348fa37d9c67f4ce0c8c53b578481"
 
 
+def test_delete_records_ui_id_file(capsys):
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n")
+    test_in_args = deepcopy(in_args)
+    test_in_args.delete_records = ["file:%s" % id_file.path]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert len(Sb.SeqBuddy(out).records) == len(sb_objects[0].records) - 2
+    assert "Mle-Panxα4\nMle-Panxα8\n" in err
+
+
 # ######################  '-drp', '--delete_repeats' ###################### #
 def test_delete_repeats_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -1995,12 +2885,25 @@ def test_find_cpg_ui(capsys):
     out, err = capsys.readouterr()
     assert err == "# No Islands identified\n\n"
 
+    test_in_args.find_CpG = [["100", "0.55"]]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[1]), True)
+    out, err = capsys.readouterr()
+    assert "Mle-Panxα9: 989-1203\n" in err
+
     with pytest.raises(SystemExit):
         Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[7]))
     out, err = capsys.readouterr()
     assert "DNA sequence required, not protein or RNA" in err
 
 
+def test_find_cpg_ui_bad_args():
+    test_in_args = deepcopy(in_args)
+    for args in [["0"], ["abc"], ["100", "-1"]]:
+        test_in_args.find_CpG = [args]
+        with pytest.raises(SystemExit):
+            Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[1]))
+
+
 # ######################  '-fp', '--find_pattern' ###################### #
 def test_find_pattern_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -2008,10 +2911,38 @@ def test_find_pattern_ui(capsys):
     Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[1]), True)
     out, err = capsys.readouterr()
 
-    assert string2hash(out) == "0e11b2c0e9451fbfcbe39e3b5be2cf60"
+    assert string2hash(out) == "93fa8aa3581d5e129d4b013436f87a8c"
     assert string2hash(err) == "f2bb95f89e7b9e198f18a049afbe4a93"
 
 
+def test_find_pattern_ui_file(capsys):
+    tmp_dir = MyFuncs.TempDir()
+    with open("%s%smotifs.fa" % (tmp_dir.path, os.path.sep), "w") as ofile:
+        ofile.write(">motif1\nATRG\n>motif2\nCCAT\n")
+    test_in_args = deepcopy(in_args)
+    test_in_args.find_pattern = ["file:%s%smotifs.fa" % (tmp_dir.path, os.path.sep), "ATGG", "ambig", "revcomp"]
+    tester = Sb.SeqBuddy(">seq1\nttATGGATAGccCCATaaaa", in_format="fasta")
+    Sb.command_line_ui(test_in_args, tester, True)
+    out, err = capsys.readouterr()
+    assert out == ">seq1\nttATGGATAGccCCATaaaa\n"
+    assert tester.results.keys() == ["find_patterns"]
+    assert list(tester.results.get(tester.records[0], "find_patterns").keys()) == ["ATRG", "CCAT", "ATGG"]
+
+    # Without the prefix, a path is just another pattern
+    test_in_args.find_pattern = ["%s%smotifs.fa" % (tmp_dir.path, os.path.sep)]
+    tester = Sb.SeqBuddy(">seq1\nttATGGATAGccCCATaaaa", in_format="fasta")
+    Sb.command_line_ui(test_in_args, tester, True)
+    out, err = capsys.readouterr()
+    assert list(tester.results.get(tester.records[0], "find_patterns").keys()) == \
+        ["%s%smotifs.fa" % (tmp_dir.path, os.path.sep)]
+
+    test_in_args.find_pattern = ["MKV", "revcomp"]
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[6]))
+    out, err = capsys.readouterr()
+    assert not out
+
+
 # ######################  '-frp', '--find_repeats' ###################### #
 def test_find_repeats_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -2030,6 +2961,18 @@ def test_find_repeats_ui(capsys):
     out, err = capsys.readouterr()
     assert string2hash(out) == "b34b99828596a5a46c6ab244c6ccc6f6"
 
+    test_in_args.find_repeats = [True]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Duplicate_seqs.fa")), True)
+    eager_out, err = capsys.readouterr()
+
+    test_in_args.quiet = False
+    test_in_args.stream = True
+    test_in_args.low_memory = True
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Duplicate_seqs.fa")), True)
+    out, err = capsys.readouterr()
+    assert out == eager_out
+    assert err == ""
+
 
 # ######################  '-frs', '--find_restriction_sites' ###################### #
 def test_find_restriction_sites_ui(capsys):
@@ -2046,6 +2989,14 @@ def test_find_restriction_sites_ui(capsys):
     assert "Unable to identify restriction sites in protein sequences." in err
 
 
+def test_find_restriction_sites_ui_table(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.find_restriction_sites = [["MaeI", "EcoRI", "table"]]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert out.startswith("# ### Restriction Sites (indexed at cut-site) ### #\nMle-Panxα9\nMaeI\t605, 776\n\n")
+
+
 # ######################  '-gbp', '--group_by_prefix' ###################### #
 def test_group_by_prefix_ui(capsys):
     tester = Sb.SeqBuddy(resource("Cnidaria_pep.nexus"))
@@ -2454,6 +3405,29 @@ def test_order_ids_randomly_ui(capsys):
     assert seqs_to_hash(tester) == seqs_to_hash(Sb.order_ids(Sb.make_copy(sb_objects[0])))
 
 
+# ######################  '-or', '--order_recs' ###################### #
+def test_order_recs_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.order_recs = [["length", "rev"]]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")), True)
+    out, err = capsys.readouterr()
+    lengths = [len(rec.seq) for rec in Sb.SeqBuddy(out).records]
+    assert lengths == sorted(lengths, reverse=True)
+
+    test_in_args.order_recs = [["regex", "α([0-9]+)", "rev"]]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")), True)
+    out, err = capsys.readouterr()
+    assert Sb.SeqBuddy(out).records[0].id == "Mle-Panxα12"
+
+    test_in_args.order_recs = [["foo"]]
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")))
+
+    test_in_args.order_recs = [["regex", "α([0-9]+"]]
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Mnemiopsis_cds.fa")))
+
+
 # ######################  '-prr', '--pull_random_recs' ###################### #
 def test_pull_random_recs_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -2471,6 +3445,13 @@ def test_pull_random_recs_ui(capsys):
     assert len(tester.records) == 13
     assert sorted([rec.id for rec in tester.records]) == sorted([rec.id for rec in sb_objects[0].records])
 
+    test_in_args.pull_random_record = [5]
+    test_in_args.seed = 1
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), True)
+    out, err = capsys.readouterr()
+    assert [rec.id for rec in Sb.SeqBuddy(out).records] == \
+        [rec.id for rec in Sb.pull_random_recs(Sb.SeqBuddyStream(resource("Mnemiopsis_cds.fa")), 5, seed=1).records]
+
 
 # ######################  '-pr', '--pull_record_ends' ###################### #
 def test_pull_record_ends_ui(capsys):
@@ -2499,6 +3480,15 @@ def test_pull_records_ui(capsys):
     out, err = capsys.readouterr()
     assert string2hash(out) == "cd8d7284f039233e090c16e8aa6b5035"
 
+    id_file = MyFuncs.TempFile()
+    id_file.write("Mle-Panxα4\nMle-Panxα8\n")
+    test_in_args.pull_records = ["file:%s" % id_file.path, "α1"]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert sorted([rec.id for rec in Sb.SeqBuddy(out).records]) == ['Mle-Panxα1', 'Mle-Panxα10A', 'Mle-Panxα10B',
+                                                                   'Mle-Panxα11', 'Mle-Panxα12', 'Mle-Panxα4',
+                                                                   'Mle-Panxα8']
+
 
 # ######################  '-prg', '--purge' ###################### #
 def test_purge_ui(capsys):
@@ -2510,6 +3500,30 @@ def test_purge_ui(capsys):
     assert string2hash(err) == "fbfde496ae179f83e3d096da15d90920"
 
 
+def test_purge_greedy_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.purge = ["30", "greedy"]
+    tester = Sb.SeqBuddy(">seq1\nMKVLAAGIVGLLLAAQPAMAHHHHHHKVLAAG\n>seq2\nMKVLAAGIVGLLLAAQPAMAHHHHHH\n"
+                         ">seq3\nWWPCRTYNDEQSFGWWPCRTYNDEQSFG", in_format="fasta")
+    bin_dir = mock_blast_bins("blastp")
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path}):
+        Sb.command_line_ui(test_in_args, tester, True)
+    out, err = capsys.readouterr()
+    assert out == ">seq1\nMKVLAAGIVGLLLAAQPAMAHHHHHHKVLAAG\n>seq3\nWWPCRTYNDEQSFGWWPCRTYNDEQSFG\n"
+
+    with mock.patch.dict(os.environ, {"PATH": bin_dir.path, "MOCK_BLAST_FAIL": "blastp"}):
+        with pytest.raises(SystemExit):
+            Sb.command_line_ui(test_in_args, Sb.make_copy(tester))
+
+
+@pytest.mark.parametrize("purge_args", [["30", "foo"], ["30", "gr"], ["30", "greedy", "foo"]])
+def test_purge_ui_bad_args(purge_args):
+    test_in_args = deepcopy(in_args)
+    test_in_args.purge = purge_args
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.make_copy(sb_resources.get_one("p f")))
+
+
 # ######################  '-ri', '--rename_ids' ###################### #
 def test_rename_ids_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -2677,6 +3691,106 @@ def test_shuffle_seqs_ui(capsys):
     assert string2hash(out) != "b831e901d8b6b1ba52bad797bad92d14"
 
 
+# ######################  '-sid', '--sim_ident' ###################### #
+def test_sim_ident_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.sim_ident = [[]]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    out = out.strip().split("\n")
+    assert len(out) == len(sb_objects[0].records) + 1
+    assert out[1].split("\t")[1] == "1.0000"
+
+    test_in_args.sim_ident = [["4", "50"]]
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[6]), True)
+    out, err = capsys.readouterr()
+    assert out.split("\n")[1].split("\t")[1] == "1.0000"
+
+
+@pytest.mark.parametrize("sid_args", [["-3"], ["0"], ["4", "0"]])
+def test_sim_ident_ui_bad_args(sid_args):
+    test_in_args = deepcopy(in_args)
+    test_in_args.sim_ident = [sid_args]
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[6]))
+
+
+# ######################  '-ix', '--index' ###################### #
+def test_index_ui(capsys):
+    tmp_dir = MyFuncs.TempDir()
+    tmp_path = os.path.join(tmp_dir.path, "Mnemiopsis_cds.fa")
+    shutil.copyfile(resource("Mnemiopsis_cds.fa"), tmp_path)
+
+    test_in_args = deepcopy(in_args)
+    test_in_args.pull_records = ["α[2-4]"]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(tmp_path), True)
+    eager_out, err = capsys.readouterr()
+
+    Sb.command_line_ui(test_in_args, Sb.SeqIndex(tmp_path), True)
+    out, err = capsys.readouterr()
+    assert out == eager_out
+
+    test_in_args.pull_records = False
+    test_in_args.uppercase = True
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(tmp_path), True)
+    eager_out, err = capsys.readouterr()
+
+    Sb.command_line_ui(test_in_args, Sb.SeqIndex(tmp_path), True)
+    out, err = capsys.readouterr()
+    assert out == eager_out
+
+
+# ######################  '-s', '--stream' ###################### #
+def test_stream_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.quiet = False
+    test_in_args.reverse_complement = True
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("Mnemiopsis_cds.gb")), True)
+    eager_out, err = capsys.readouterr()
+
+    test_in_args.stream = True
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Mnemiopsis_cds.gb")), True)
+    out, err = capsys.readouterr()
+    assert out == eager_out
+    assert err == ""
+
+    test_in_args.reverse_complement = False
+    test_in_args.pull_records = ["foo"]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Mnemiopsis_cds.gb")), True)
+    out, err = capsys.readouterr()
+    assert out == "Error: No sequences in object.\n"
+
+    test_in_args.pull_records = False
+    test_in_args.num_seqs = True
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Mnemiopsis_cds.gb")), True)
+    out, err = capsys.readouterr()
+    assert out == "13\n"
+    assert "all records are being read into memory" in err
+
+    test_in_args.num_seqs = False
+    test_in_args.translate = True
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.SeqBuddyStream(resource("Mnemiopsis_pep.fa")))
+    out, err = capsys.readouterr()
+    assert "Nucleic acid sequence required, not protein." in err
+
+
+@pytest.mark.parametrize("stream", [[], ["-s"]])
+def test_broken_pipe_ui(stream):
+    # Output bigger than the pipe buffer, read by something that hangs up early (e.g., `| head -1`)
+    tmp_file = MyFuncs.TempFile()
+    with open(resource("Mnemiopsis_cds.fa"), "r") as ifile:
+        tmp_file.write(ifile.read() * 20)
+    command = [sys.executable, os.path.join(os.path.dirname(Sb.__file__), "SeqBuddy.py"), tmp_file.path, "-uc"]
+    process = Popen(command + stream, stdout=PIPE, stderr=PIPE)
+    assert process.stdout.readline().decode().startswith(">Mle-Panxα9 ")
+    process.stdout.close()
+    err = process.stderr.read().decode()
+    process.stderr.close()
+    assert process.wait() == 0
+    assert err == ""
+
+
 # ######################  '-d2r', '--transcribe' ###################### #
 def test_transcribe_ui(capsys):
     test_in_args = deepcopy(in_args)
@@ -2698,11 +3812,11 @@ def test_translate_ui(capsys):
     test_in_args.translate = True
     Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
     out, err = capsys.readouterr()
-    assert string2hash(out) == "06893e14839dc0448e6f522c1b8f8957"
+    assert string2hash(out) == "3de7b7be2f2b92cf166b758625a1f316"
 
     Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("ambiguous_rna.fa")), True)
     out, err = capsys.readouterr()
-    assert string2hash(out) == "648ccc7c3400882be5bf6e8d9781f74e"
+    assert string2hash(out) == "093e4d8ad756f4e9ffb3aef3f3364000"
 
     tester = Sb.SeqBuddy(resource("mixed_alpha.fa"))
     tester.alpha = IUPAC.ambiguous_dna
@@ -2717,6 +3831,33 @@ def test_translate_ui(capsys):
     out, err = capsys.readouterr()
     assert "Nucleic acid sequence required, not protein." in err
 
+    test_in_args.translate = [2]
+    Sb.command_line_ui(test_in_args, Sb.SeqBuddy(">seq1\nATGAGATGA", in_format="fasta"), True)
+    out, err = capsys.readouterr()
+    assert out == ">seq1\nM*W\n"
+
+
+def test_translate_cores_ui(capsys):
+    test_in_args = deepcopy(in_args)
+    test_in_args.translate = True
+    test_in_args.cores = 2
+    Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
+    out, err = capsys.readouterr()
+    assert string2hash(out) == "3de7b7be2f2b92cf166b758625a1f316"
+
+
+def test_cores_ui_bad_args():
+    test_in_args = deepcopy(in_args)
+    test_in_args.translate = True
+    test_in_args.cores = -2
+    with pytest.raises(SystemExit):
+        Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]))
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["-x", "seqbuddy_test.py"])
+    assert parser.parse_args(["-x"]).cores == 0
+    assert parser.parse_args(["-x", "3"]).cores == 3
+
 
 # ######################  '-tr6', '--translate6frames' ###################### #
 def test_translate6frames_ui(capsys):
@@ -2724,18 +3865,18 @@ def test_translate6frames_ui(capsys):
     test_in_args.translate6frames = True
     Sb.command_line_ui(test_in_args, Sb.make_copy(sb_objects[0]), True)
     out, err = capsys.readouterr()
-    assert string2hash(out) == "95cf24202007399e6ccd6e6f33ae012e"
+    assert string2hash(out) == "d5d39ae9212397f491f70d6928047341"
 
     Sb.command_line_ui(test_in_args, Sb.SeqBuddy(resource("ambiguous_rna.fa")), True)
     out, err = capsys.readouterr()
-    assert string2hash(out) == "6d3fcad0ea417014bc825cedd354fd26"
+    assert string2hash(out) == "d2e9371538f3e335b1b384a988a47d99"
     assert err == ""
 
     tester = Sb.SeqBuddy(resource("mixed_alpha.fa"))
     tester.alpha = IUPAC.ambiguous_dna
     Sb.command_line_ui(test_in_args, tester, True)
     out, err = capsys.readouterr()
-    assert string2hash(out) == "b54ec5c49bd88126de337e1eb3d2ad23"
+    assert string2hash(out) == "c4d6406146bda0559599acb34014aac4"
 
     tester.records[0].seq.alphabet = IUPAC.protein
     with pytest.raises(SystemExit):
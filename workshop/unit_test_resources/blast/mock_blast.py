@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in for the NCBI makeblastdb, blastdbcmd, blastn, and blastp binaries, so bl2seq() and blast() can be tested
+(and benchmarked) without BLAST+ installed. Call as `mock_blast.py <binary name> <args>`. Hits are scored with a naive
+ungapped comparison from the start of each sequence, which is deterministic and independent of database size, so the
+pairwise (-subject) and database (-db) modes report identical numbers. Every hit is followed by a weaker second HSP to
+make sure only the top one is kept. Set MOCK_BLAST_FAIL to the name of a binary to make it exit with an error.
+"""
+import os
+import sys
+import shutil
+
+
+def read_fasta(handle):
+    seqs = []
+    for chunk in handle.read().split(">")[1:]:
+        chunk = chunk.strip().split("\n")
+        seqs.append((chunk[0].split()[0], "".join(chunk[1:]).upper()))
+    return seqs
+
+
+def score(query, subject):
+    length = min(len(query), len(subject))
+    matches = sum([1 for q, s in zip(query, subject) if q == s])
+    ident = round(100 * matches / length, 2) if length else 0
+    if ident < 30:
+        return None
+    bit_score = round(matches * 1.5, 1)
+    evalue = "0.0" if bit_score > 500 else "%.2g" % (len(query) * len(subject) * 2 ** -bit_score)
+    return ident, length, evalue, bit_score
+
+
+def main(binary, args):
+    if os.environ.get("MOCK_BLAST_FAIL") == binary:
+        sys.stderr.write("BLAST engine error: Mock failure\n")
+        sys.exit(1)
+
+    args = dict(zip(args[::2], args[1::2]))
+    if binary == "makeblastdb":
+        shutil.copyfile(args["-in"], "%s.mockdb" % args["-out"])
+        for extension in ["hr", "in", "og", "sd", "si", "sq"]:
+            open("%s.%s%s" % (args["-out"], args["-dbtype"][0], extension), "w").close()
+        print("Building a new DB")
+        return
+
+    if binary == "blastdbcmd":
+        with open("%s.mockdb" % args["-db"], "r") as ifile:
+            database = dict(read_fasta(ifile))
+        if "-entry_batch" in args:
+            with open(args["-entry_batch"], "r") as ifile:
+                entries = ifile.read().split()
+        else:
+            entries = [args["-entry"]]
+        for entry in entries:
+            print(">%s\n%s" % (entry, database[entry.replace("lcl|", "")]))
+        return
+
+    if "-query" in args:
+        with open(args["-query"], "r") as ifile:
+            queries = read_fasta(ifile)
+    else:
+        queries = read_fasta(sys.stdin)
+
+    with open(args["-subject"] if "-subject" in args else "%s.mockdb" % args["-db"], "r") as ifile:
+        subjects = read_fasta(ifile)
+
+    max_targets = int(args.get("-max_target_seqs", 500))
+    if "-out" in args:
+        sys.stdout = open(args["-out"], "w")
+    for query_id, query in queries:
+        hits = []
+        for subject_id, subject in subjects:
+            hit = score(query, subject)
+            if hit:
+                hits.append((subject_id, hit))
+        hits = sorted(hits, key=lambda x: -x[1][3])[:max_targets]
+        for subject_id, (ident, length, evalue, bit_score) in hits:
+            print("%s\t%s\t%s\t%s\t0\t0\t1\t%s\t1\t%s\t%s\t%s" % (query_id, subject_id, ident, length, length,
+                                                                  length, evalue, bit_score))
+            print("%s\t%s\t%s\t%s\t0\t0\t1\t%s\t1\t%s\t%s\t%s" % (query_id, subject_id, ident, length // 2,
+                                                                  length // 2, length // 2, "10", bit_score / 2))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], sys.argv[2:])